@@ -2,11 +2,18 @@ import os
 from ardent import ArdentClient, ArdentError
 from dotenv import load_dotenv
 
+from Configs.ConnectionRegistry import register_connection
+
 load_dotenv()
 
 
-Ardent_Client = ArdentClient(
-    public_key=os.getenv("ARDENT_PUBLIC_KEY"),
-    secret_key=os.getenv("ARDENT_SECRET_KEY"),
-    base_url=os.getenv("ARDENT_BASE_URL"),
+# Created on first use, see Configs.ConnectionRegistry
+Ardent_Client = register_connection(
+    "ardent",
+    lambda: ArdentClient(
+        public_key=os.getenv("ARDENT_PUBLIC_KEY"),
+        secret_key=os.getenv("ARDENT_SECRET_KEY"),
+        base_url=os.getenv("ARDENT_BASE_URL"),
+    ),
+    close=lambda client: None,
 )
@@ -0,0 +1,112 @@
+"""
+Lazy connection registry for the backend configs.
+
+Each Config module registers a factory instead of connecting at import time. The
+returned LazyConnection can be imported like the real client (`from Configs.MySQLConfig
+import connection`) and only connects on first use, so a pytest(-xdist) worker pays
+connect latency only for the backends its selected tests actually touch.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+_REGISTRY: Dict[str, "LazyConnection"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class LazyConnection:
+    """Proxy that creates its connection on first use and reuses it within the worker process"""
+
+    def __init__(self, name: str, factory: Callable[[], Any], close: Callable[[Any], None] = None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_close", close)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_pid", None)
+        object.__setattr__(self, "connect_time", None)
+
+    def _get(self) -> Any:
+        if self._instance is not None and self._pid == os.getpid():
+            return self._instance
+        with self._lock:
+            # Connections are never shared with a forked parent
+            if self._instance is None or self._pid != os.getpid():
+                start_time = time.time()
+                instance = self._factory()
+                object.__setattr__(self, "connect_time", time.time() - start_time)
+                object.__setattr__(self, "_instance", instance)
+                object.__setattr__(self, "_pid", os.getpid())
+        return self._instance
+
+    @property
+    def connected(self) -> bool:
+        """Whether this process has already established the connection"""
+        return self._instance is not None and self._pid == os.getpid()
+
+    def close(self) -> None:
+        """Close the connection if this process opened it"""
+        with self._lock:
+            if self.connected:
+                instance = self._instance
+                try:
+                    if self._close is not None:
+                        self._close(instance)
+                    elif hasattr(instance, "close"):
+                        instance.close()
+                except Exception as e:
+                    print(f"Worker {os.getpid()}: Error closing {self._name} connection: {e}")
+            object.__setattr__(self, "_instance", None)
+            object.__setattr__(self, "_pid", None)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._get(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._get(), attr, value)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._get()[key]
+
+    def __enter__(self) -> Any:
+        return self._get().__enter__()
+
+    def __exit__(self, *exc_info) -> Any:
+        return self._get().__exit__(*exc_info)
+
+    def __repr__(self) -> str:
+        state = "connected" if self.connected else "not connected"
+        return f"<LazyConnection {self._name} ({state})>"
+
+
+def register_connection(name: str, factory: Callable[[], Any], close: Callable[[Any], None] = None) -> LazyConnection:
+    """
+    Register a backend connection that is established on first use.
+
+    :param name: Backend name used in connect time reports.
+    :param factory: Callable that creates the connection or client.
+    :param close: Optional callable that releases it (defaults to calling .close()).
+    :return: A proxy that forwards to the connection, connecting on first access.
+    :rtype: LazyConnection
+    """
+    lazy_connection = LazyConnection(name, factory, close)
+    with _REGISTRY_LOCK:
+        _REGISTRY[name] = lazy_connection
+    return lazy_connection
+
+
+def get_connect_stats() -> Dict[str, float]:
+    """Connect time in seconds of every backend this process has connected to"""
+    with _REGISTRY_LOCK:
+        connections = list(_REGISTRY.values())
+    return {c._name: c.connect_time for c in connections if c.connected}
+
+
+def close_all_connections() -> None:
+    """Close every registry connection this process opened"""
+    with _REGISTRY_LOCK:
+        connections = list(_REGISTRY.values())
+    for lazy_connection in connections:
+        lazy_connection.close()
@@ -5,13 +5,15 @@ import asyncio
 from dotenv import load_dotenv
 import os
 
+from Configs.ConnectionRegistry import register_connection
+
 load_dotenv()
 
 uri = os.getenv("MONGODB_URI")
 
-# Create a new client and connect to the server
-syncMongoClient = MongoClient(uri, server_api=ServerApi("1"))
-asyncMongoClient = AsyncIOMotorClient(uri, server_api=ServerApi("1"))
+# Clients are created on first use, see Configs.ConnectionRegistry
+syncMongoClient = register_connection("mongodb", lambda: MongoClient(uri, server_api=ServerApi("1")))
+asyncMongoClient = register_connection("mongodb_async", lambda: AsyncIOMotorClient(uri, server_api=ServerApi("1")))
 
 
 # Define an async function to send a ping
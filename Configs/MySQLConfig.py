@@ -3,13 +3,19 @@ import os
 
 from dotenv import load_dotenv
 
+from Configs.ConnectionRegistry import register_connection
+
 load_dotenv()
 
 
-connection = mysql.connector.connect(
-    host=os.getenv("MYSQL_HOST"),
-    port=os.getenv("MYSQL_PORT"),
-    user=os.getenv("MYSQL_USERNAME"),
-    password=os.getenv("MYSQL_PASSWORD"),
-    connect_timeout=10,
+# Connects on first use, see Configs.ConnectionRegistry
+connection = register_connection(
+    "mysql",
+    lambda: mysql.connector.connect(
+        host=os.getenv("MYSQL_HOST"),
+        port=os.getenv("MYSQL_PORT"),
+        user=os.getenv("MYSQL_USERNAME"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        connect_timeout=10,
+    ),
 )
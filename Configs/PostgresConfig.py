@@ -1,30 +1,29 @@
 import psycopg2
-import os
 from dotenv import load_dotenv
 
+from Configs.ConnectionRegistry import register_connection
+from Environment.PostgreSQL import get_pool, pooled_connection
+
 load_dotenv()
 
-# Create a base PostgreSQL connection to system database
-connection = psycopg2.connect(
-    host=os.getenv("POSTGRES_HOSTNAME"),
-    port=os.getenv("POSTGRES_PORT"),
-    user=os.getenv("POSTGRES_USERNAME"),
-    password=os.getenv("POSTGRES_PASSWORD"),
-    database="postgres",  # Default system database
-    sslmode="require",
-    connect_timeout=10,
+# Base PostgreSQL connection to the system database, opened on first use. It lives as long as the
+# worker, so it is kept outside the bounded pool instead of holding one of the fixtures' slots.
+connection = register_connection(
+    "postgres",
+    lambda: psycopg2.connect(**get_pool("postgres").connect_kwargs),
 )
 
 
 def confirmPostgresConnection():
     """Test PostgreSQL connection with a simple query."""
     try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT version()")
-        version = cursor.fetchone()
-        cursor.close()
+        with pooled_connection("postgres") as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version()")
+            version = cursor.fetchone()
+            cursor.close()
         # print(f"Successfully connected to PostgreSQL: {version[0]}")
         return True
     except Exception as e:
         print(f"PostgreSQL connection error: {e}")
-        return False 
\ No newline at end of file
+        return False
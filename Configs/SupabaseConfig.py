@@ -1,6 +1,12 @@
 from supabase import create_client
 import os
 
+from Configs.ConnectionRegistry import register_connection
 
-supabase_client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
 
+# Created on first use, see Configs.ConnectionRegistry
+supabase_client = register_connection(
+    "supabase",
+    lambda: create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"]),
+    close=lambda client: None,
+)
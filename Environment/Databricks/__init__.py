@@ -7,23 +7,48 @@ for Databricks testing environments.
 
 from .setup import (
     get_or_create_cluster,
+    prewarm_cluster,
     setup_databricks_environment,
     cleanup_databricks_environment,
     clear_cluster_cache,
-    get_cached_cluster_info
+    get_cached_cluster_info,
+    get_cluster_config_hash,
+    list_cached_clusters
 )
 
 from .validation import (
     extract_warehouse_id_from_http_path,
-    execute_sql_query
+    execute_sql_query,
+    StatementError,
+    StatementRunner
+)
+
+from .expectations import (
+    Expectation,
+    PathExists,
+    RowExists,
+    RowCount,
+    compile_expectations,
+    validate_expectations
 )
 
 __all__ = [
     'get_or_create_cluster',
+    'prewarm_cluster',
     'setup_databricks_environment',
     'cleanup_databricks_environment',
     'clear_cluster_cache',
     'get_cached_cluster_info',
+    'get_cluster_config_hash',
+    'list_cached_clusters',
     'extract_warehouse_id_from_http_path',
-    'execute_sql_query'
+    'execute_sql_query',
+    'StatementError',
+    'StatementRunner',
+    'Expectation',
+    'PathExists',
+    'RowExists',
+    'RowCount',
+    'compile_expectations',
+    'validate_expectations'
 ] 
\ No newline at end of file
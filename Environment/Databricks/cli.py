@@ -12,21 +12,24 @@ from datetime import datetime
 from .setup import (
     get_cached_cluster_info,
     clear_cluster_cache,
-    load_cluster_cache
+    list_cached_clusters
 )
 
-def show_cache_status():
+def show_cache_status(config_hash=None):
     """Show current cache status"""
-    info = get_cached_cluster_info()
+    info = get_cached_cluster_info(config_hash)
     
     if not info:
         print("No cached cluster found")
         return
     
     print("Cached Cluster Information:")
+    print(f"  Config Hash: {info['config_hash']}")
     print(f"  Cluster ID: {info['cluster_id']}")
     print(f"  Created At: {info['created_at']}")
     print(f"  Expires At: {info['expiry_time']}")
+    print(f"  Last Used: {info['last_used']}")
+    print(f"  Last Verified: {info['last_verified']} ({info['last_state']})")
     print(f"  Is Valid: {'Yes' if info['is_valid'] else 'No'}")
     
     if info['is_valid']:
@@ -39,6 +42,33 @@ def show_cache_status():
         except:
             print("  Time Remaining: Unable to calculate")
 
+def list_cache():
+    """List every cached cluster, most recently used first"""
+    entries = list_cached_clusters()
+    
+    if not entries:
+        print("No cached clusters found")
+        return
+    
+    print(f"{'CONFIG HASH':<34}{'CLUSTER ID':<24}{'LAST STATE':<12}{'LAST USED':<28}{'VALID'}")
+    for info in entries:
+        print(
+            f"{info['config_hash']:<34}{info['cluster_id'] or '':<24}{info['last_state'] or '':<12}"
+            f"{info['last_used'] or '':<28}{'Yes' if info['is_valid'] else 'No'}"
+        )
+
+def evict_cache_entry(config_hash):
+    """Evict the cached cluster of one config (a unique prefix of the hash is enough)"""
+    matches = [info['config_hash'] for info in list_cached_clusters() if info['config_hash'].startswith(config_hash)]
+    
+    if not matches:
+        print(f"No cached cluster matches {config_hash}")
+        return
+    if len(matches) > 1:
+        print(f"{config_hash} matches {len(matches)} cached clusters, use a longer prefix")
+        return
+    clear_cluster_cache(matches[0])
+
 def clear_cache():
     """Clear the cluster cache"""
     clear_cluster_cache()
@@ -53,6 +83,14 @@ def main():
     
     # Status command
     status_parser = subparsers.add_parser('status', help='Show cache status')
+    status_parser.add_argument('config_hash', nargs='?', help='Config hash (defaults to the most recently used cluster)')
+    
+    # List command
+    list_parser = subparsers.add_parser('list', help='List cached clusters')
+    
+    # Evict command
+    evict_parser = subparsers.add_parser('evict', help='Evict one cached cluster')
+    evict_parser.add_argument('config_hash', help='Config hash or a unique prefix of it')
     
     # Clear command
     clear_parser = subparsers.add_parser('clear', help='Clear cluster cache')
@@ -64,7 +102,11 @@ def main():
     args = parser.parse_args()
     
     if args.command == 'status':
-        show_cache_status()
+        show_cache_status(args.config_hash)
+    elif args.command == 'list':
+        list_cache()
+    elif args.command == 'evict':
+        evict_cache_entry(args.config_hash)
     elif args.command == 'clear':
         clear_cache()
     else:
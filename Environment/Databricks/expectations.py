@@ -0,0 +1,190 @@
+"""
+Declarative validation of Databricks test results.
+
+A test lists what it expects (DBFS paths that exist, rows holding a value, row counts) and
+validate_expectations checks them with as few round trips as possible: every SQL expectation on
+the same table becomes one aggregate in a single SELECT per table, all statements are submitted
+before any is waited on, and DBFS paths are checked in parallel while the statements run.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from databricks_api import DatabricksAPI
+
+from .validation import StatementError, StatementRunner
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def _sql_literal(value: Any) -> str:
+    """Quote a value as a Databricks SQL string literal"""
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _sql_identifier(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+class Expectation:
+    """Base class of the expectations; name keys the expectation's result"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class PathExists(Expectation):
+    """A DBFS path (file or directory) exists"""
+
+    def __init__(self, path: str, name: Optional[str] = None):
+        self.path = path.replace("dbfs:", "")
+        super().__init__(name or f"path_exists:{self.path}")
+
+
+class SqlExpectation(Expectation, ABC):
+    """An expectation checked through one aggregate over a table"""
+
+    def __init__(self, table: str, name: str):
+        self.table = table
+        super().__init__(name)
+
+    @abstractmethod
+    def aggregate(self) -> str:
+        """SQL aggregate over the table whose value is checked"""
+
+    @abstractmethod
+    def check(self, value: Optional[str]) -> bool:
+        """Whether the aggregate's value (as returned by the API, a string) meets the expectation"""
+
+
+class RowExists(SqlExpectation):
+    """At least one row of the table has column equal to (or, with contains, containing) value"""
+
+    def __init__(self, table: str, column: str, value: Any, contains: bool = False, name: Optional[str] = None):
+        self.column = column
+        self.value = value
+        self.contains = contains
+        super().__init__(table, name or f"row_exists:{table}.{column}={value}")
+
+    def aggregate(self) -> str:
+        column = f"CAST({_sql_identifier(self.column)} AS STRING)"
+        if self.contains:
+            return f"COUNT_IF(INSTR({column}, {_sql_literal(self.value)}) > 0)"
+        return f"COUNT_IF({column} = {_sql_literal(self.value)})"
+
+    def check(self, value: Optional[str]) -> bool:
+        return int(value or 0) > 0
+
+
+class RowCount(SqlExpectation):
+    """The table has exactly equals rows, or at least at_least rows"""
+
+    def __init__(self, table: str, equals: Optional[int] = None, at_least: Optional[int] = None,
+                 name: Optional[str] = None):
+        if equals is None and at_least is None:
+            raise ValueError("RowCount needs equals or at_least")
+        self.equals = equals
+        self.at_least = at_least
+        super().__init__(table, name or f"row_count:{table}")
+
+    def aggregate(self) -> str:
+        return "COUNT(*)"
+
+    def check(self, value: Optional[str]) -> bool:
+        count = int(value or 0)
+        if self.equals is not None:
+            return count == self.equals
+        return count >= self.at_least
+
+
+def compile_expectations(expectations: List[Expectation]) -> Dict[str, str]:
+    """
+    Compile the SQL expectations into one SELECT per table.
+
+    :param expectations: The expectations; non-SQL ones are ignored.
+    :return: Table name mapped to a statement whose column e<i> is the aggregate of the i-th expectation.
+    :rtype: Dict[str, str]
+    """
+    aggregates: Dict[str, List[str]] = {}
+    for index, expectation in enumerate(expectations):
+        if isinstance(expectation, SqlExpectation):
+            aggregates.setdefault(expectation.table, []).append(f"{expectation.aggregate()} AS e{index}")
+    return {table: f"SELECT {', '.join(columns)} FROM {table}" for table, columns in aggregates.items()}
+
+
+def _check_path(client: DatabricksAPI, expectation: PathExists) -> Dict[str, Any]:
+    try:
+        client.dbfs.get_status(expectation.path)
+        return {"passed": True, "actual": expectation.path, "error": None}
+    except Exception as e:
+        return {"passed": False, "actual": None, "error": str(e)}
+
+
+def validate_expectations(client: DatabricksAPI, runner: Optional[StatementRunner], expectations: List[Expectation],
+                          timeout: float = 60, max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """
+    Check a set of expectations with one SQL statement per table and parallel DBFS calls.
+
+    :param DatabricksAPI client: Client used for the DBFS checks.
+    :param runner: Runner for the SQL expectations, or None when no SQL warehouse is available
+        (SQL expectations then fail with an error).
+    :param List[Expectation] expectations: What to check; names must be unique.
+    :param timeout: Seconds to wait for each SQL statement.
+    :param max_workers: Maximum number of concurrent DBFS calls.
+    :return: Expectation name mapped to a dict with passed, actual (the path or aggregate value) and error.
+    :rtype: Dict[str, Dict[str, Any]]
+    """
+    names = [expectation.name for expectation in expectations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Expectation names must be unique: {names}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    statements = compile_expectations(expectations)
+
+    # Submit every statement first so the warehouse runs them while DBFS is checked
+    statement_ids: Dict[str, str] = {}
+    table_errors: Dict[str, str] = {}
+    for table, sql_query in statements.items():
+        if runner is None:
+            table_errors[table] = "No warehouse ID available for SQL validation"
+            continue
+        try:
+            statement_ids[table] = runner.submit(sql_query)
+        except requests.exceptions.RequestException as e:
+            table_errors[table] = f"Request failed: {e}"
+
+    paths = [expectation for expectation in expectations if isinstance(expectation, PathExists)]
+    if paths:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            for expectation, result in zip(paths, executor.map(lambda e: _check_path(client, e), paths)):
+                results[expectation.name] = result
+
+    table_rows: Dict[str, List[Any]] = {}
+    for table, statement_id in statement_ids.items():
+        try:
+            statement = runner.wait(statement_id, timeout)
+            rows = [row for chunk in runner.iter_chunks(statement) for row in chunk]
+            table_rows[table] = rows[0] if rows else []
+        except (StatementError, requests.exceptions.RequestException) as e:
+            table_errors[table] = str(e)
+
+    for index, expectation in enumerate(expectations):
+        if not isinstance(expectation, SqlExpectation):
+            continue
+        if expectation.table in table_errors:
+            results[expectation.name] = {"passed": False, "actual": None, "error": table_errors[expectation.table]}
+            continue
+        # Columns come back in the order of the SELECT, i.e. of the table's expectations
+        columns = [i for i, e in enumerate(expectations)
+                   if isinstance(e, SqlExpectation) and e.table == expectation.table]
+        row = table_rows[expectation.table]
+        value = row[columns.index(index)] if row else None
+        results[expectation.name] = {"passed": expectation.check(value), "actual": value, "error": None}
+
+    passed = sum(1 for result in results.values() if result["passed"])
+    print(f"Worker {os.getpid()}: {passed}/{len(results)} expectations met "
+          f"({len(statements)} SQL statements, {len(paths)} DBFS calls)")
+    return results
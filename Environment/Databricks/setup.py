@@ -1,59 +1,120 @@
 import os
-import time
 import json
+import hashlib
+import threading
 from datetime import datetime, timedelta
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List
 from databricks_api import DatabricksAPI
+from filelock import FileLock
+from Environment.polling import PollTimeout, poll
 
 EPHEMERAL_CACHE_FILE = os.path.join(os.path.dirname(__file__), "ephemeral.json")
+EPHEMERAL_CACHE_LOCK = f"{EPHEMERAL_CACHE_FILE}.lock"
 DEFAULT_EXPIRY_HOURS = 1
+# Least recently used entries beyond this are evicted
+MAX_CACHE_ENTRIES = 8
+# A RUNNING state verified this recently is trusted without another get_cluster call
+STATE_VERIFY_SECONDS = 30
+CLUSTER_START_TIMEOUT = 1200  # 20 minutes
+# States a cluster passes through on its way to RUNNING
+CLUSTER_STARTING_STATES = ("PENDING", "RESTARTING", "RESIZING")
+
+def get_cluster_config_hash(config: Dict[str, Any]) -> str:
+    """
+    Create a unique hash for cluster configuration, excluding test-specific fields.
+    Only configuration that affects cluster creation should be included.
+    """
+    cluster_relevant_config = {
+        "host": config.get("host", ""),
+        "cluster_name": config.get("cluster_name", ""),
+        "node_type_id": config.get("node_type_id", ""),
+        "spark_version": config.get("spark_version", ""),
+        "num_workers": config.get("num_workers", 1),
+        "autotermination_minutes": config.get("autotermination_minutes", 120),
+        "spark_conf": config.get("spark_conf", {}),
+        "aws_attributes": config.get("aws_attributes", {}),
+        "instance_pool_id": config.get("instance_pool_id") or os.getenv("DATABRICKS_INSTANCE_POOL_ID", ""),
+        # Exclude: resource_id, test_id, unique_message, delta_table_path, etc.
+    }
+    config_str = json.dumps(cluster_relevant_config, sort_keys=True)
+    return hashlib.md5(config_str.encode()).hexdigest()
 
 def load_cluster_cache() -> Dict[str, Any]:
-    """Load cluster cache from ephemeral.json"""
+    """Load the cluster cache entries from ephemeral.json, keyed by cluster config hash"""
     if not os.path.exists(EPHEMERAL_CACHE_FILE):
         return {}
     
     try:
         with open(EPHEMERAL_CACHE_FILE, 'r') as f:
-            return json.load(f)
+            cache_data = json.load(f)
     except (json.JSONDecodeError, IOError):
         return {}
+    # Files written before the cache was keyed hold a single entry and are dropped
+    return cache_data.get("entries", {})
 
-def save_cluster_cache(cache_data: Dict[str, Any]) -> None:
-    """Save cluster cache to ephemeral.json"""
+def save_cluster_cache(entries: Dict[str, Any]) -> None:
+    """Save the cluster cache entries to ephemeral.json atomically. Call with EPHEMERAL_CACHE_LOCK held."""
     os.makedirs(os.path.dirname(EPHEMERAL_CACHE_FILE), exist_ok=True)
     
     try:
-        with open(EPHEMERAL_CACHE_FILE, 'w') as f:
-            json.dump(cache_data, f, indent=2)
+        temp_file = f"{EPHEMERAL_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump({"entries": entries}, f, indent=2)
+        os.replace(temp_file, EPHEMERAL_CACHE_FILE)
     except IOError as e:
         print(f"Warning: Could not save cluster cache: {e}")
 
+def update_cluster_cache(config_hash: str, **fields: Any) -> None:
+    """Update one cache entry under the cache lock, evicting expired and least recently used entries"""
+    with FileLock(EPHEMERAL_CACHE_LOCK):
+        entries = load_cluster_cache()
+        entries[config_hash] = {**entries.get(config_hash, {}), **fields}
+        save_cluster_cache(_evict_entries(entries))
+
+def remove_cluster_cache_entry(config_hash: str) -> bool:
+    """Remove one cache entry under the cache lock, returning whether it existed"""
+    with FileLock(EPHEMERAL_CACHE_LOCK):
+        entries = load_cluster_cache()
+        removed = entries.pop(config_hash, None) is not None
+        save_cluster_cache(_evict_entries(entries))
+    return removed
+
+def _evict_entries(entries: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop expired entries and the least recently used ones beyond MAX_CACHE_ENTRIES"""
+    valid = {config_hash: entry for config_hash, entry in entries.items() if is_cluster_cache_valid(entry)}
+    by_recent_use = sorted(valid.items(), key=lambda item: item[1].get("last_used", ""), reverse=True)
+    return dict(by_recent_use[:MAX_CACHE_ENTRIES])
+
+def _creation_lock_path(config_hash: str) -> str:
+    """Lock serializing the choice of cluster for one config across processes"""
+    return f"{EPHEMERAL_CACHE_FILE}.{config_hash[:16]}.lock"
+
 def is_cluster_cache_valid(cache_data: Dict[str, Any]) -> bool:
-    """Check if cached cluster data is still valid"""
+    """Check if a cached cluster entry is still valid"""
     if not cache_data or "cluster_id" not in cache_data or "expiry_time" not in cache_data:
         return False
     
     expiry_time = datetime.fromisoformat(cache_data["expiry_time"])
     return datetime.now() < expiry_time
 
-def create_test_cluster(client: DatabricksAPI, cluster_name: str = "de-bench-hello-world-cluster") -> str:
-    """Create a test cluster for the Hello World test"""
-    cluster_config = {
-        "cluster_name": cluster_name,
-        "spark_version": "13.3.x-scala2.12",  # Latest LTS version
-        "node_type_id": "m5.large",  # Small, supported instance type
-        "num_workers": 0,  # Single node cluster to minimize cost
-        "autotermination_minutes": 120,  # Auto-terminate after 2 hours (longer than our cache)
-        "spark_conf": {
+def _state_recently_verified(cache_data: Dict[str, Any]) -> bool:
+    """Check if the cached entry was seen RUNNING within STATE_VERIFY_SECONDS"""
+    if cache_data.get("last_state") != "RUNNING" or "last_verified" not in cache_data:
+        return False
+    last_verified = datetime.fromisoformat(cache_data["last_verified"])
+    return datetime.now() - last_verified < timedelta(seconds=STATE_VERIFY_SECONDS)
+
+def build_cluster_spec(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Cluster spec for a test config, defaulting to a small single node cluster"""
+    cluster_spec = {
+        "cluster_name": config.get("cluster_name") or "de-bench-hello-world-cluster",
+        "spark_version": config.get("spark_version") or "13.3.x-scala2.12",  # Latest LTS version
+        "num_workers": config.get("num_workers", 0),  # Single node cluster to minimize cost
+        "autotermination_minutes": config.get("autotermination_minutes", 120),  # Longer than our cache
+        "spark_conf": config.get("spark_conf") or {
             "spark.databricks.cluster.profile": "singleNode",
             "spark.master": "local[*]"
         },
-        "aws_attributes": {
-            "ebs_volume_type": "GENERAL_PURPOSE_SSD",
-            "ebs_volume_count": 1,
-            "ebs_volume_size": 100  # Minimum size in GB
-        },
         "custom_tags": {
             "purpose": "de-bench-hello-world-testing",
             "auto-created": "true",
@@ -61,101 +122,179 @@ def create_test_cluster(client: DatabricksAPI, cluster_name: str = "de-bench-hel
         }
     }
     
-    print(f"Creating test cluster: {cluster_name}")
-    response = client.cluster.create_cluster(**cluster_config)
-    cluster_id = response["cluster_id"]
+    instance_pool_id = config.get("instance_pool_id") or os.getenv("DATABRICKS_INSTANCE_POOL_ID")
+    if instance_pool_id:
+        # Pool instances are already provisioned; node type and AWS attributes come from the pool
+        cluster_spec["instance_pool_id"] = instance_pool_id
+    else:
+        cluster_spec["node_type_id"] = config.get("node_type_id") or "m5.large"  # Small, supported instance type
+        cluster_spec["aws_attributes"] = config.get("aws_attributes") or {
+            "ebs_volume_type": "GENERAL_PURPOSE_SSD",
+            "ebs_volume_count": 1,
+            "ebs_volume_size": 100  # Minimum size in GB
+        }
+    return cluster_spec
+
+def start_test_cluster(client: DatabricksAPI, config: Dict[str, Any]) -> str:
+    """Request a test cluster for a config without waiting for it to start"""
+    cluster_spec = build_cluster_spec(config)
     
-    # Wait for cluster to start
+    pool_note = f" from instance pool {cluster_spec['instance_pool_id']}" if "instance_pool_id" in cluster_spec else ""
+    print(f"Creating test cluster: {cluster_spec['cluster_name']}{pool_note}")
+    response = client.cluster.create_cluster(**cluster_spec)
+    return response["cluster_id"]
+
+def wait_for_cluster_running(client: DatabricksAPI, cluster_id: str, timeout: int = CLUSTER_START_TIMEOUT) -> None:
+    """Wait for a cluster to reach RUNNING, failing early if it terminates or errors"""
     print(f"Waiting for cluster {cluster_id} to start...")
-    max_wait = 1200  # 20 minutes timeout
-    start_time = time.time()
     
-    while time.time() - start_time < max_wait:
-        cluster_info = client.cluster.get_cluster(cluster_id)
-        state = cluster_info["state"]
-
+    def get_state() -> str:
+        state = client.cluster.get_cluster(cluster_id)["state"]
         print(f"Cluster {cluster_id} is in state: {state}")
-        
-        if state == "RUNNING":
-            print(f"Cluster {cluster_id} is now running")
-            return cluster_id
-        elif state in ["ERROR", "TERMINATED"]:
+        if state not in CLUSTER_STARTING_STATES and state != "RUNNING":
             raise Exception(f"Cluster failed to start. State: {state}")
-        
-        time.sleep(5)
+        return state
     
-    raise Exception(f"Cluster {cluster_id} failed to start within {max_wait} seconds")
+    try:
+        poll(
+            get_state,
+            is_done=lambda state: state == "RUNNING",
+            timeout=timeout,
+            initial_interval=5,
+            max_interval=30,
+            description=f"cluster {cluster_id} to start",
+        )
+    except PollTimeout:
+        raise Exception(f"Cluster {cluster_id} failed to start within {timeout} seconds")
+    print(f"Cluster {cluster_id} is now running")
 
-def get_or_create_cluster(client: DatabricksAPI, config: Dict[str, Any], timeout: int = 600) -> Tuple[str, bool]:
-    """Get existing cluster or create a new one if needed, with caching support"""
-    cluster_id = config.get("cluster_id")
+def create_test_cluster(client: DatabricksAPI, cluster_name: str = "de-bench-hello-world-cluster",
+                        config: Optional[Dict[str, Any]] = None) -> str:
+    """Create a test cluster for the Hello World test and wait for it to start"""
+    cluster_id = start_test_cluster(client, {**(config or {}), "cluster_name": cluster_name})
+    wait_for_cluster_running(client, cluster_id)
+    return cluster_id
+
+def _claim_existing_cluster(client: DatabricksAPI, cluster_id: str, source: str) -> Optional[str]:
+    """
+    Get an existing cluster running or starting: RUNNING and starting clusters are used as they
+    are, TERMINATED ones are restarted. Returns the state to wait from, or None if unusable.
+    """
+    state = client.cluster.get_cluster(cluster_id)["state"]
     
-    # Check cache first
-    cache_data = load_cluster_cache()
+    if state == "RUNNING" or state in CLUSTER_STARTING_STATES:
+        print(f"Using {source} cluster {cluster_id} (state: {state})")
+        return state
+    if state == "TERMINATED":
+        # Restarting keeps the cluster's libraries and config and skips creating a new one
+        print(f"{source.capitalize()} cluster {cluster_id} is terminated, restarting it")
+        client.cluster.start_cluster(cluster_id)
+        return "PENDING"
+    print(f"{source.capitalize()} cluster {cluster_id} is in state {state}, creating new one")
+    return None
+
+def _claim_cluster(client: DatabricksAPI, config: Dict[str, Any], config_hash: str) -> Tuple[str, bool]:
+    """
+    Find, restart or create the cluster for a config and record it in the cache, without waiting
+    for it to start. Call with the config's creation lock held.
+    """
+    cache_data = load_cluster_cache().get(config_hash, {})
     if cache_data and not is_cluster_cache_valid(cache_data):
-        print(f"Found expired cached cluster {cache_data.get('cluster_id', 'unknown')}, clearing cache")
-        clear_cluster_cache()
+        print(f"Found expired cached cluster {cache_data.get('cluster_id', 'unknown')}, clearing cache entry")
+        clear_cluster_cache(config_hash)
         cache_data = {}
     
     if is_cluster_cache_valid(cache_data):
         cached_cluster_id = cache_data["cluster_id"]
         print(f"Found valid cached cluster: {cached_cluster_id}")
         
-        # Verify the cached cluster is still available and running
+        if _state_recently_verified(cache_data):
+            print(f"Using cached running cluster: {cached_cluster_id} (verified {cache_data['last_verified']})")
+            return cached_cluster_id, False
+        
         try:
-            cluster_info = client.cluster.get_cluster(cached_cluster_id)
-            state = cluster_info["state"]
-            
-            if state == "RUNNING":
-                print(f"Using cached running cluster: {cached_cluster_id}")
-                return cached_cluster_id, False
-            elif state == "TERMINATED":
-                print(f"Cached cluster {cached_cluster_id} is terminated, creating new one")
-                # Clear the cache since this cluster is terminated
-                clear_cluster_cache()
-            else:
-                print(f"Cached cluster {cached_cluster_id} is in state {state}, creating new one")
-                # Clear the cache since this cluster is in an unexpected state
-                clear_cluster_cache()
+            state = _claim_existing_cluster(client, cached_cluster_id, "cached")
         except Exception as e:
             print(f"Error with cached cluster {cached_cluster_id}: {e}. Creating new cluster.")
-            # Clear the cache since this cluster is problematic
-            clear_cluster_cache()
+            state = None
+        if state:
+            update_cluster_cache(config_hash, last_verified=datetime.now().isoformat(), last_state=state)
+            return cached_cluster_id, False
+        # Clear the cache entry since this cluster is unusable
+        clear_cluster_cache(config_hash)
     
     # If cluster_id is provided in config, try to use it
+    cluster_id = config.get("cluster_id")
     if cluster_id:
         try:
-            cluster_info = client.cluster.get_cluster(cluster_id)
-            state = cluster_info["state"]
-            
-            if state == "RUNNING":
-                print(f"Using existing running cluster: {cluster_id}")
+            state = _claim_existing_cluster(client, cluster_id, "existing")
+            if state:
                 # Cache this cluster for future use
-                cache_new_cluster(cluster_id)
+                cache_new_cluster(cluster_id, config_hash, state=state)
                 return cluster_id, False  # False = not created by us
-            elif state == "TERMINATED":
-                print(f"Existing cluster {cluster_id} is terminated, creating new cluster")
-            else:
-                print(f"Cluster {cluster_id} is in state {state}, creating new cluster")
-                
         except Exception as e:
             print(f"Error with cluster {cluster_id}: {e}. Creating new cluster.")
     
-    # Create a new cluster and cache it
+    # Create a new cluster and cache it while it starts, so other processes wait for it
     print("Creating new test cluster")
-    new_cluster_id = create_test_cluster(client)
-    cache_new_cluster(new_cluster_id)
+    new_cluster_id = start_test_cluster(client, config)
+    cache_new_cluster(new_cluster_id, config_hash, state="PENDING")
     return new_cluster_id, True  # True = created by us
 
-def cache_new_cluster(cluster_id: str, expiry_hours: int = DEFAULT_EXPIRY_HOURS) -> None:
-    """Cache a new cluster with expiry time"""
-    expiry_time = datetime.now() + timedelta(hours=expiry_hours)
-    cache_data = {
-        "cluster_id": cluster_id,
-        "expiry_time": expiry_time.isoformat(),
-        "created_at": datetime.now().isoformat()
-    }
-    save_cluster_cache(cache_data)
+def get_or_create_cluster(client: DatabricksAPI, config: Dict[str, Any],
+                          timeout: int = CLUSTER_START_TIMEOUT) -> Tuple[str, bool]:
+    """Get existing cluster or create a new one if needed, with caching support per cluster config"""
+    config_hash = get_cluster_config_hash(config)
+    
+    # Only one process at a time decides which cluster serves a config; starting it happens outside the lock
+    with FileLock(_creation_lock_path(config_hash)):
+        cluster_id, created_by_us = _claim_cluster(client, config, config_hash)
+    
+    now = datetime.now().isoformat()
+    if not _state_recently_verified(load_cluster_cache().get(config_hash, {})):
+        try:
+            wait_for_cluster_running(client, cluster_id, timeout)
+        except Exception:
+            clear_cluster_cache(config_hash)
+            raise
+        update_cluster_cache(config_hash, last_verified=now, last_state="RUNNING")
+    update_cluster_cache(config_hash, last_used=now)
+    return cluster_id, created_by_us
+
+def prewarm_cluster(client: DatabricksAPI, config: Dict[str, Any]) -> threading.Thread:
+    """
+    Start (or restart) the cluster for a config in a background thread, so it boots while other
+    tests run. The cluster is cached as soon as it is requested, so get_or_create_cluster calls
+    for the same config wait for it instead of creating another one.
+    """
+    config_hash = get_cluster_config_hash(config)
+    
+    def claim() -> None:
+        try:
+            with FileLock(_creation_lock_path(config_hash)):
+                cluster_id, created_by_us = _claim_cluster(client, config, config_hash)
+            print(f"Worker {os.getpid()}: Pre-warming cluster {cluster_id} (created: {created_by_us})")
+        except Exception as e:
+            print(f"Worker {os.getpid()}: Could not pre-warm cluster for config {config_hash[:8]}: {e}")
+    
+    thread = threading.Thread(target=claim, name=f"databricks-prewarm-{config_hash[:8]}", daemon=True)
+    thread.start()
+    return thread
+
+def cache_new_cluster(cluster_id: str, config_hash: str, expiry_hours: int = DEFAULT_EXPIRY_HOURS,
+                      state: str = "RUNNING") -> None:
+    """Cache a new cluster for a cluster config with expiry time and its last known state"""
+    now = datetime.now()
+    expiry_time = now + timedelta(hours=expiry_hours)
+    update_cluster_cache(
+        config_hash,
+        cluster_id=cluster_id,
+        expiry_time=expiry_time.isoformat(),
+        created_at=now.isoformat(),
+        last_used=now.isoformat(),
+        last_verified=now.isoformat(),
+        last_state=state,
+    )
     print(f"Cached cluster {cluster_id} until {expiry_time}")
 
 def setup_databricks_environment(client: DatabricksAPI, config: Dict[str, Any], cluster_id: str) -> None:
@@ -235,23 +374,41 @@ def cleanup_databricks_environment(client: DatabricksAPI, config: Dict[str, Any]
     
     print("Cleanup completed.")
 
-def clear_cluster_cache() -> None:
-    """Clear the cluster cache (for testing or manual cleanup)"""
-    if os.path.exists(EPHEMERAL_CACHE_FILE):
-        os.remove(EPHEMERAL_CACHE_FILE)
-        print("Cluster cache cleared")
-    else:
-        print("No cluster cache to clear")
+def clear_cluster_cache(config_hash: Optional[str] = None) -> None:
+    """Evict one cache entry, or clear the whole cluster cache (for testing or manual cleanup)"""
+    if config_hash:
+        if remove_cluster_cache_entry(config_hash):
+            print(f"Evicted cached cluster for config {config_hash[:8]}")
+        else:
+            print(f"No cached cluster for config {config_hash[:8]}")
+        return
+    with FileLock(EPHEMERAL_CACHE_LOCK):
+        if os.path.exists(EPHEMERAL_CACHE_FILE):
+            os.remove(EPHEMERAL_CACHE_FILE)
+            print("Cluster cache cleared")
+        else:
+            print("No cluster cache to clear")
 
-def get_cached_cluster_info() -> Optional[Dict[str, Any]]:
-    """Get information about the currently cached cluster"""
-    cache_data = load_cluster_cache()
-    if not cache_data:
-        return None
-    
-    return {
-        "cluster_id": cache_data.get("cluster_id"),
-        "expiry_time": cache_data.get("expiry_time"),
-        "created_at": cache_data.get("created_at"),
-        "is_valid": is_cluster_cache_valid(cache_data)
-    } 
\ No newline at end of file
+def list_cached_clusters() -> List[Dict[str, Any]]:
+    """Get information about every cached cluster, most recently used first"""
+    entries = sorted(load_cluster_cache().items(), key=lambda item: item[1].get("last_used", ""), reverse=True)
+    return [
+        {
+            "config_hash": config_hash,
+            "cluster_id": cache_data.get("cluster_id"),
+            "expiry_time": cache_data.get("expiry_time"),
+            "created_at": cache_data.get("created_at"),
+            "last_used": cache_data.get("last_used"),
+            "last_verified": cache_data.get("last_verified"),
+            "last_state": cache_data.get("last_state"),
+            "is_valid": is_cluster_cache_valid(cache_data)
+        }
+        for config_hash, cache_data in entries
+    ]
+
+def get_cached_cluster_info(config_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Get information about the cached cluster of a config, or the most recently used one"""
+    for info in list_cached_clusters():
+        if config_hash is None or info["config_hash"] == config_hash:
+            return info
+    return None
@@ -1,7 +1,12 @@
-import time
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 from databricks_api import DatabricksAPI
+from Environment.polling import PollTimeout, poll
+
+STATEMENTS_PATH = "/api/2.0/sql/statements"
+# States after which a statement's status no longer changes
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELED", "CLOSED")
+HTTP_TIMEOUT = 60
 
 def extract_warehouse_id_from_http_path(http_path: str) -> str:
     """Extract warehouse ID from HTTP path like /sql/1.0/warehouses/abc123"""
@@ -9,72 +14,195 @@ def extract_warehouse_id_from_http_path(http_path: str) -> str:
         return http_path.split("/warehouses/")[-1]
     return None
 
-def execute_sql_query(host: str, token: str, warehouse_id: str, sql_query: str, 
-                     catalog: str = "hive_metastore", schema: str = "default", timeout: int = 30) -> Dict[str, Any]:
-    """Execute SQL query using Databricks SQL Statement Execution API"""
+class StatementError(Exception):
+    """Raised when a SQL statement doesn't succeed"""
     
-    # Ensure host has proper format
-    if not host.startswith("https://"):
-        host = f"https://{host}"
+    def __init__(self, message: str, state: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.state = state
+        self.details = details
+
+class StatementRunner:
+    """
+    Runs statements through the Databricks SQL Statement Execution API without holding a request
+    open: statements are submitted with wait_timeout=0, their status is polled with backoff, and
+    results are read one chunk at a time (following next_chunk_internal_link), so a large result
+    never has to fit in memory at once.
     
-    # Databricks SQL API requires wait_timeout to be 0 or between 5-50 seconds
-    sql_timeout = min(max(timeout, 5), 50) if timeout > 0 else 0
+    :param host: Databricks workspace host, with or without https://.
+    :param token: Databricks access token.
+    :param warehouse_id: SQL warehouse to run statements on.
+    :param catalog: Default catalog of the statements.
+    :param schema: Default schema of the statements.
+    """
     
-    # Prepare request payload for SQL execution
-    payload = {
-        "warehouse_id": warehouse_id,
-        "catalog": catalog,
-        "schema": schema,
-        "statement": sql_query,
-        "wait_timeout": f"{sql_timeout}s",
-        "format": "JSON_ARRAY",
-        "disposition": "INLINE"
-    }
+    def __init__(self, host: str, token: str, warehouse_id: str, catalog: str = "hive_metastore",
+                 schema: str = "default"):
+        # Ensure host has proper format
+        self.host = host if host.startswith("https://") else f"https://{host}"
+        self.warehouse_id = warehouse_id
+        self.catalog = catalog
+        self.schema = schema
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        })
     
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        response = self.session.request(method, f"{self.host}{path}", timeout=HTTP_TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response.json()
     
-    try:
-        # Execute SQL statement
-        response = requests.post(
-            f"{host}/api/2.0/sql/statements/",
-            headers=headers,
-            json=payload,
-            timeout=timeout + 10  # Add buffer for HTTP timeout
-        )
+    def submit(self, sql_query: str, disposition: str = "INLINE", format: str = "JSON_ARRAY") -> str:
+        """
+        Submit a statement without waiting for it to run.
         
-        if response.status_code != 200:
-            return {
-                "success": False,
-                "error": f"HTTP {response.status_code}: {response.text}",
-                "status_code": response.status_code
-            }
+        :param sql_query: The SQL statement.
+        :param disposition: INLINE (chunks in the API responses) or EXTERNAL_LINKS (chunks downloaded from
+            presigned URLs; required for ARROW_STREAM and results over 25 MiB).
+        :param format: JSON_ARRAY or ARROW_STREAM.
+        :return: The statement ID.
+        :rtype: str
+        """
+        statement = self._request("POST", f"{STATEMENTS_PATH}/", json={
+            "warehouse_id": self.warehouse_id,
+            "catalog": self.catalog,
+            "schema": self.schema,
+            "statement": sql_query,
+            "wait_timeout": "0s",
+            "on_wait_timeout": "CONTINUE",
+            "format": format,
+            "disposition": disposition
+        })
+        return statement["statement_id"]
+    
+    def cancel(self, statement_id: str) -> None:
+        """Cancel a statement that is still pending or running"""
+        self._request("POST", f"{STATEMENTS_PATH}/{statement_id}/cancel")
+    
+    def wait(self, statement_id: str, timeout: float = 300) -> Dict[str, Any]:
+        """
+        Poll a statement with backoff until it finishes.
         
-        result = response.json()
+        :param statement_id: ID returned by submit.
+        :param timeout: Seconds to wait before cancelling the statement.
+        :return: The statement response, whose result holds the first chunk.
+        :rtype: Dict[str, Any]
+        :raises StatementError: If the statement didn't succeed or didn't finish within timeout (state PENDING or RUNNING).
+        """
+        try:
+            statement = poll(
+                lambda: self._request("GET", f"{STATEMENTS_PATH}/{statement_id}"),
+                is_done=lambda statement: statement["status"]["state"] in TERMINAL_STATES,
+                timeout=timeout,
+                initial_interval=0.5,
+                max_interval=10,
+                retry_on=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+                description=f"SQL statement {statement_id}",
+            )
+        except PollTimeout as e:
+            try:
+                self.cancel(statement_id)
+            except requests.exceptions.RequestException as cancel_error:
+                print(f"Warning: Could not cancel SQL statement {statement_id}: {cancel_error}")
+            state = (e.last_value or {}).get("status", {}).get("state", "PENDING")
+            raise StatementError(f"Query timed out after {timeout} seconds", state=state, details=e.last_value)
         
-        # Check if statement executed successfully
-        if result.get("status", {}).get("state") == "SUCCEEDED":
-            return {
-                "success": True,
-                "data": result.get("result", {}).get("data_array", []),
-                "schema": result.get("manifest", {}).get("schema", {}),
-                "row_count": result.get("manifest", {}).get("total_row_count", 0)
-            }
-        elif result.get("status", {}).get("state") == "PENDING":
-            return {
-                "success": False,
-                "error": f"Query timed out after {timeout} seconds",
-                "state": "PENDING"
-            }
-        else:
+        state = statement["status"]["state"]
+        if state != "SUCCEEDED":
+            message = statement["status"].get("error", {}).get("message", "")
+            raise StatementError(f"Query failed with state: {state} {message}".rstrip(), state=state, details=statement)
+        return statement
+    
+    def iter_chunks(self, statement: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Yield the result of a succeeded statement chunk by chunk: a list of rows per chunk for
+        JSON_ARRAY, the raw Arrow IPC stream bytes per chunk for ARROW_STREAM.
+        """
+        format = statement.get("manifest", {}).get("format", "JSON_ARRAY")
+        result = statement.get("result")
+        while result:
+            next_chunk_link = result.get("next_chunk_internal_link")
+            if "external_links" in result:
+                for link in result["external_links"]:
+                    # Presigned cloud storage URL, which must not be sent the Databricks token
+                    response = requests.get(link["external_link"], timeout=HTTP_TIMEOUT)
+                    response.raise_for_status()
+                    yield response.content if format == "ARROW_STREAM" else response.json()
+                    next_chunk_link = link.get("next_chunk_internal_link")
+            else:
+                yield result.get("data_array", [])
+            result = self._request("GET", next_chunk_link) if next_chunk_link else None
+    
+    def iter_rows(self, sql_query: str, timeout: float = 300,
+                  disposition: str = "EXTERNAL_LINKS") -> Iterator[List[Any]]:
+        """
+        Run a statement and yield its rows, holding only one result chunk in memory at a time.
+        
+        :param sql_query: The SQL statement.
+        :param timeout: Seconds to wait for the statement to finish.
+        :param disposition: EXTERNAL_LINKS (default, no size limit) or INLINE.
+        :return: Iterator over rows, each a list of column values as strings.
+        :rtype: Iterator[List[Any]]
+        :raises StatementError: If the statement failed or timed out.
+        """
+        statement = self.wait(self.submit(sql_query, disposition=disposition), timeout)
+        for chunk in self.iter_chunks(statement):
+            yield from chunk
+    
+    def iter_arrow_batches(self, sql_query: str, timeout: float = 300) -> Iterator[Any]:
+        """
+        Run a statement and yield its result as pyarrow RecordBatches, chunk by chunk.
+        
+        :param sql_query: The SQL statement.
+        :param timeout: Seconds to wait for the statement to finish.
+        :return: Iterator over pyarrow.RecordBatch.
+        :rtype: Iterator[pyarrow.RecordBatch]
+        :raises ImportError: If pyarrow is not installed.
+        :raises StatementError: If the statement failed or timed out.
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("pyarrow is required for Arrow results; install it or use iter_rows")
+        
+        statement = self.wait(self.submit(sql_query, disposition="EXTERNAL_LINKS", format="ARROW_STREAM"), timeout)
+        for chunk in self.iter_chunks(statement):
+            yield from pyarrow.ipc.open_stream(chunk)
+
+def execute_sql_query(host: str, token: str, warehouse_id: str, sql_query: str, 
+                     catalog: str = "hive_metastore", schema: str = "default", timeout: int = 30) -> Dict[str, Any]:
+    """Execute SQL query using Databricks SQL Statement Execution API, polling until it finishes within timeout"""
+    runner = StatementRunner(host, token, warehouse_id, catalog, schema)
+    
+    try:
+        statement = runner.wait(runner.submit(sql_query), timeout)
+        data = [row for chunk in runner.iter_chunks(statement) for row in chunk]
+        return {
+            "success": True,
+            "data": data,
+            "schema": statement.get("manifest", {}).get("schema", {}),
+            "row_count": statement.get("manifest", {}).get("total_row_count", 0)
+        }
+    except StatementError as e:
+        if e.state in ("PENDING", "RUNNING"):
             return {
                 "success": False,
-                "error": f"Query failed with state: {result.get('status', {}).get('state')}",
-                "details": result
+                "error": str(e),
+                "state": e.state
             }
-            
+        return {
+            "success": False,
+            "error": str(e),
+            "details": e.details
+        }
+    except requests.exceptions.HTTPError as e:
+        return {
+            "success": False,
+            "error": f"HTTP {e.response.status_code}: {e.response.text}",
+            "status_code": e.response.status_code
+        }
     except requests.exceptions.RequestException as e:
         return {
             "success": False,
@@ -85,5 +213,5 @@ def execute_sql_query(host: str, token: str, warehouse_id: str, sql_query: str,
             "success": False,
             "error": f"Unexpected error: {str(e)}"
         }
-
- 
\ No newline at end of file
+    finally:
+        runner.session.close()
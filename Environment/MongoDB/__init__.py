@@ -0,0 +1,18 @@
+"""
+MongoDB Environment Module
+
+This module provides helpers used by the MongoDB fixtures, such as
+bulk seeding of collections from template data or data files.
+"""
+
+from .seeding import (
+    DEFAULT_BATCH_SIZE,
+    iter_documents_from_file,
+    seed_collection
+)
+
+__all__ = [
+    'DEFAULT_BATCH_SIZE',
+    'iter_documents_from_file',
+    'seed_collection'
+]
@@ -0,0 +1,76 @@
+import os
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import bson
+from bson import json_util
+from pymongo import ReplaceOne
+
+DEFAULT_BATCH_SIZE = 1000
+FILE_FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".bson": "bson"}
+
+
+def iter_documents_from_file(path: str, data_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream documents from a JSONL (Extended JSON per line) or BSON dump file
+    without loading the whole file into memory.
+
+    :param path: Path to the data file.
+    :param data_format: "jsonl" or "bson", inferred from the file extension if not given.
+    :return: Iterator over the documents in the file.
+    """
+    data_format = data_format or FILE_FORMATS.get(os.path.splitext(path)[1].lower())
+    if data_format == "jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json_util.loads(line)
+    elif data_format == "bson":
+        with open(path, "rb") as f:
+            yield from bson.decode_file_iter(f)
+    else:
+        raise ValueError(f"Unsupported data file format for {path}, expected one of {sorted(set(FILE_FORMATS.values()))}")
+
+
+def _iter_batches(documents: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of at most batch_size documents"""
+    iterator = iter(documents)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def seed_collection(collection, documents: Iterable[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE,
+                    ordered: bool = False, upsert_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load documents into a collection in batches.
+
+    :param collection: Target pymongo collection.
+    :param documents: Iterable of documents (a list or a stream from iter_documents_from_file).
+    :param batch_size: Documents per insert_many / bulk_write call.
+    :param ordered: Whether the server should stop at the first failed document in a batch.
+    :param upsert_key: If set, documents are upserted with bulk_write, matching on this field.
+    :return: Seeding statistics (documents, batches and duration).
+    :rtype: Dict[str, Any]
+    """
+    start_time = time.time()
+    document_count = 0
+    batch_count = 0
+
+    for batch in _iter_batches(documents, batch_size):
+        if upsert_key:
+            collection.bulk_write(
+                [ReplaceOne({upsert_key: document[upsert_key]}, document, upsert=True) for document in batch],
+                ordered=ordered,
+            )
+        else:
+            collection.insert_many(batch, ordered=ordered)
+        document_count += len(batch)
+        batch_count += 1
+
+    return {
+        "collection": collection.name,
+        "documents": document_count,
+        "batches": batch_count,
+        "duration": time.time() - start_time,
+    }
@@ -0,0 +1,20 @@
+"""
+MySQL Environment Module
+
+This module provides helpers used by the MySQL fixtures, such as
+batched seeding of template data.
+"""
+
+from .seeding import (
+    DEFAULT_SEED_METHOD,
+    SEED_METHODS,
+    get_max_allowed_packet,
+    seed_table
+)
+
+__all__ = [
+    'DEFAULT_SEED_METHOD',
+    'SEED_METHODS',
+    'get_max_allowed_packet',
+    'seed_table'
+]
@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+SEED_METHODS = ("batch", "infile", "row")
+DEFAULT_SEED_METHOD = "batch"
+
+# Fraction of max_allowed_packet a single multi-row INSERT may use
+PACKET_HEADROOM = 0.8
+DEFAULT_MAX_ALLOWED_PACKET = 4 * 1024 * 1024
+
+
+def get_max_allowed_packet(cursor) -> int:
+    """Read max_allowed_packet from the server, falling back to the MySQL default"""
+    try:
+        cursor.execute("SELECT @@max_allowed_packet")
+        return int(cursor.fetchone()[0])
+    except Exception as e:
+        print(f"Worker {os.getpid()}: Could not read max_allowed_packet, using default: {e}")
+        return DEFAULT_MAX_ALLOWED_PACKET
+
+
+def _adapt_value(value: Any) -> Any:
+    """Adapt values mysql.connector can't send as-is (dicts and lists become JSON)"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _estimate_value_size(value: Any) -> int:
+    """Upper bound on the bytes a value takes in an interpolated INSERT statement"""
+    if value is None:
+        return 5
+    if isinstance(value, (bytes, bytearray)):
+        return 2 * len(value) + 3
+    # Escaping can at most double a string, plus quotes and separator
+    return 2 * len(str(value).encode("utf-8")) + 3
+
+
+def _group_runs(records: List[Dict[str, Any]]) -> Iterator[Tuple[Tuple[str, ...], List[Dict[str, Any]]]]:
+    """Split records into consecutive runs that share the same columns, preserving order"""
+    run_columns = None
+    run = []
+    for record in records:
+        columns = tuple(record.keys())
+        if run and columns != run_columns:
+            yield run_columns, run
+            run = []
+        run_columns = columns
+        run.append(record)
+    if run:
+        yield run_columns, run
+
+
+def iter_batches(columns: Tuple[str, ...], records: List[Dict[str, Any]], max_bytes: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group records into batches whose INSERT statement stays under max_bytes"""
+    batch = []
+    batch_bytes = 0
+    for record in records:
+        row_bytes = sum(_estimate_value_size(record[col]) for col in columns) + 3
+        if batch and batch_bytes + row_bytes > max_bytes:
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(record)
+        batch_bytes += row_bytes
+    if batch:
+        yield batch
+
+
+def _infile_value(value: Any) -> str:
+    """Render a single value for LOAD DATA (tab separated, backslash escaped, \\N for NULL)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    text = str(_adapt_value(value))
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _insert_batches(cursor, table_name: str, columns: Tuple[str, ...], records: List[Dict[str, Any]], max_bytes: int) -> int:
+    """Insert records using multi-row INSERT statements, returning the number of statements"""
+    statements = 0
+    row_placeholder = f"({', '.join(['%s'] * len(columns))})"
+    for batch in iter_batches(columns, records, max_bytes):
+        insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES {', '.join([row_placeholder] * len(batch))}"
+        values = [_adapt_value(record[col]) for record in batch for col in columns]
+        cursor.execute(insert_sql, values)
+        statements += 1
+    return statements
+
+
+def _load_infile(cursor, table_name: str, columns: Tuple[str, ...], records: List[Dict[str, Any]]) -> None:
+    """Write records to a temporary file and load them with LOAD DATA LOCAL INFILE"""
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", suffix=".tsv", delete=False) as f:
+        for record in records:
+            f.write("\t".join(_infile_value(record[col]) for col in columns) + "\n")
+        infile_path = f.name
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})",
+            (infile_path,),
+        )
+    finally:
+        os.remove(infile_path)
+
+
+def seed_table(cursor, table_name: str, records: List[Dict[str, Any]], method: str = DEFAULT_SEED_METHOD,
+               max_allowed_packet: int = DEFAULT_MAX_ALLOWED_PACKET) -> Dict[str, Any]:
+    """
+    Load template records into a table. The caller is responsible for committing.
+
+    :param cursor: Cursor with the target database selected.
+    :param table_name: Name of the table to seed.
+    :param records: List of dicts mapping column name to value.
+    :param method: "batch" (multi-row INSERTs sized by max_allowed_packet), "infile"
+        (LOAD DATA LOCAL INFILE, requires allow_local_infile on the connection) or
+        "row" (one INSERT per record).
+    :param max_allowed_packet: Server max_allowed_packet in bytes, see get_max_allowed_packet.
+    :return: Seeding statistics (rows, statements and duration).
+    :rtype: Dict[str, Any]
+    """
+    if method not in SEED_METHODS:
+        raise ValueError(f"Unknown seed method '{method}', expected one of {SEED_METHODS}")
+
+    start_time = time.time()
+    statements = 0
+    max_bytes = int(max_allowed_packet * PACKET_HEADROOM)
+
+    for columns, run in _group_runs(records):
+        if method == "row" or not columns:
+            for record in run:
+                values = [_adapt_value(record[col]) for col in columns]
+                placeholders = ", ".join(["%s"] * len(values))
+                insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+                cursor.execute(insert_sql, values)
+                statements += 1
+        elif method == "infile" and not any(isinstance(v, (bytes, bytearray)) for record in run for v in record.values()):
+            _load_infile(cursor, table_name, columns, run)
+            statements += 1
+        else:
+            # Also used for infile runs holding binary values, which the text file can't carry
+            statements += _insert_batches(cursor, table_name, columns, run, max_bytes)
+
+    return {
+        "table": table_name,
+        "method": method,
+        "rows": len(records),
+        "statements": statements,
+        "duration": time.time() - start_time,
+    }
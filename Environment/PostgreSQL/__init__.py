@@ -0,0 +1,49 @@
+"""
+PostgreSQL Environment Module
+
+This module provides helpers used by the PostgreSQL fixtures, such as
+bulk seeding of template data, template database cloning and the
+process-wide connection pools shared by fixtures, configs and tests.
+"""
+
+from .pool import (
+    ConnectionPool,
+    close_all_pools,
+    close_pool,
+    get_pool,
+    get_pool_stats,
+    pooled_connection
+)
+
+from .seeding import (
+    DEFAULT_SEED_METHOD,
+    SEED_METHODS,
+    seed_table
+)
+
+from .templates import (
+    clone_database,
+    database_exists,
+    drop_template_database,
+    get_template_database_name,
+    get_template_hash,
+    mark_as_template
+)
+
+__all__ = [
+    'ConnectionPool',
+    'close_all_pools',
+    'close_pool',
+    'get_pool',
+    'get_pool_stats',
+    'pooled_connection',
+    'DEFAULT_SEED_METHOD',
+    'SEED_METHODS',
+    'seed_table',
+    'clone_database',
+    'database_exists',
+    'drop_template_database',
+    'get_template_database_name',
+    'get_template_hash',
+    'mark_as_template'
+]
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL Seeding Benchmark
+
+Compares rows/second of the seeding methods used by postgres_resource
+(per-row INSERT, execute_values and COPY FROM STDIN) against a scratch database.
+
+Usage:
+    python -m Environment.PostgreSQL.benchmark
+    python -m Environment.PostgreSQL.benchmark --sizes 1000 100000 --methods row copy
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from .seeding import SEED_METHODS, seed_table
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+BENCHMARK_TABLE = "seed_benchmark"
+
+
+def connect(database: str):
+    """Connect to the PostgreSQL server configured in the environment"""
+    return psycopg2.connect(
+        host=os.getenv("POSTGRES_HOSTNAME"),
+        port=os.getenv("POSTGRES_PORT"),
+        user=os.getenv("POSTGRES_USERNAME"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        database=database,
+        sslmode="require",
+    )
+
+
+def generate_records(count: int) -> List[Dict[str, Any]]:
+    """Generate template-style records covering the common column types"""
+    base_time = datetime(2024, 1, 1)
+    return [
+        {
+            "id": i,
+            "name": f"user_{i}",
+            "amount": Decimal(i % 10_000) / 100,
+            "created_at": base_time + timedelta(seconds=i),
+            "active": i % 2 == 0,
+            "note": None if i % 5 == 0 else f"note\tfor {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def run_benchmark(sizes: List[int], methods: List[str]) -> List[Dict[str, Any]]:
+    """Seed a scratch table with each method and size, returning timing results"""
+    db_name = f"de_bench_seed_benchmark_{os.getpid()}_{int(time.time())}"
+    system_connection = connect("postgres")
+    system_connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    system_cursor = system_connection.cursor()
+    system_cursor.execute(f"CREATE DATABASE {db_name}")
+    print(f"Created benchmark database {db_name}")
+
+    results = []
+    try:
+        db_connection = connect(db_name)
+        db_cursor = db_connection.cursor()
+        try:
+            db_cursor.execute(
+                f"CREATE TABLE {BENCHMARK_TABLE} (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                f"amount DECIMAL(10,2), created_at TIMESTAMP, active BOOLEAN, note TEXT)"
+            )
+            db_connection.commit()
+
+            for size in sizes:
+                records = generate_records(size)
+                for method in methods:
+                    db_cursor.execute(f"TRUNCATE {BENCHMARK_TABLE}")
+                    db_connection.commit()
+
+                    print(f"Seeding {size} rows with '{method}'...")
+                    start_time = time.time()
+                    seed_table(db_cursor, BENCHMARK_TABLE, records, method=method)
+                    db_connection.commit()
+                    duration = time.time() - start_time
+
+                    results.append({
+                        "rows": size,
+                        "method": method,
+                        "duration": duration,
+                        "rows_per_second": size / duration if duration > 0 else float("inf"),
+                    })
+        finally:
+            db_cursor.close()
+            db_connection.close()
+    finally:
+        system_cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+        print(f"Dropped benchmark database {db_name}")
+        system_cursor.close()
+        system_connection.close()
+
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """Print results with the speedup of each method over the per-row path"""
+    baseline = {r["rows"]: r["rows_per_second"] for r in results if r["method"] == "row"}
+
+    print(f"\n{'rows':>10}  {'method':<8}  {'seconds':>10}  {'rows/s':>12}  {'vs row':>8}")
+    for result in results:
+        speedup = ""
+        if result["rows"] in baseline:
+            speedup = f"{result['rows_per_second'] / baseline[result['rows']]:.1f}x"
+        print(
+            f"{result['rows']:>10}  {result['method']:<8}  {result['duration']:>10.2f}  "
+            f"{result['rows_per_second']:>12.0f}  {speedup:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark PostgreSQL template seeding methods",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Template sizes (rows) to benchmark')
+    parser.add_argument('--methods', nargs='+', choices=SEED_METHODS, default=list(SEED_METHODS),
+                        help='Seeding methods to compare')
+
+    args = parser.parse_args()
+
+    load_dotenv()
+    print_results(run_benchmark(args.sizes, args.methods))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Process-wide PostgreSQL connection pools.
+
+One pool is kept per (host, port, user, database) so fixtures, configs and tests running in the
+same pytest(-xdist) worker reuse TLS connections instead of handshaking for every setup step.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+# Per worker, per database limit on open connections
+DEFAULT_MAX_CONNECTIONS = 4
+# Idle connections older than this are checked with SELECT 1 before being handed out
+HEALTH_CHECK_AFTER_SECONDS = 30
+DEFAULT_ACQUIRE_TIMEOUT = 60
+
+_POOLS: Dict[Tuple[str, str, str, str], "ConnectionPool"] = {}
+_POOLS_LOCK = threading.Lock()
+_POOLS_PID = os.getpid()
+
+
+class ConnectionPool:
+    """A bounded pool of connections to a single PostgreSQL database"""
+
+    def __init__(self, connect_kwargs: Dict[str, Any], max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.connect_kwargs = connect_kwargs
+        self.max_connections = max_connections
+        self._idle: List[Tuple[Any, float]] = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.health_check_failures = 0
+        self.connect_time = 0.0
+
+    def _open(self):
+        start_time = time.time()
+        conn = psycopg2.connect(**self.connect_kwargs)
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_time += time.time() - start_time
+        return conn
+
+    def _is_healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.time() - idle_since < HEALTH_CHECK_AFTER_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._lock:
+                self.health_check_failures += 1
+            conn.close()
+            return False
+
+    def acquire(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        """Borrow a connection, waiting up to timeout seconds for a free slot"""
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolError(
+                f"Timed out after {timeout}s waiting for a connection to {self.connect_kwargs['database']} "
+                f"({self.max_connections} in use)"
+            )
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, idle_since = self._idle.pop()
+                if self._is_healthy(conn, idle_since):
+                    with self._lock:
+                        self.connections_reused += 1
+                    return conn
+            return self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard: bool = False) -> None:
+        """Return a borrowed connection, rolling back any open transaction"""
+        try:
+            if not discard and not conn.closed:
+                status = conn.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            if discard or conn.closed:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.time()))
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close all idle connections (borrowed connections are closed when released)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "database": self.connect_kwargs["database"],
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+                "health_check_failures": self.health_check_failures,
+                "connect_time": self.connect_time,
+                "idle": len(self._idle),
+            }
+
+
+def _connect_kwargs(database: str) -> Dict[str, Any]:
+    return {
+        "host": os.getenv("POSTGRES_HOSTNAME"),
+        "port": os.getenv("POSTGRES_PORT"),
+        "user": os.getenv("POSTGRES_USERNAME"),
+        "password": os.getenv("POSTGRES_PASSWORD"),
+        "database": database,
+        "sslmode": "require",
+        "connect_timeout": 10,
+    }
+
+
+def get_pool(database: str = "postgres") -> ConnectionPool:
+    """Get (or lazily create) this process's pool for a database on the configured server"""
+    global _POOLS_PID
+    kwargs = _connect_kwargs(database)
+    key = (kwargs["host"], kwargs["port"], kwargs["user"], database)
+    with _POOLS_LOCK:
+        if _POOLS_PID != os.getpid():
+            # Connections must not be shared with a forked parent
+            _POOLS.clear()
+            _POOLS_PID = os.getpid()
+        if key not in _POOLS:
+            max_connections = int(os.getenv("POSTGRES_POOL_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+            _POOLS[key] = ConnectionPool(kwargs, max_connections=max_connections)
+        return _POOLS[key]
+
+
+@contextmanager
+def pooled_connection(database: str = "postgres", autocommit: bool = False) -> Iterator[Any]:
+    """
+    Borrow a pooled connection for the duration of a with block.
+
+    :param database: The database to connect to.
+    :param autocommit: Whether the connection should be in autocommit mode (needed for CREATE/DROP DATABASE).
+    :return: A psycopg2 connection, returned to the pool when the block exits.
+    """
+    pool = get_pool(database)
+    conn = pool.acquire()
+    discard = False
+    try:
+        if conn.autocommit != autocommit:
+            conn.autocommit = autocommit
+        yield conn
+    except psycopg2.OperationalError:
+        # The connection may be broken, don't hand it out again
+        discard = True
+        raise
+    finally:
+        pool.release(conn, discard=discard)
+
+
+def close_pool(database: str) -> None:
+    """Close this process's idle connections to a database, e.g. before dropping it"""
+    kwargs = _connect_kwargs(database)
+    with _POOLS_LOCK:
+        pool = _POOLS.pop((kwargs["host"], kwargs["port"], kwargs["user"], database), None)
+    if pool:
+        pool.close()
+
+
+def close_all_pools() -> None:
+    """Close every pool in this process"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """Connection statistics for every pool in this process"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return [pool.stats() for pool in pools]
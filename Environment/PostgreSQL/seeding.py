@@ -0,0 +1,157 @@
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from uuid import UUID
+
+from psycopg2.extras import Json, execute_values
+
+SEED_METHODS = ("copy", "values", "row")
+DEFAULT_SEED_METHOD = "copy"
+DEFAULT_PAGE_SIZE = 1000
+
+# Values of these types have a lossless COPY text representation
+COPY_SAFE_TYPES = (str, int, float, Decimal, date, datetime, dt_time, UUID)
+
+
+def copy_text_value(value: Any) -> str:
+    """Render a single value in COPY text format (tab separated, \\N for NULL)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (date, datetime, dt_time)):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def is_copy_safe(record: Dict[str, Any]) -> bool:
+    """Check whether every value in a record can be streamed through COPY"""
+    return all(
+        value is None or isinstance(value, (bool,) + COPY_SAFE_TYPES)
+        for value in record.values()
+    )
+
+
+class CopyStream:
+    """File-like object that renders rows into COPY text format as psycopg2 reads them"""
+
+    def __init__(self, records: Iterable[Dict[str, Any]], columns: Tuple[str, ...]):
+        self._lines = (
+            "\t".join(copy_text_value(record[col]) for col in columns) + "\n"
+            for record in records
+        )
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        parts = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+        data = "".join(parts)
+        if size < 0 or len(data) <= size:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+def _group_runs(records: List[Dict[str, Any]]) -> Iterator[Tuple[Tuple[str, ...], bool, List[Dict[str, Any]]]]:
+    """
+    Split records into consecutive runs sharing the same columns and COPY safety,
+    so insertion order (and therefore SERIAL assignment) is preserved.
+    """
+    run_key = None
+    run = []
+    for record in records:
+        key = (tuple(record.keys()), is_copy_safe(record))
+        if run and key != run_key:
+            yield run_key[0], run_key[1], run
+            run = []
+        run_key = key
+        run.append(record)
+    if run:
+        yield run_key[0], run_key[1], run
+
+
+def _adapt_value(value: Any) -> Any:
+    """Adapt values psycopg2 can't send as-is (dicts become JSON)"""
+    if isinstance(value, dict):
+        return Json(value)
+    return value
+
+
+def _insert_values(cursor, table_name: str, columns: Tuple[str, ...], records: List[Dict[str, Any]], page_size: int) -> None:
+    """Insert records with multi-row INSERT statements via execute_values"""
+    insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s"
+    execute_values(
+        cursor,
+        insert_sql,
+        ([_adapt_value(record[col]) for col in columns] for record in records),
+        page_size=page_size,
+    )
+
+
+def _insert_rows(cursor, table_name: str, records: List[Dict[str, Any]]) -> None:
+    """Insert records one statement at a time (the original fixture behaviour)"""
+    for record in records:
+        columns = list(record.keys())
+        values = [_adapt_value(value) for value in record.values()]
+        placeholders = ", ".join(["%s"] * len(values))
+        insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        cursor.execute(insert_sql, values)
+
+
+def seed_table(cursor, table_name: str, records: List[Dict[str, Any]], method: str = DEFAULT_SEED_METHOD,
+               page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Load template records into a table. The caller is responsible for committing.
+
+    :param cursor: Cursor on the target database.
+    :param table_name: Name of the table to seed.
+    :param records: List of dicts mapping column name to value.
+    :param method: "copy" (COPY FROM STDIN, falling back to execute_values for rows COPY
+        can't represent), "values" (execute_values only) or "row" (one INSERT per record).
+    :param page_size: Rows per multi-row INSERT when execute_values is used.
+    :return: Seeding statistics (rows, rows per method and duration).
+    :rtype: Dict[str, Any]
+    """
+    if method not in SEED_METHODS:
+        raise ValueError(f"Unknown seed method '{method}', expected one of {SEED_METHODS}")
+
+    start_time = time.time()
+    stats = {"table": table_name, "method": method, "rows": len(records), "copy_rows": 0, "values_rows": 0, "row_rows": 0}
+
+    if method == "row":
+        _insert_rows(cursor, table_name, records)
+        stats["row_rows"] = len(records)
+    else:
+        for columns, copy_safe, run in _group_runs(records):
+            if not columns:
+                # Records without columns can only be inserted with defaults
+                for _ in run:
+                    cursor.execute(f"INSERT INTO {table_name} DEFAULT VALUES")
+                stats["row_rows"] += len(run)
+            elif method == "copy" and copy_safe:
+                cursor.copy_expert(
+                    f"COPY {table_name} ({', '.join(columns)}) FROM STDIN",
+                    CopyStream(run, columns),
+                )
+                stats["copy_rows"] += len(run)
+            else:
+                _insert_values(cursor, table_name, columns, run, page_size)
+                stats["values_rows"] += len(run)
+
+    stats["duration"] = time.time() - start_time
+    return stats
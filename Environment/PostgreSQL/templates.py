@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict
+
+TEMPLATE_DATABASE_PREFIX = "de_bench_tpl_"
+# Bump when the way templates are materialized changes, so stale templates are not reused
+TEMPLATE_FORMAT_VERSION = 1
+
+
+def get_template_hash(db_config: Dict[str, Any]) -> str:
+    """
+    Create a hash of everything that determines a database's contents (tables, columns, data),
+    excluding the per-test database name.
+    """
+    template_relevant_config = {
+        "version": TEMPLATE_FORMAT_VERSION,
+        "tables": db_config.get("tables", []),
+    }
+    config_str = json.dumps(template_relevant_config, sort_keys=True, default=str)
+    return hashlib.md5(config_str.encode()).hexdigest()
+
+
+def get_template_database_name(template_hash: str) -> str:
+    """Name of the template database materialized for a template hash"""
+    return f"{TEMPLATE_DATABASE_PREFIX}{template_hash[:16]}"
+
+
+def database_exists(system_cursor, db_name: str) -> bool:
+    """Check whether a database exists on the server"""
+    system_cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (db_name,))
+    return system_cursor.fetchone() is not None
+
+
+def mark_as_template(system_cursor, db_name: str) -> None:
+    """Flag a database as a template and block connections so it can always be cloned"""
+    try:
+        system_cursor.execute(f"ALTER DATABASE {db_name} WITH IS_TEMPLATE true ALLOW_CONNECTIONS false")
+    except Exception as e:
+        # Managed servers may not allow this; CREATE DATABASE ... TEMPLATE still works for the owner
+        print(f"Worker {os.getpid()}: Warning - could not mark {db_name} as template: {e}")
+
+
+def clone_database(system_cursor, db_name: str, template_name: str) -> None:
+    """Create a database as a file-level copy of a template database"""
+    system_cursor.execute(f"CREATE DATABASE {db_name} TEMPLATE {template_name}")
+
+
+def drop_template_database(system_cursor, template_name: str) -> None:
+    """Drop a template database, clearing the template flag first"""
+    try:
+        system_cursor.execute(f"ALTER DATABASE {template_name} WITH IS_TEMPLATE false")
+    except Exception as e:
+        print(f"Worker {os.getpid()}: Warning - could not clear template flag on {template_name}: {e}")
+    system_cursor.execute(f"DROP DATABASE IF EXISTS {template_name}")
@@ -0,0 +1,113 @@
+"""
+Polling with exponential backoff, jitter and an overall deadline.
+
+Replaces fixed `time.sleep(60)` loops: the first checks come quickly so fast operations are
+detected in seconds, the interval grows for slow ones, and jitter keeps parallel workers
+from hitting the same API in lockstep.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_INITIAL_INTERVAL = 2.0
+DEFAULT_MAX_INTERVAL = 30.0
+DEFAULT_BACKOFF = 1.5
+DEFAULT_JITTER = 0.2
+
+
+class PollTimeout(TimeoutError):
+    """Raised when the deadline passes before the polled condition is met"""
+
+    def __init__(self, message: str, last_value: Any = None, attempts: int = 0):
+        super().__init__(message)
+        self.last_value = last_value
+        self.attempts = attempts
+
+
+def backoff_intervals(initial_interval: float = DEFAULT_INITIAL_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                      backoff: float = DEFAULT_BACKOFF, jitter: float = DEFAULT_JITTER):
+    """Yield an endless sequence of sleep intervals growing by backoff up to max_interval, with +/- jitter"""
+    interval = initial_interval
+    while True:
+        yield max(0.0, interval * random.uniform(1 - jitter, 1 + jitter))
+        interval = min(max_interval, interval * backoff)
+
+
+def poll(check: Callable[[], T], is_done: Callable[[T], bool] = bool, timeout: float = 300,
+         initial_interval: float = DEFAULT_INITIAL_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+         backoff: float = DEFAULT_BACKOFF, jitter: float = DEFAULT_JITTER,
+         retry_on: Tuple[Type[BaseException], ...] = (), description: str = "condition") -> T:
+    """
+    Call check until is_done accepts its result or the deadline passes.
+
+    :param check: Returns the current value (e.g. a DAG run state).
+    :param is_done: Returns True when the value is terminal; defaults to truthiness.
+    :param timeout: Overall deadline in seconds, measured from the first call.
+    :param initial_interval: Seconds to wait after the first unsuccessful check.
+    :param max_interval: Upper bound for the wait between checks.
+    :param backoff: Factor the interval grows by after each check.
+    :param jitter: Relative random spread applied to every interval.
+    :param retry_on: Exception types raised by check that count as "not done yet".
+    :param description: What is being waited for, used in log and error messages.
+    :return: The first value accepted by is_done.
+    :raises PollTimeout: If the deadline passes first.
+    """
+    deadline = time.monotonic() + timeout
+    intervals = backoff_intervals(initial_interval, max_interval, backoff, jitter)
+    attempts = 0
+    value: Optional[T] = None
+    while True:
+        attempts += 1
+        try:
+            value = check()
+            if is_done(value):
+                return value
+        except retry_on as e:
+            print(f"Error while waiting for {description} (attempt {attempts}): {e}")
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise PollTimeout(
+                f"Timed out after {timeout:.0f}s and {attempts} attempts waiting for {description}",
+                last_value=value,
+                attempts=attempts,
+            )
+        time.sleep(min(next(intervals), remaining))
+
+
+async def async_poll(check: Callable[[], Awaitable[T]], is_done: Callable[[T], bool] = bool, timeout: float = 300,
+                     initial_interval: float = DEFAULT_INITIAL_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                     backoff: float = DEFAULT_BACKOFF, jitter: float = DEFAULT_JITTER,
+                     retry_on: Tuple[Type[BaseException], ...] = (), description: str = "condition") -> T:
+    """
+    Asyncio version of poll: awaits check until is_done accepts its result or the deadline passes.
+    Sleeping yields to the event loop, so many waits can share one thread.
+
+    :return: The first value accepted by is_done.
+    :raises PollTimeout: If the deadline passes first.
+    """
+    deadline = time.monotonic() + timeout
+    intervals = backoff_intervals(initial_interval, max_interval, backoff, jitter)
+    attempts = 0
+    value: Optional[T] = None
+    while True:
+        attempts += 1
+        try:
+            value = await check()
+            if is_done(value):
+                return value
+        except retry_on as e:
+            print(f"Error while waiting for {description} (attempt {attempts}): {e}")
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise PollTimeout(
+                f"Timed out after {timeout:.0f}s and {attempts} attempts waiting for {description}",
+                last_value=value,
+                attempts=attempts,
+            )
+        await asyncio.sleep(min(next(intervals), remaining))
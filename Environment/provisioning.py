@@ -0,0 +1,150 @@
+"""
+Concurrent provisioning of template databases and tables.
+
+The resource fixtures describe their work as a small task graph (a database must exist
+before its tables, a table must exist before tables that reference it) and run it on a
+bounded thread pool. Besides the wall-clock time, the critical path of the graph and the
+serial sum of all task durations are reported, which shows how much the template could
+gain from more workers.
+"""
+
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, Set, Tuple
+
+DEFAULT_MAX_WORKERS = 4
+
+_REFERENCES_PATTERN = re.compile(r"\bREFERENCES\s+[`\"]?(\w+)", re.IGNORECASE)
+
+
+def get_table_dependencies(table_config: Dict[str, Any]) -> Set[str]:
+    """Names of the tables a table config references through REFERENCES clauses in its columns"""
+    dependencies = set()
+    for col in table_config.get("columns", []):
+        for clause in (col.get("type"), col.get("default")):
+            if isinstance(clause, str):
+                dependencies.update(_REFERENCES_PATTERN.findall(clause))
+    dependencies.discard(table_config["name"])
+    return dependencies
+
+
+def build_task_graph(databases: Iterable[Dict[str, Any]],
+                     create_database: Callable[[Dict[str, Any]], Any],
+                     create_table: Callable[[Dict[str, Any], Dict[str, Any]], Any],
+                     include_tables: bool = True) -> Dict[Hashable, Tuple[Callable[[], Any], Set[Hashable]]]:
+    """
+    Build the provisioning task graph of a build template's databases.
+
+    :param databases: The "databases" entries of a build template.
+    :param create_database: Called with a db_config to create the database.
+    :param create_table: Called with (db_config, table_config) to create and seed a table.
+    :param include_tables: Whether to add table tasks (False when databases are cloned).
+    :return: Mapping of task key to (callable, keys of the tasks it depends on).
+    """
+    tasks = {}
+    for db_config in databases:
+        db_key = ("database", db_config["name"])
+        tasks[db_key] = (lambda db_config=db_config: create_database(db_config), set())
+        if not include_tables:
+            continue
+
+        table_names = {t["name"] for t in db_config.get("tables", []) if "columns" in t}
+        for table_config in db_config.get("tables", []):
+            if "columns" not in table_config:
+                continue
+            # References to tables outside the template are left for the server to resolve
+            dependencies = {
+                ("table", db_config["name"], name)
+                for name in get_table_dependencies(table_config) & table_names
+            }
+            dependencies.add(db_key)
+            tasks[("table", db_config["name"], table_config["name"])] = (
+                lambda db_config=db_config, table_config=table_config: create_table(db_config, table_config),
+                dependencies,
+            )
+    return tasks
+
+
+def _critical_path(tasks: Dict[Hashable, Tuple[Callable[[], Any], Set[Hashable]]], durations: Dict[Hashable, float]) -> float:
+    """Length of the longest dependency chain, using the measured task durations"""
+    finish_times = {}
+
+    def finish_time(key):
+        if key not in finish_times:
+            _, dependencies = tasks[key]
+            finish_times[key] = durations[key] + max((finish_time(dep) for dep in dependencies), default=0.0)
+        return finish_times[key]
+
+    return max((finish_time(key) for key in tasks), default=0.0)
+
+
+def run_task_graph(tasks: Dict[Hashable, Tuple[Callable[[], Any], Set[Hashable]]],
+                   max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Any]:
+    """
+    Run a task graph on a bounded thread pool, starting each task as soon as its dependencies finished.
+
+    The first failing task stops new tasks from being scheduled; its exception is re-raised
+    once the running tasks have finished.
+
+    :param tasks: Mapping of task key to (callable, keys of the tasks it depends on).
+    :param max_workers: Maximum number of tasks running at once.
+    :return: Timing statistics (wall_time, critical_path, serial_sum, tasks, max_workers).
+    :rtype: Dict[str, Any]
+    """
+    for key, (_, dependencies) in tasks.items():
+        unknown = dependencies - tasks.keys()
+        if unknown:
+            raise ValueError(f"Task {key} depends on unknown tasks {unknown}")
+
+    start_time = time.time()
+    durations = {}
+    pending = dict(tasks)
+    running = {}
+    completed = set()
+    error = None
+
+    def timed(key, fn):
+        task_start = time.time()
+        try:
+            return fn()
+        finally:
+            durations[key] = time.time() - task_start
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provisioning") as executor:
+        while pending or running:
+            if error is None:
+                ready = [key for key, (_, deps) in pending.items() if deps <= completed]
+                for key in ready:
+                    fn, _ = pending.pop(key)
+                    running[executor.submit(timed, key, fn)] = key
+            if not running:
+                if pending and error is None:
+                    raise ValueError(f"Circular dependencies between tasks {list(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                if future.exception() is None:
+                    completed.add(key)
+                elif error is None:
+                    error = future.exception()
+
+    if error is not None:
+        raise error
+
+    return {
+        "wall_time": time.time() - start_time,
+        "critical_path": _critical_path(tasks, durations),
+        "serial_sum": sum(durations.values()),
+        "tasks": len(tasks),
+        "max_workers": max_workers,
+    }
+
+
+def format_provisioning_stats(stats: Dict[str, Any]) -> str:
+    """One-line summary of run_task_graph statistics for fixture logs"""
+    return (
+        f"{stats['tasks']} tasks on {stats['max_workers']} workers took {stats['wall_time']:.2f}s "
+        f"(critical path {stats['critical_path']:.2f}s, serial sum {stats['serial_sum']:.2f}s)"
+    )
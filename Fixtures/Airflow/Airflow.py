@@ -2,17 +2,128 @@
 This class is used to start and stop the Airflow local instance using docker compose.
 """
 
+import ast
 import copy
+import hashlib
 import os
 import shutil
 import subprocess
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 import requests
 from git import GitCommandError, InvalidGitRepositoryError, Repo
 from python_on_whales import DockerClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from Environment.polling import PollTimeout, backoff_intervals, poll
+
+from .states import TERMINAL_DAG_RUN_STATES, TERMINAL_TASK_STATES
+
+TASK_INSTANCE_PAGE_SIZE = 100
+
+DAG_SYNC_BRANCH = "main"
+# Commit of the last DAG sync, stored in the Airflow directory
+DAG_SYNC_STATE_FILE = ".dag_sync_state"
+
+# Repository of the images built for a requirements.txt, overridable with AIRFLOW_REQUIREMENTS_IMAGE
+DEFAULT_REQUIREMENTS_IMAGE = "de-bench-airflow"
+
+# (connect, read) timeout in seconds for Airflow REST calls
+DEFAULT_HTTP_TIMEOUT = (10, 60)
+HTTP_POOL_MAXSIZE = 10
+
+
+def _atomic_copy(source: str, destination: str) -> None:
+    """Copy a file through a temporary file in the destination directory and rename it into place"""
+    destination_dir = os.path.dirname(destination)
+    os.makedirs(destination_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=destination_dir, prefix=".sync_")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, temp_path)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, destination)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def _remove_empty_parents(directory: str, root: str) -> None:
+    """Remove directory and its parents up to (not including) root while they are empty"""
+    root = os.path.abspath(root)
+    directory = os.path.abspath(directory)
+    while directory != root and directory.startswith(root) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def task_instance_key(task_instance: dict) -> str:
+    """Key of a task instance in a state table: the task ID, plus the map index for mapped tasks"""
+    map_index = task_instance.get("map_index", -1)
+    if map_index is None or map_index < 0:
+        return task_instance["task_id"]
+    return f"{task_instance['task_id']}[{map_index}]"
+
+
+def diff_task_states(previous: Dict[str, Optional[str]], current: Dict[str, Optional[str]]) -> Dict[str, tuple]:
+    """
+    Compare two task state tables.
+
+    :param previous: The earlier snapshot from get_task_instance_states.
+    :param current: The later snapshot.
+    :return: (old_state, new_state) for every task instance whose state changed, appeared or disappeared.
+    :rtype: Dict[str, tuple]
+    """
+    return {
+        key: (previous.get(key), current.get(key))
+        for key in previous.keys() | current.keys()
+        if previous.get(key) != current.get(key) or (key in previous) != (key in current)
+    }
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request"""
+
+    def __init__(self, *args, timeout=DEFAULT_HTTP_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_http_session(headers: Optional[dict] = None) -> requests.Session:
+    """
+    Create a keep-alive session for Airflow REST calls with timeouts and retries.
+
+    Connection errors and 429/5xx responses are retried with backoff for idempotent
+    methods (POST is not retried, so a DAG is never triggered twice).
+
+    :param headers: Headers sent with every request (e.g. the Authorization header).
+    :return: The configured session.
+    :rtype: requests.Session
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS", "PATCH", "PUT", "DELETE"]),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
 
 
 class Airflow_Local:
@@ -23,31 +134,112 @@ class Airflow_Local:
         self.API_URL = api_url
         self.API_HEADERS = {"Authorization": f"Bearer {self.API_TOKEN}", "Cache-Control": "no-cache"}
         self.max_retries = max_retries
+        # One keep-alive session per instance so polling reuses TLS connections
+        self.session = create_http_session(self.API_HEADERS)
+        self.request_count = 0
+        self.session.hooks["response"].append(self._count_request)
+
+    def _count_request(self, response, *args, **kwargs):
+        self.request_count += 1
+
+    def get_http_stats(self) -> dict:
+        """
+        Get the number of REST requests sent and TCP/TLS connections opened by this instance.
+
+        :return: The request and connection counts.
+        :rtype: dict
+        """
+        connections = 0
+        # The same adapter is mounted for http:// and https://
+        for adapter in {id(adapter): adapter for adapter in self.session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                connections += pools[key].num_connections
+        return {"requests": self.request_count, "connections": connections}
+
+    def close(self) -> None:
+        """Close the HTTP session and its pooled connections."""
+        self.session.close()
+
+    def async_client(self, http_client=None):
+        """
+        Get an asyncio client for this deployment, e.g. to await several DAG runs concurrently.
+
+        :param http_client: An httpx.AsyncClient shared with other deployments, optional.
+        :return: The client, to be used as `async with airflow_instance.async_client() as client`.
+        :rtype: AsyncAirflowClient
+        """
+        from .async_client import AsyncAirflowClient
+
+        return AsyncAirflowClient(self.AIRFLOW_HOST, self.API_TOKEN, http_client=http_client)
 
     def wait_for_airflow_to_be_ready(self, wait_time_in_minutes: Optional[int] = 3) -> bool:
         """
-        Wait for a total of 10 minutes for the Airflow webserver to be ready.
+        Poll the Airflow webserver health endpoint until it responds, with backoff.
+        A deployment still serving the previous code is healthy too, so this doesn't tell whether a
+        redeploy has landed; use wait_for_airflow_dag for that.
 
-        :param wait_time_in_minutes: The time to wait for the Airflow webserver to be ready, defaults to 3 minutes
+        :param wait_time_in_minutes: Expected startup time; the deadline is this plus 10 minutes, defaults to 3 minutes
         :return: True if the Airflow webserver is ready, False otherwise.
         :rtype: bool
         """
-        # wait the specified time before checking if the webserver is ready
-        time.sleep(60 * wait_time_in_minutes)
-
-        # check if the webserver is ready
-        retries = 10
-        while retries > 0:
-            print(f"Checking if Airflow webserver is ready... {retries} retries left")
-            response = requests.get(f"{self.AIRFLOW_HOST}/health", headers={"Authorization": f"Bearer {self.API_TOKEN}"})
-            if response.status_code == 200:
-                print("Airflow webserver is ready")
-                return True
-            retries -= 1
-            time.sleep(60)
-        print("Airflow webserver is not ready")
-        return False
+        def check_health() -> int:
+            response = self.session.get(f"{self.AIRFLOW_HOST}/health")
+            print(f"Airflow webserver health check returned {response.status_code}")
+            return response.status_code
+
+        print("Checking if Airflow webserver is ready...")
+        try:
+            poll(
+                check_health,
+                is_done=lambda status_code: status_code == 200,
+                timeout=60 * (wait_time_in_minutes + 10),
+                initial_interval=5,
+                max_interval=60,
+                retry_on=(requests.RequestException,),
+                description="Airflow webserver",
+            )
+        except PollTimeout as e:
+            print(f"Airflow webserver is not ready: {e}")
+            return False
+        print("Airflow webserver is ready")
+        return True
     
+    def wait_for_airflow_dag(self, dag_id: str, wait_time_in_minutes: Optional[int] = 10) -> bool:
+        """
+        Poll until Airflow has parsed an active DAG with this dag_id, with backoff.
+        Use after a merge to wait for the redeploy that ships the DAG: the deployment's previous DAG
+        files don't contain it, so its appearance means the new code is being served.
+
+        :param dag_id: The ID of the DAG to wait for.
+        :param wait_time_in_minutes: Deadline for the DAG to appear, defaults to 10 minutes
+        :return: True if the DAG appeared in time, False otherwise.
+        :rtype: bool
+        """
+        def get_dag() -> Optional[dict]:
+            response = self.session.get(f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}")
+            if response.status_code != 200:
+                print(f"DAG {dag_id} not deployed yet (status: {response.status_code})")
+                return None
+            return response.json()
+
+        print(f"Waiting for DAG {dag_id} to be deployed...")
+        try:
+            poll(
+                get_dag,
+                is_done=lambda dag: dag is not None and dag.get("is_active", True),
+                timeout=60 * wait_time_in_minutes,
+                initial_interval=10,
+                max_interval=60,
+                retry_on=(requests.RequestException,),
+                description=f"DAG {dag_id} to be deployed",
+            )
+        except PollTimeout as e:
+            print(f"DAG {dag_id} was not deployed: {e}")
+            return False
+        print(f"DAG {dag_id} is deployed")
+        return True
+
     def verify_airflow_dag_exists(self, dag_id: str) -> bool:
         """
         Verify if a DAG exists using the dag_id in Airflow via API call.
@@ -60,9 +252,8 @@ class Airflow_Local:
         for attempt in range(max_retries):
             print(f"Attempt {attempt + 1}/{max_retries}: Checking for DAG...")
             # Check if DAG exists
-            dag_response = requests.get(
+            dag_response = self.session.get(
                 f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}",
-                headers=self.API_HEADERS,
             )
 
             if dag_response.status_code != 200:
@@ -88,9 +279,8 @@ class Airflow_Local:
         for attempt in range(max_retries):
             print(f"Attempt {attempt + 1}/{max_retries}: Checking for DAG...")
             # Check if DAG exists
-            unpause_response = requests.patch(
+            unpause_response = self.session.patch(
                 f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}",
-                headers=self.API_HEADERS,
                 json={"is_paused": False},
             )
             if unpause_response.status_code != 200:
@@ -102,9 +292,8 @@ class Airflow_Local:
 
             print(f"DAG unpaused successfully. Triggering DAG...")
             # Trigger the DAG
-            trigger_response = requests.post(
+            trigger_response = self.session.post(
                 f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns",
-                headers=self.API_HEADERS,
                 json={"conf": {}},
             )
 
@@ -129,25 +318,34 @@ class Airflow_Local:
         :return: True if the DAG has been executed, False otherwise.
         :rtype: bool
         """
-        max_retries = copy.deepcopy(self.max_retries)
         print(f"Monitoring DAG run {dag_run_id} for completion...")
-        for attempt in range(max_retries):
-            print(f"Attempt {attempt + 1}/{max_retries}: Checking for DAG run...")
-            status_response = requests.get(
+
+        def check_state() -> Optional[str]:
+            status_response = self.session.get(
                 f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}",
-                headers=self.API_HEADERS,
             )
+            if status_response.status_code != 200:
+                print(f"Could not get DAG run state (status: {status_response.status_code})")
+                return None
+            state = status_response.json()["state"]
+            print(f"DAG run state: {state}")
+            return state
 
-            if status_response.status_code == 200:
-                state = status_response.json()["state"]
-                print(f"DAG run state: {state}")
-                if state in ["success", "failed", "error"]:
-                    print(f"DAG ran to completion with state: {state}")
-                    return True
-                else:
-                    print(f"DAG run state: {state}")
-                    time.sleep(60)
-                    continue
+        try:
+            # Same overall budget as the previous max_retries one-minute checks, but polled with backoff
+            state = poll(
+                check_state,
+                is_done=lambda state: state in TERMINAL_DAG_RUN_STATES,
+                timeout=60 * self.max_retries,
+                initial_interval=5,
+                max_interval=60,
+                retry_on=(requests.RequestException,),
+                description=f"DAG run {dag_run_id}",
+            )
+            print(f"DAG ran to completion with state: {state}")
+            return True
+        except PollTimeout as e:
+            print(f"{e}, checking task instances...")
         return self.check_dag_task_instances(dag_id, dag_run_id)
     
     def get_task_instance_logs(self, dag_id: str, dag_run_id: str, task_id: str) -> str:
@@ -161,9 +359,8 @@ class Airflow_Local:
         :rtype: str
         """
         print(f"Retrieving logs for task '{task_id}'")
-        task_instance_response = requests.get(
+        task_instance_response = self.session.get(
             f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances/{task_id}",
-            headers=self.API_HEADERS,
         )
         if task_instance_response.status_code != 200:
             raise Exception(
@@ -175,9 +372,8 @@ class Airflow_Local:
             "try_number", 1
         )  # Default to 1 if not found
         print(f"Fetching logs for task '{task_id}' with try number: {try_number}")
-        task_logs_response = requests.get(
+        task_logs_response = self.session.get(
             f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances/{task_id}/logs/{try_number}",
-            headers=self.API_HEADERS,
         )
         if task_logs_response.status_code != 200:
             raise Exception(f"Failed to retrieve task logs: {task_logs_response.text}")
@@ -185,53 +381,227 @@ class Airflow_Local:
         print(f"Task logs received for task '{task_id}' with try number: {try_number}")
         return task_logs_response.text
     
+    @staticmethod
+    def _log_text(content) -> str:
+        """
+        Text of a logs endpoint "content" field. Airflow 2.x returns it as a (possibly stringified)
+        list of (host, message) tuples rather than plain text.
+        """
+        if isinstance(content, str) and content.startswith("[("):
+            try:
+                content = ast.literal_eval(content)
+            except (ValueError, SyntaxError):
+                return content
+        if isinstance(content, (list, tuple)):
+            return "".join(
+                str(entry[1]) if isinstance(entry, (list, tuple)) and len(entry) == 2 else str(entry)
+                for entry in content
+            )
+        return content or ""
+
+    def tail_task_instance_logs(self, dag_id: str, dag_run_id: str, task_id: str, output_path: Optional[str] = None,
+                                try_number: Optional[int] = None, timeout: float = 1800,
+                                map_index: Optional[int] = None) -> str:
+        """
+        Stream a task instance's log to disk chunk by chunk while the task runs, using the
+        logs endpoint's continuation token so every request only returns new lines.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :param str task_id: The ID of the task.
+        :param output_path: File to write the log to, defaults to task_logs/<dag_id>/<dag_run_id>/<task_id>.log in the Airflow directory.
+        :param try_number: The try to follow, defaults to the task instance's current try.
+        :param timeout: Seconds to follow the log before giving up.
+        :param map_index: Map index of a mapped task instance, None for unmapped tasks.
+        :return: The path of the written log file.
+        :rtype: str
+        """
+        task_instance_url = f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances/{task_id}"
+        mapped = map_index is not None and map_index >= 0
+        if output_path is None:
+            safe_run_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in dag_run_id)
+            file_name = f"{task_id}.{map_index}.log" if mapped else f"{task_id}.log"
+            output_path = os.path.join(self.Airflow_DIR, "task_logs", dag_id, safe_run_id, file_name)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        def get_task_state() -> Dict:
+            response = self.session.get(f"{task_instance_url}/{map_index}" if mapped else task_instance_url)
+            response.raise_for_status()
+            return response.json()
+
+        if try_number is None:
+            try_number = get_task_state().get("try_number", 1) or 1
+
+        print(f"Tailing logs for task '{task_id}' try {try_number} into {output_path}")
+        deadline = time.monotonic() + timeout
+        intervals = backoff_intervals(initial_interval=2, max_interval=15)
+        continuation_token = None
+        bytes_written = 0
+        timed_out = False
+        with open(output_path, "w", encoding="utf-8") as log_file:
+            while True:
+                # Check the state before reading, so the final read happens after the task finished
+                finished = get_task_state().get("state") in TERMINAL_TASK_STATES
+                while True:
+                    params = {"full_content": "false"}
+                    if continuation_token:
+                        params["token"] = continuation_token
+                    if mapped:
+                        params["map_index"] = map_index
+                    response = self.session.get(
+                        f"{task_instance_url}/logs/{try_number}",
+                        params=params,
+                        headers={"Accept": "application/json"},
+                    )
+                    if response.status_code == 404:
+                        # The log doesn't exist until the task has started
+                        break
+                    response.raise_for_status()
+                    payload = response.json()
+                    next_token = payload.get("continuation_token")
+                    # Without a new token the read didn't advance, and its content repeats the last one
+                    advanced = next_token is not None and next_token != continuation_token
+                    content = self._log_text(payload.get("content"))
+                    if content and (advanced or continuation_token is None):
+                        log_file.write(content)
+                        log_file.flush()
+                        bytes_written += len(content)
+                    continuation_token = next_token or continuation_token
+                    end_of_log = (payload.get("metadata") or {}).get("end_of_log", False)
+                    if time.monotonic() >= deadline:
+                        timed_out = True
+                        break
+                    if not content or not advanced or end_of_log:
+                        break
+                if finished:
+                    break
+                if timed_out or time.monotonic() >= deadline:
+                    print(f"Stopped tailing logs for task '{task_id}' after {timeout}s")
+                    break
+                time.sleep(next(intervals))
+
+        print(f"Wrote {bytes_written} characters of logs for task '{task_id}' to {output_path}")
+        return output_path
+
+    def download_dag_run_logs(self, dag_id: str, dag_run_id: str, output_dir: Optional[str] = None,
+                              max_workers: int = 4, timeout: float = 1800) -> Dict[str, str]:
+        """
+        Tail the logs of every task instance of a DAG run in parallel.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :param output_dir: Directory for the <task_id>.log files (<task_id>.<map_index>.log for mapped task instances), defaults to task_logs/<dag_id>/<dag_run_id> in the Airflow directory.
+        :param max_workers: Number of logs fetched at once.
+        :param timeout: Seconds to follow each log before giving up.
+        :return: The log file path of each task ID (<task_id>.<map_index> for mapped task instances).
+        :rtype: Dict[str, str]
+        """
+        task_instances = sorted({
+            (task_instance["task_id"], task_instance.get("map_index", -1))
+            for task_instance in self.iter_task_instances(dag_id, dag_run_id)
+        })
+
+        def log_name(task_instance: tuple) -> str:
+            task_id, map_index = task_instance
+            return f"{task_id}.{map_index}" if map_index >= 0 else task_id
+
+        def tail(task_instance: tuple) -> str:
+            task_id, map_index = task_instance
+            output_path = os.path.join(output_dir, f"{log_name(task_instance)}.log") if output_dir else None
+            return self.tail_task_instance_logs(dag_id, dag_run_id, task_id, output_path=output_path, timeout=timeout,
+                                                map_index=map_index)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(map(log_name, task_instances), executor.map(tail, task_instances)))
+    
+    def iter_task_instances(self, dag_id: str, dag_run_id: str, page_size: int = TASK_INSTANCE_PAGE_SIZE):
+        """
+        Iterate over every task instance of a DAG run (including mapped task instances), page by page.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :param page_size: Number of task instances requested per page.
+        :return: Generator of task instances as returned by the API.
+        """
+        offset = 0
+        while True:
+            response = self.session.get(
+                f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances",
+                params={"limit": page_size, "offset": offset},
+            )
+            response.raise_for_status()
+            page = response.json()
+            yield from page["task_instances"]
+            offset += len(page["task_instances"])
+            if not page["task_instances"] or offset >= page["total_entries"]:
+                return
+
+    def get_task_instance_states(self, dag_id: str, dag_run_id: str) -> Dict[str, Optional[str]]:
+        """
+        Get a compact state table of all task instances of a DAG run.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :return: The state of each task instance, keyed by task ID ("task_id[map_index]" for mapped tasks).
+        :rtype: Dict[str, Optional[str]]
+        """
+        return {
+            task_instance_key(task_instance): task_instance["state"]
+            for task_instance in self.iter_task_instances(dag_id, dag_run_id)
+        }
+
     def check_dag_task_instances(self, dag_id: str, dag_run_id: str) -> bool:
         """
-        Check if all tasks in a DAG have been executed.
+        Wait until every task instance of a DAG run has reached a terminal state, only logging state changes.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :return: True once all task instances are done.
+        :rtype: bool
+        :raises Exception: If the task instances are not done in time.
         """
-        max_retries = copy.deepcopy(self.max_retries)
-        for attempt in range(max_retries):
-            print(f"Attempt {attempt + 1}/{max_retries}: Checking for DAG task instances...")
-            task_instances_response = requests.get(
-                f"{self.AIRFLOW_HOST.rstrip('/')}/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances?limit=100",
-                headers=self.API_HEADERS,
+        previous_states = {}
+
+        def check_states() -> Dict[str, Optional[str]]:
+            nonlocal previous_states
+            states = self.get_task_instance_states(dag_id, dag_run_id)
+            for key, (old_state, new_state) in diff_task_states(previous_states, states).items():
+                print(f"Task instance {key}: {old_state} -> {new_state}")
+            previous_states = states
+            return states
+
+        try:
+            states = poll(
+                check_states,
+                is_done=lambda states: bool(states) and all(state in TERMINAL_TASK_STATES for state in states.values()),
+                timeout=60 * self.max_retries,
+                initial_interval=5,
+                max_interval=30,
+                retry_on=(requests.RequestException,),
+                description=f"task instances of DAG run {dag_run_id}",
             )
-            if task_instances_response.status_code == 200:
-                task_instances = task_instances_response.json()["task_instances"]
-                if task_instances_response.json()["total_entries"] == 0:
-                    print("Rechecking task instances...")
-                    time.sleep(30)
-                    continue
-                elif task_instances_response.json()["total_entries"] >= 1:
-                    for task_instance in task_instances:
-                        if task_instance["state"] in ["success", "failed", "error", "up_for_retry"]:
-                            print(f"Task instance {task_instance['task_id']} completed successfully")
-                            return True
-                        else:
-                            print(f"Task instance {task_instance['task_id']} is still running")
-                            continue
-                else:
-                    print(f"Task instances found: {len(task_instances)}")
-                    time.sleep(30)
-                    continue
-                time.sleep(30)
-                continue
-        raise Exception("DAG task instances timed out")
+        except PollTimeout as e:
+            raise Exception(f"DAG task instances timed out: {e}") from e
+        print(f"All {len(states)} task instances completed")
+        return True
 
-    def Get_Airflow_Dags_From_Github(self):
+    def Get_Airflow_Dags_From_Github(self) -> Dict[str, int]:
         """
-        Clone the GitHub repository and copy DAG files to the Airflow dags directory.
+        Sync the DAG files of the GitHub repository into the Airflow dags directory.
         Uses environment variables from .env file.
-        """
 
+        The first sync makes a shallow, single-branch clone and copies every DAG file. Later syncs
+        fetch only the branch tip, diff it against the last synced commit and copy the added or
+        modified files and delete the removed ones, so the cost follows the size of the change.
+        Files are written to a temporary name and renamed into place, so Airflow never parses a
+        partially written DAG.
+
+        :return: The number of files copied and deleted.
+        :rtype: Dict[str, int]
+        """
         github_token = os.getenv("AIRFLOW_GITHUB_TOKEN")
         repo_url = os.getenv("AIRFLOW_REPO")
         dag_path = os.getenv("AIRFLOW_DAG_PATH", "dags/")
-        
-        # Debug: Print current working directory and Airflow directory
-        print(f"Current working directory: {os.getcwd()}")
-        print(f"Airflow directory: {self.Airflow_DIR}")
-        print(f"Destination DAG path: {os.path.join(self.Airflow_DIR, 'dags')}")
 
         # Validate environment variables
         if not github_token:
@@ -250,109 +620,12 @@ class Airflow_Local:
         # Define local paths
         git_repo_path = os.path.join(self.Airflow_DIR, "GitRepo")
         destination_dag_path = os.path.join(self.Airflow_DIR, "dags")
+        state_path = os.path.join(self.Airflow_DIR, DAG_SYNC_STATE_FILE)
+        os.makedirs(destination_dag_path, mode=0o755, exist_ok=True)
+        had_clone = os.path.exists(os.path.join(git_repo_path, ".git"))
 
-        # Ensure the destination DAG directory exists with proper permissions
-        print(f"Creating/checking destination DAG directory: {destination_dag_path}")
-        if not os.path.exists(destination_dag_path):
-            print(f"Creating directory: {destination_dag_path}")
-            os.makedirs(destination_dag_path, mode=0o755)
-        else:
-            print(f"Directory already exists: {destination_dag_path}")
-            # Ensure existing directory has proper permissions
-            try:
-                os.chmod(destination_dag_path, 0o755)
-                print(f"Set directory permissions to 0o755")
-            except (PermissionError, OSError) as e:
-                print(f"Could not change directory permissions: {e}")
-                pass  # Continue even if we can't change permissions
-        
-        # Verify directory is writable
         try:
-            test_file = os.path.join(destination_dag_path, ".test_write")
-            with open(test_file, 'w') as f:
-                f.write("test")
-            os.remove(test_file)
-            print(f"Directory {destination_dag_path} is writable")
-        except Exception as e:
-            print(f"Warning: Directory {destination_dag_path} is not writable: {e}")
-            # Try to fix permissions
-            try:
-                os.system(f"chmod -R 755 '{destination_dag_path}'")
-                print(f"Attempted to fix permissions on {destination_dag_path}")
-            except Exception as chmod_e:
-                print(f"Could not fix permissions: {chmod_e}")
-
-        try:
-            # Check if the directory exists and is a valid git repository
-            is_valid_repo = False
-            if os.path.exists(git_repo_path):
-                try:
-                    # Check if directory has anything other than .gitkeep
-                    contents = os.listdir(git_repo_path)
-                    if len(contents) == 1 and contents[0] == ".gitkeep":
-                        pass
-                    else:
-                        repo = Repo(git_repo_path)
-                        is_valid_repo = True
-
-                        # Check remote URL
-                        origin = repo.remotes.origin
-
-                        # Force update remote URL with token
-                        if repo_url != origin.url:
-                            origin.set_url(repo_url)
-
-                        repo.git.reset("--hard", "origin/main")
-
-                        pull_info = origin.pull()
-                        for info in pull_info:
-                            pass
-
-                        source_dag_path = os.path.join(git_repo_path, dag_path)
-                except (InvalidGitRepositoryError, GitCommandError) as e:
-                    # Clean contents instead of removing directory
-                    for item in os.listdir(git_repo_path):
-                        if item != ".gitkeep":  # Preserve .gitkeep
-                            item_path = os.path.join(git_repo_path, item)
-                            if os.path.isfile(item_path):
-                                os.unlink(item_path)
-                            elif os.path.isdir(item_path):
-                                shutil.rmtree(item_path)
-                    is_valid_repo = False
-
-            # Clone the repository if it doesn't exist or wasn't valid
-            if not is_valid_repo:
-                # Create directory if it doesn't exist
-                os.makedirs(git_repo_path, exist_ok=True)
-
-                # Clean everything except .gitkeep before cloning
-                for item in os.listdir(git_repo_path):
-                    if item != ".gitkeep":  # Preserve .gitkeep
-                        item_path = os.path.join(git_repo_path, item)
-                        if os.path.isfile(item_path):
-                            os.unlink(item_path)
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path)
-
-                # Temporarily move .gitkeep if it exists
-                gitkeep_exists = os.path.exists(os.path.join(git_repo_path, ".gitkeep"))
-                if gitkeep_exists:
-                    os.rename(
-                        os.path.join(git_repo_path, ".gitkeep"),
-                        os.path.join(self.Airflow_DIR, ".gitkeep_temp"),
-                    )
-
-                try:
-                    # Clone into the now-empty directory
-                    Repo.clone_from(repo_url, git_repo_path)
-                finally:
-                    # Restore .gitkeep if it existed
-                    if gitkeep_exists:
-                        os.rename(
-                            os.path.join(self.Airflow_DIR, ".gitkeep_temp"),
-                            os.path.join(git_repo_path, ".gitkeep"),
-                        )
-
+            repo = self._fetch_dag_repo(repo_url, git_repo_path)
         except GitCommandError as e:
             raise RuntimeError(f"Git operation failed: {e}")
 
@@ -365,121 +638,163 @@ class Airflow_Local:
                 f"The specified DAG path {source_dag_path} does not exist in the repository."
             )
 
-        # Copy DAG files to the Airflow DAGs directory
-        for item in os.listdir(source_dag_path):
-            s = os.path.join(source_dag_path, item)
-            d = os.path.join(destination_dag_path, item)
-            
-            # Check if source file/directory exists and is accessible
-            if not os.path.exists(s):
-                print(f"Warning: Source path does not exist: {s}")
-                continue
-                
-            if not os.access(s, os.R_OK):
-                print(f"Warning: Source path is not readable: {s}")
-                continue
-            if os.path.isdir(s):
-                if os.path.exists(d):
-                    shutil.rmtree(d)
-                shutil.copytree(s, d)
-            else:
-                # Ensure destination directory has proper permissions
-                try:
-                    os.chmod(destination_dag_path, 0o755)
-                except (PermissionError, OSError):
-                    pass  # Continue even if we can't change directory permissions
-                
-                # Handle file copying with comprehensive error handling
-                try:
-                    # Debug: Print paths for troubleshooting
-                    print(f"Copying from: {s}")
-                    print(f"Copying to: {d}")
-                    
-                    # If destination file exists, try to remove it first
-                    if os.path.exists(d):
-                        print(f"Destination file exists, attempting to remove: {d}")
-                        # Try multiple approaches to remove the file
-                        removed = False
-                        
-                        # Approach 1: Normal remove
-                        try:
-                            os.chmod(d, 0o666)  # Make writable
-                            os.remove(d)
-                            removed = True
-                            print(f"Successfully removed existing file: {d}")
-                        except (PermissionError, OSError) as e:
-                            print(f"Normal remove failed: {e}")
-                        
-                        # Approach 2: Force remove with system command
-                        if not removed:
-                            try:
-                                result = os.system(f"rm -f '{d}'")
-                                if result == 0:
-                                    removed = True
-                                    print(f"Successfully removed file using rm command: {d}")
-                                else:
-                                    print(f"rm command failed with exit code: {result}")
-                            except Exception as rm_e:
-                                print(f"rm command failed: {rm_e}")
-                        
-                        # Approach 3: Try with different permissions
-                        if not removed:
-                            try:
-                                os.system(f"chmod 777 '{d}'")
-                                os.remove(d)
-                                removed = True
-                                print(f"Successfully removed file after chmod: {d}")
-                            except Exception as chmod_e:
-                                print(f"chmod + remove failed: {chmod_e}")
-                        
-                        if not removed:
-                            print(f"Warning: Could not remove existing file {d}, skipping...")
-                            continue
-                    
-                    # Ensure the destination directory exists and is writable
-                    dest_dir = os.path.dirname(d)
-                    if not os.path.exists(dest_dir):
-                        os.makedirs(dest_dir, mode=0o755)
-                    else:
-                        try:
-                            os.chmod(dest_dir, 0o755)
-                        except (PermissionError, OSError):
-                            pass
-                    
-                    # Try to copy the file
-                    print(f"Attempting to copy file using shutil.copy2...")
-                    try:
-                        shutil.copy2(s, d)
-                        print(f"Successfully copied file using shutil.copy2")
-                    except Exception as copy_error:
-                        print(f"shutil.copy2 failed: {copy_error}")
-                        # Try manual copy as fallback
-                        try:
-                            with open(s, 'rb') as fsrc:
-                                with open(d, 'wb') as fdst:
-                                    fdst.write(fsrc.read())
-                            print(f"Successfully copied file using manual method")
-                        except Exception as manual_error:
-                            print(f"Manual copy also failed: {manual_error}")
-                            raise
-                    
-                    # Ensure the copied file has proper permissions
-                    try:
-                        os.chmod(d, 0o644)  # Readable by all, writable by owner
-                        print(f"Set file permissions to 0o644")
-                    except (PermissionError, OSError) as perm_error:
-                        print(f"Could not set file permissions: {perm_error}")
-                        pass  # Continue even if we can't set permissions
-                        
-                except Exception as e:
-                    print(f"Unexpected error copying {s} to {d}: {e}")
-                    continue
+        new_commit = repo.head.commit.hexsha
+        last_commit = None
+        if os.path.exists(state_path):
+            with open(state_path, "r") as f:
+                last_commit = f.read().strip() or None
+        # The state only holds while the clone and the synced files it describes are still there
+        if last_commit and (
+            not had_clone
+            or not any(item != ".gitkeep" for item in os.listdir(destination_dag_path))
+        ):
+            print(f"DAG directory or clone was reset since {last_commit[:12]}, doing a full sync")
+            last_commit = None
+
+        changes = None
+        if last_commit == new_commit:
+            print(f"DAGs already synced at {new_commit[:12]}")
+            changes = []
+        elif last_commit:
+            try:
+                changes = self._diff_dag_files(repo, last_commit, new_commit, dag_path)
+            except GitCommandError as e:
+                # The last synced commit is gone (e.g. force push), fall back to a full sync
+                print(f"Could not diff against {last_commit[:12]}, doing a full sync: {e}")
+
+        if changes is None:
+            sync_stats = self._sync_all_dag_files(source_dag_path, destination_dag_path)
+        else:
+            sync_stats = {"copied": 0, "deleted": 0}
+            for status, repo_file in changes:
+                relative_path = os.path.relpath(repo_file, dag_path)
+                destination = os.path.join(destination_dag_path, relative_path)
+                if status == "D":
+                    if os.path.exists(destination):
+                        os.remove(destination)
+                        _remove_empty_parents(os.path.dirname(destination), destination_dag_path)
+                        sync_stats["deleted"] += 1
+                else:
+                    _atomic_copy(os.path.join(git_repo_path, repo_file), destination)
+                    sync_stats["copied"] += 1
+
+        # Record the synced commit atomically so an interrupted sync is redone in full
+        with open(f"{state_path}.tmp", "w") as f:
+            f.write(new_commit)
+        os.replace(f"{state_path}.tmp", state_path)
+
+        print(
+            f"Synced DAGs to {new_commit[:12]} ({'full' if changes is None else 'incremental'}): "
+            f"{sync_stats['copied']} copied, {sync_stats['deleted']} deleted"
+        )
+        return sync_stats
+
+    def _fetch_dag_repo(self, repo_url: str, git_repo_path: str) -> Repo:
+        """
+        Update the local clone to the tip of the DAG branch, or make a shallow single-branch clone.
+
+        :param str repo_url: The authenticated repository URL.
+        :param str git_repo_path: The local clone directory.
+        :return: The updated repository.
+        :rtype: Repo
+        """
+        if os.path.exists(os.path.join(git_repo_path, ".git")):
+            try:
+                repo = Repo(git_repo_path)
+                origin = repo.remotes.origin
+
+                # Force update remote URL with token
+                if repo_url != origin.url:
+                    origin.set_url(repo_url)
+
+                # Only the branch tip is needed, the last synced commit is already local
+                origin.fetch(DAG_SYNC_BRANCH, depth=1)
+                repo.git.reset("--hard", "FETCH_HEAD")
+                return repo
+            except (InvalidGitRepositoryError, GitCommandError) as e:
+                print(f"Existing clone is unusable, cloning again: {e}")
+
+        # Create directory if it doesn't exist
+        os.makedirs(git_repo_path, exist_ok=True)
+
+        # Clean everything except .gitkeep before cloning
+        for item in os.listdir(git_repo_path):
+            if item != ".gitkeep":  # Preserve .gitkeep
+                item_path = os.path.join(git_repo_path, item)
+                if os.path.isfile(item_path):
+                    os.unlink(item_path)
+                elif os.path.isdir(item_path):
+                    shutil.rmtree(item_path)
+
+        # Temporarily move .gitkeep if it exists
+        gitkeep_exists = os.path.exists(os.path.join(git_repo_path, ".gitkeep"))
+        if gitkeep_exists:
+            os.rename(
+                os.path.join(git_repo_path, ".gitkeep"),
+                os.path.join(self.Airflow_DIR, ".gitkeep_temp"),
+            )
+
+        try:
+            # Clone into the now-empty directory
+            return Repo.clone_from(
+                repo_url, git_repo_path, depth=1, single_branch=True, branch=DAG_SYNC_BRANCH
+            )
+        finally:
+            # Restore .gitkeep if it existed
+            if gitkeep_exists:
+                os.rename(
+                    os.path.join(self.Airflow_DIR, ".gitkeep_temp"),
+                    os.path.join(git_repo_path, ".gitkeep"),
+                )
+
+    @staticmethod
+    def _diff_dag_files(repo: Repo, old_commit: str, new_commit: str, dag_path: str) -> list:
+        """
+        List the DAG files that changed between two commits.
+
+        :return: (status, path) tuples, where status is "D" for deleted files.
+        :rtype: list
+        """
+        output = repo.git.diff("--name-status", "--no-renames", old_commit, new_commit, "--", dag_path)
+        changes = []
+        for line in output.splitlines():
+            status, repo_file = line.split("\t", 1)
+            changes.append((status[0], repo_file))
+        return changes
+
+    @staticmethod
+    def _sync_all_dag_files(source_dag_path: str, destination_dag_path: str) -> Dict[str, int]:
+        """
+        Make the dags directory an exact copy of the repository's DAG folder (keeping .gitkeep).
+
+        :return: The number of files copied and deleted.
+        :rtype: Dict[str, int]
+        """
+        sync_stats = {"copied": 0, "deleted": 0}
+        source_files = set()
+        for root, dirs, files in os.walk(source_dag_path):
+            dirs[:] = [d for d in dirs if d != ".git"]
+            for file_name in files:
+                relative_path = os.path.relpath(os.path.join(root, file_name), source_dag_path)
+                source_files.add(relative_path)
+                _atomic_copy(os.path.join(root, file_name), os.path.join(destination_dag_path, relative_path))
+                sync_stats["copied"] += 1
+
+        for root, _, files in os.walk(destination_dag_path, topdown=False):
+            for file_name in files:
+                file_path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(file_path, destination_dag_path)
+                if relative_path != ".gitkeep" and relative_path not in source_files:
+                    os.remove(file_path)
+                    sync_stats["deleted"] += 1
+            _remove_empty_parents(root, destination_dag_path)
+        return sync_stats
 
     def Cleanup_Airflow_Directories(self):
         """
         Clean up all Airflow directories while preserving .gitkeep files.
         Also resets the database to clear all DAG history and metadata.
-        Includes: dags, GitRepo, config, logs, plugins directories and requirements cache.
+        Includes: dags, GitRepo, config, logs, plugins directories, the DAG sync state and requirements cache.
         """
         try:
             # Reset the Airflow database first
@@ -504,6 +819,11 @@ class Airflow_Local:
                 "plugins": os.path.join(self.Airflow_DIR, "plugins"),
             }
 
+            # Forget the synced commit, the dags directory it describes is about to be emptied
+            state_path = os.path.join(self.Airflow_DIR, DAG_SYNC_STATE_FILE)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+
             # Clean requirements cache
             cache_path = os.path.join(self.Airflow_DIR, ".requirements_cache")
             if os.path.exists(cache_path):
@@ -545,17 +865,23 @@ class Airflow_Local:
             print(f"Error during cleanup: {e}")
             return False
 
-    def Update_Airflow_Requirements(self):
+    def Update_Airflow_Requirements(self) -> bool:
         """
-        Check if requirements.txt has changed and rebuild the Airflow
-        containers only if necessary.
+        Check if requirements.txt has changed and switch the Airflow containers to an image built
+        for it, only if necessary.
 
-        Returns:
-            bool: True if containers were rebuilt, False otherwise
+        Images are tagged with a hash of the requirements (and the Dockerfile), so a requirements
+        set that was seen before reuses its image without building. New ones are built with the
+        Docker layer cache, and the pip cache if the Dockerfile mounts one. Only the containers
+        whose image changed are recreated, and readiness is detected through the health checks.
+
+        :return: True if containers were switched to another image, False otherwise
+        :rtype: bool
         """
         requirements_path = os.path.join(self.Airflow_DIR, "GitRepo", "Requirements", "requirements.txt")
         permanent_requirements_path = os.path.join(self.Airflow_DIR, "Requirements", "requirements.txt")
         cache_path = os.path.join(self.Airflow_DIR, ".requirements_cache")
+        compose_file = os.path.join(self.Airflow_DIR, "docker-compose.yml")
 
         # If requirements file doesn't exist, nothing to do
         if not os.path.exists(requirements_path):
@@ -569,74 +895,77 @@ class Airflow_Local:
                 print("Requirements file is empty, skipping update")
                 return False
 
+        requirements_hash = self._requirements_hash(requirements_content)
+
         # Check if requirements have changed from previous run
         if os.path.exists(cache_path):
             with open(cache_path, 'r') as f:
-                cached_content = f.read().strip()
-                if cached_content == requirements_content:
+                if f.read().strip() == requirements_hash:
                     print("Requirements unchanged, skipping rebuild")
                     return False
 
-
-        print("Requirements have changed, rebuilding Airflow containers...")
-
-        #now lets copy to the permanent requirements file if it exists
-        if os.path.exists(os.path.dirname(permanent_requirements_path)):
-            with open(requirements_path, 'r') as src:
-                content = src.read()
-                with open(permanent_requirements_path, 'w') as dst:
-                    dst.write(content)
-
-
-        # Save current requirements to cache
-        with open(cache_path, 'w') as f:
-            f.write(requirements_content)
-
-        # Initialize Docker client
-        if not os.path.exists(self.Airflow_DIR / "docker-compose.yml"):
+        if not os.path.exists(compose_file):
             print(
                 f"docker-compose.yml not found in {self.Airflow_DIR}. Please ensure it exists."
             )
             return False
 
-        docker = DockerClient(
-            compose_files=[os.path.join(self.Airflow_DIR, "docker-compose.yml")]
-        )
+        #now lets copy to the permanent requirements file if it exists
+        if os.path.exists(os.path.dirname(permanent_requirements_path)):
+            with open(permanent_requirements_path, 'w') as dst:
+                dst.write(requirements_content + "\n")
 
-        print("Docker client context:")
-        print(f"Docker client context: {docker.context}")
+        image = f"{os.getenv('AIRFLOW_REQUIREMENTS_IMAGE', DEFAULT_REQUIREMENTS_IMAGE)}:req-{requirements_hash}"
+        # Compose tags the built image with AIRFLOW_IMAGE_NAME and starts the services from it
+        compose_env = {**os.environ, "AIRFLOW_IMAGE_NAME": image, "DOCKER_BUILDKIT": "1"}
+        docker = DockerClient(compose_files=[compose_file])
 
         try:
-            # Stop existing containers
-            print("Stopping existing containers...")
-            docker.compose.down(volumes=True)
-
-            time.sleep(10)  # Increased wait time to ensure services are ready
-
-
-            # Rebuild and start containers
-            print("Building containers with no cache...")
-
+            if docker.image.exists(image):
+                print(f"Requirements have changed, reusing cached image {image}")
+            else:
+                print(f"Requirements have changed, building image {image} with layer cache...")
+                start_time = time.time()
+                subprocess.run(
+                    ["docker", "compose", "-f", compose_file, "build"],
+                    check=True,
+                    env=compose_env,
+                )
+                print(f"Built image {image} in {time.time() - start_time:.0f}s")
+
+            # Recreates only the containers whose image changed and waits for their health checks
+            print("Starting containers...")
             subprocess.run(
-            ["docker", "compose", "-f", os.path.join(self.Airflow_DIR, "docker-compose.yml"), "build", "--no-cache"],
-            check=True
-        )  # Force clean build every time
+                ["docker", "compose", "-f", compose_file, "up", "--detach", "--wait"],
+                check=True,
+                env=compose_env,
+            )
+        except Exception as e:
+            print(f"Error during container rebuild: {e}")
+            raise
 
-            print("Starting containers...")
-            docker.compose.up(detach=True)
+        # --wait covers the local containers; a configured host is also checked through its API
+        if self.AIRFLOW_HOST and not self.wait_for_airflow_to_be_ready():
+            raise RuntimeError(f"Airflow did not become ready with image {image}")
+
+        # Save the hash only once the containers run on the new image
+        with open(cache_path, 'w') as f:
+            f.write(requirements_hash)
 
-            # Wait for the services to be ready
-            print("Waiting for services to be ready...")
-            time.sleep(30)  # Increased wait time to ensure services are ready
+        print(f"Airflow containers restarted with image {image}")
+        return True
 
-            print("Airflow containers rebuilt and restarted with new requirements")
-            return True
+    def _requirements_hash(self, requirements_content: str) -> str:
+        """
+        Hash the inputs of the Airflow image: the requirements and the Dockerfile, if there is one.
 
-        except Exception as e:
-            print(f"Error during container rebuild: {e}")
-            # Try to ensure containers are running even if there was an error
-            try:
-                docker.compose.up(detach=True)
-            except:
-                pass
-            raise
\ No newline at end of file
+        :param str requirements_content: The stripped content of requirements.txt.
+        :return: A short hex digest usable in an image tag.
+        :rtype: str
+        """
+        digest = hashlib.sha256(requirements_content.encode())
+        dockerfile_path = os.path.join(self.Airflow_DIR, "Dockerfile")
+        if os.path.exists(dockerfile_path):
+            with open(dockerfile_path, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
\ No newline at end of file
@@ -5,27 +5,36 @@ This module provides a pytest fixture for creating isolated Airflow instances us
 import os
 import re
 import shutil
+import sqlite3
 import subprocess
 import tempfile
 import time
 from pathlib import Path
 from typing import Optional, Union
 
-import github
 from github import Github
 
 import pytest
+import requests
+
+from Fixtures.GitHub.repo_pool import get_repo_pool, lease_repo, release_repo
+from Fixtures.GitHub.secret_sync import sync_secrets
 
 from .Airflow import Airflow_Local
+from .deployment_pool import TMP_DIR, DeploymentPool
 
 VALIDATE_ASTRO_INSTALL = "Please check if the Astro CLI is installed and in PATH."
 
+_deployment_pool: Optional[DeploymentPool] = None
+
 
 @pytest.fixture(scope="function")
 def airflow_resource(request):
     """
     A function-scoped fixture that creates unique Airflow instances for each test.
     Each test gets its own isolated Airflow environment using docker-compose.
+    When ASTRO_DEPLOYMENT_POOL_SIZE is set, the Astronomer deployment is leased from a warm
+    pool (reset between tests) instead of being created and deleted for every test.
     """
     # verify the required astro envars are set
     resource_id = "airflow_resource"
@@ -33,10 +42,9 @@ def airflow_resource(request):
         "ASTRO_WORKSPACE_ID",
         "ASTRO_ACCESS_TOKEN",
         "AIRFLOW_GITHUB_TOKEN",
-        "AIRFLOW_REPO",
         "ASTRO_CLOUD_PROVIDER",
         "ASTRO_REGION",
-    ]
+    ] + ([] if get_repo_pool() else ["AIRFLOW_REPO"])
     if missing_envars := [envar for envar in required_envars if not os.getenv(envar)]:
         raise ValueError(f"The following envars are not set: {missing_envars}")  # noqa
 
@@ -65,68 +73,44 @@ def airflow_resource(request):
     )
 
     test_dir = _create_dir_and_astro_project(unique_id)
-    astro_deployment_id = _create_deployment_in_astronomer(unique_id)
+    airflow_instance = None
+    repo_leased = False
+    pooled_deployment = None
 
     try:
-         # check and update the github secrets
+        # the deploy action and secrets live in the repository, so use the one leased for this test
+        repo_url = lease_repo()
+        repo_leased = True
+        # lease a warm deployment from the pool, or fall back to creating one for this test
+        pooled_deployment = _get_deployment_pool().lease()
+        if pooled_deployment:
+            deployment = pooled_deployment
+        else:
+            deployment = _provision_deployment(
+                unique_id, f"{test_name} API access for deployment {unique_id}", created_resources
+            )
+        astro_deployment_id = deployment["deployment_id"]
+        deployment_name = deployment["deployment_name"]
+        api_url = deployment["api_url"]
+        base_url = deployment["base_url"]
+        api_token = deployment["api_token"]
+
+        # check and update the github secrets
         _check_and_update_gh_secrets(
             deployment_id=astro_deployment_id,
-            deployment_name=unique_id,
+            deployment_name=deployment_name,
             astro_access_token=os.environ["ASTRO_ACCESS_TOKEN"],
         )
 
-        created_resources.append(astro_deployment_id)
-        api_url = "https://" + _run_and_validate_subprocess(
-            [
-                "astro",
-                "deployment",
-                "inspect",
-                "--deployment-name",
-                unique_id,
-                "--key",
-                "metadata.airflow_api_url",
-            ],
-            "getting Astro deployment API URL",
-            return_output=True,
-        )
-        base_url = api_url[: api_url.find("/api/v1")]
-
-        api_token = os.getenv("ASTRO_API_TOKEN")
-
-        # create a token for the airflow resource
-        api_token = api_token or _run_and_validate_subprocess(
-            [
-                "astro",
-                "deployment",
-                "token",
-                "create",
-                "--description",
-                f"{test_name} API access for deployment {unique_id}",
-                "--name",
-                f"{unique_id} API access",
-                "--role",
-                "DEPLOYMENT_ADMIN",
-                "--expiration",
-                "30",
-                "--deployment-id",
-                astro_deployment_id,
-                "--clean-output",
-            ],
-            "creating Astro deployment API token",
-            return_output=True,
-        )
-        # check if the token has any prefix
-        if "astro api" in api_token.lower():
-            api_token = api_token[api_token.find('\n') + 1:-1].strip()
-
-        # create a user in the airflow deployment (ardent needs username and password for the Airflowconfig)
-        _create_user_in_airflow_deployment(unique_id)
-
         creation_end = time.time()
         print(
             f"Worker {os.getpid()}: Airflow resource creation took {creation_end - creation_start:.2f}s"
         )
 
+        airflow_instance = Airflow_Local(
+            airflow_dir=test_dir, host=base_url, api_token=api_token, api_url=api_url
+        )
+
         # Create detailed resource data
         resource_data = {
             "resource_id": resource_id,
@@ -139,16 +123,16 @@ def airflow_resource(request):
             "status": "active",
             "project_name": test_dir.stem,
             "base_url": base_url,
+            "repo_url": repo_url,
             "deployment_id": astro_deployment_id,
-            "deployment_name": unique_id,
+            "deployment_name": deployment_name,
+            "pooled": pooled_deployment is not None,
             "api_url": api_url,
             "api_token": api_token,
             "api_headers": {"Authorization": f"Bearer {api_token}", "Cache-Control": "no-cache"},
             "username": os.getenv("AIRFLOW_USERNAME", "airflow"),
             "password": os.getenv("AIRFLOW_PASSWORD", "airflow"),
-            "airflow_instance": Airflow_Local(
-                airflow_dir=test_dir, host=base_url, api_token=api_token, api_url=api_url
-            ),
+            "airflow_instance": airflow_instance,
             "created_resources": created_resources,
         }
 
@@ -165,7 +149,21 @@ def airflow_resource(request):
     finally:
         # clean up the airflow resource after the test completes
         print(f"Worker {os.getpid()}: Cleaning up Airflow resource {resource_id}")
-        cleanup_airflow_resource(test_name, resource_id, created_resources, test_dir)
+        if airflow_instance:
+            http_stats = airflow_instance.get_http_stats()
+            print(
+                f"Worker {os.getpid()}: Airflow REST calls for {test_name}: {http_stats['requests']} requests "
+                f"over {http_stats['connections']} connections"
+            )
+            airflow_instance.close()
+        try:
+            cleanup_airflow_resource(test_name, resource_id, created_resources, test_dir)
+            if pooled_deployment:
+                _get_deployment_pool().release(pooled_deployment)
+        finally:
+            # a failed cleanup or release must not keep other workers off this repository
+            if repo_leased:
+                release_repo()
 
 
 def _parse_astro_version() -> None:
@@ -204,6 +202,7 @@ def _run_and_validate_subprocess(
     capture_output: bool = True,
     return_output: bool = False,
     input_text: str = None,
+    cwd: Optional[str] = None,
 ) -> Union[subprocess.CompletedProcess, str]:
     """
     Helper function to run a subprocess command and validate the return code.
@@ -214,6 +213,7 @@ def _run_and_validate_subprocess(
     :param capture_output: Whether to capture the output.
     :param return_output: Whether to return the output.
     :param input_text: Text to send to stdin if the command expects input.
+    :param cwd: Directory to run the command in, defaults to the current directory.
     :return: The completed process, or the command output if `return_output` is True.
     :rtype: Union[subprocess.CompletedProcess, str]
     """
@@ -226,6 +226,7 @@ def _run_and_validate_subprocess(
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
+                cwd=cwd,
             )
             stdout, stderr = process.communicate(input=input_text)
             if process.returncode != 0:
@@ -241,7 +242,7 @@ def _run_and_validate_subprocess(
                 )
         else:
             process = subprocess.run(
-                command, check=check, capture_output=capture_output
+                command, check=check, capture_output=capture_output, cwd=cwd
             )
             if process.returncode != 0:
                 print(process.stderr.decode("utf-8"))
@@ -257,8 +258,8 @@ def _run_and_validate_subprocess(
 
 def _check_and_update_gh_secrets(deployment_id: str, deployment_name: str, astro_access_token: str) -> None:
     """
-    Checks if the GitHub secrets exists, deletes them if they do, and creates new ones with the given
-        deployment ID and name.
+    Makes the GitHub secrets of the Airflow repo hold the given deployment ID, name and access token,
+        writing only the secrets that changed.
 
     :param str deployment_id: The ID of the deployment.
     :param str deployment_name: The name of the deployment.
@@ -277,20 +278,7 @@ def _check_and_update_gh_secrets(deployment_id: str, deployment_name: str, astro
         airflow_github_repo = f"{parts[-2]}/{parts[-1]}"
     repo = g.get_repo(airflow_github_repo)
     try:
-        for secret, value in gh_secrets.items():
-            try:
-                if repo.get_secret(secret):
-                    print(f"Worker {os.getpid()}: {secret} already exists, deleting...")
-                    repo.delete_secret(secret)
-                print(f"Worker {os.getpid()}: Creating {secret}...")
-            except github.GithubException as e:
-                if e.status == 404:
-                    print(f"Worker {os.getpid()}: {secret} does not exist, creating...")
-                else:
-                    print(f"Worker {os.getpid()}: Error checking secret {secret}: {e}")
-                    raise e
-            repo.create_secret(secret, value)
-            print(f"Worker {os.getpid()}: {secret} created successfully.")
+        sync_secrets(repo, gh_secrets)
     except Exception as e:
         print(f"Worker {os.getpid()}: Error checking and updating GitHub secrets: {e}")
         raise e from e
@@ -368,11 +356,12 @@ def _create_dir_and_astro_project(unique_id: str) -> Path:
     return temp_dir
 
 
-def _create_user_in_airflow_deployment(deployment_name: str) -> None:
+def _create_user_in_airflow_deployment(deployment_name: str, update: bool = False) -> None:
     """
     Helper method to create a user in the Airflow deployment using Astronomer CLI and environment variables in Airflow.
 
     :param str deployment_name: The name of the Airflow deployment in Astronomer.
+    :param bool update: Update the variables instead of creating them (used when reapplying them to a pooled deployment).
     :rtype: None
     """
     username = os.getenv("AIRFLOW_USERNAME", "airflow")
@@ -400,9 +389,209 @@ def _create_user_in_airflow_deployment(deployment_name: str) -> None:
         ],
     ]
     for command in user_creation_commands:
+        if update:
+            command[3] = "update"
         _ = _run_and_validate_subprocess(command, "creating user in Airflow deployment")
     
 
+def _provision_deployment(deployment_name: str, token_description: str, created_resources: list[str]) -> dict:
+    """
+    Creates an Astronomer deployment with an API token and the Airflow user variables.
+
+    :param deployment_name: The name of the deployment to create.
+    :param token_description: The description of the deployment API token.
+    :param created_resources: List the deployment ID is appended to as soon as it exists, for cleanup.
+    :return: The deployment's ID, name, API URL, base URL and API token.
+    :rtype: dict
+    """
+    deployment_id = _create_deployment_in_astronomer(deployment_name)
+    created_resources.append(deployment_id)
+
+    api_url = "https://" + _run_and_validate_subprocess(
+        [
+            "astro",
+            "deployment",
+            "inspect",
+            "--deployment-name",
+            deployment_name,
+            "--key",
+            "metadata.airflow_api_url",
+        ],
+        "getting Astro deployment API URL",
+        return_output=True,
+    )
+    base_url = api_url[: api_url.find("/api/v1")]
+
+    api_token = os.getenv("ASTRO_API_TOKEN")
+
+    # create a token for the airflow resource
+    api_token = api_token or _run_and_validate_subprocess(
+        [
+            "astro",
+            "deployment",
+            "token",
+            "create",
+            "--description",
+            token_description,
+            "--name",
+            f"{deployment_name} API access",
+            "--role",
+            "DEPLOYMENT_ADMIN",
+            "--expiration",
+            "30",
+            "--deployment-id",
+            deployment_id,
+            "--clean-output",
+        ],
+        "creating Astro deployment API token",
+        return_output=True,
+    )
+    # check if the token has any prefix
+    if "astro api" in api_token.lower():
+        api_token = api_token[api_token.find('\n') + 1:-1].strip()
+
+    # create a user in the airflow deployment (ardent needs username and password for the Airflowconfig)
+    _create_user_in_airflow_deployment(deployment_name)
+
+    return {
+        "deployment_id": deployment_id,
+        "deployment_name": deployment_name,
+        "api_url": api_url,
+        "base_url": base_url,
+        "api_token": api_token,
+    }
+
+
+def _create_pooled_deployment(deployment_name: str) -> dict:
+    """
+    Creates a deployment for the deployment pool and registers it for session spindown.
+
+    :param deployment_name: The name of the deployment to create.
+    :return: The deployment info, see _provision_deployment.
+    :rtype: dict
+    """
+    creation_start = time.time()
+    created_resources = []
+    try:
+        deployment = _provision_deployment(
+            deployment_name, f"DE-Bench pooled deployment {deployment_name}", created_resources
+        )
+    except Exception:
+        for deployment_id in created_resources:
+            _run_and_validate_subprocess(
+                ["astro", "deployment", "delete", deployment_id, "-f"],
+                "delete Astronomer deployment",
+                check=False,
+            )
+        raise
+    creation_end = time.time()
+
+    try:
+        with sqlite3.connect(os.path.join(TMP_DIR, "resources.db")) as conn:
+            conn.execute("""
+                INSERT INTO resources (resource_id, type, creation_time, worker_pid, creation_duration, description, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                deployment["deployment_id"],
+                "airflow_pooled_deployment",
+                creation_end,
+                os.getpid(),
+                creation_end - creation_start,
+                f"Pooled Astronomer deployment {deployment_name}",
+                "active"
+            ))
+    except Exception as e:
+        print(f"Worker {os.getpid()}: Failed to log pooled deployment to SQLite: {e}")
+    return deployment
+
+
+def _deploy_empty_dags(deployment_id: str) -> None:
+    """
+    Replaces the DAG bundle of a deployment with an empty dags folder and waits for the deploy.
+
+    :param deployment_id: The ID of the deployment.
+    :rtype: None
+    """
+    with tempfile.TemporaryDirectory(prefix="de_bench_empty_dags_") as project_dir:
+        _run_and_validate_subprocess(
+            ["astro", "dev", "init", "-n", "de_bench_empty_dags"],
+            "initialize Astro project",
+            input_text="y",
+            cwd=project_dir,
+        )
+        # astro dev init adds example DAGs, which must not be deployed
+        dags_dir = os.path.join(project_dir, "dags")
+        shutil.rmtree(dags_dir, ignore_errors=True)
+        os.makedirs(dags_dir)
+        _run_and_validate_subprocess(
+            ["astro", "deploy", deployment_id, "--dags", "--force", "--wait"],
+            "deploying empty DAG bundle",
+            cwd=project_dir,
+        )
+
+
+def _reset_pooled_deployment(deployment: dict) -> None:
+    """
+    Resets a pooled deployment between leases: deploys an empty DAG bundle so the previous
+    tenant's DAG files are no longer parsed, then deletes every DAG registered in Airflow and
+    reapplies the Airflow user variables.
+
+    :param deployment: The deployment info, see _provision_deployment.
+    :rtype: None
+    """
+    # Remove the DAG files first, otherwise the deleted DAGs come back on the next parse
+    _deploy_empty_dags(deployment["deployment_id"])
+    headers = {"Authorization": f"Bearer {deployment['api_token']}", "Cache-Control": "no-cache"}
+    response = requests.get(f"{deployment['api_url']}/dags", headers=headers, params={"limit": 1000}, timeout=30)
+    response.raise_for_status()
+    for dag in response.json().get("dags", []):
+        delete_response = requests.delete(
+            f"{deployment['api_url']}/dags/{dag['dag_id']}", headers=headers, timeout=30
+        )
+        if delete_response.status_code not in (204, 404):
+            delete_response.raise_for_status()
+    _create_user_in_airflow_deployment(deployment["deployment_name"], update=True)
+    print(f"Worker {os.getpid()}: Reset pooled deployment {deployment['deployment_name']}")
+
+
+def _delete_pooled_deployment(deployment: dict) -> None:
+    """
+    Deletes a pooled deployment in Astronomer.
+
+    :param deployment: The deployment info, see _provision_deployment.
+    :rtype: None
+    """
+    _run_and_validate_subprocess(
+        ["astro", "deployment", "delete", deployment["deployment_id"], "-f"],
+        "delete Astronomer deployment",
+        check=True,
+    )
+
+
+def _get_deployment_pool() -> DeploymentPool:
+    """
+    Returns this process's handle on the cross-worker Astronomer deployment pool.
+
+    :rtype: DeploymentPool
+    """
+    global _deployment_pool
+    if _deployment_pool is None:
+        _deployment_pool = DeploymentPool(
+            create_deployment=_create_pooled_deployment,
+            reset_deployment=_reset_pooled_deployment,
+            delete_deployment=_delete_pooled_deployment,
+        )
+    return _deployment_pool
+
+
+def cleanup_airflow_deployment_pool(resource_data):
+    """Deletes the pooled Astronomer deployments (called from session spindown)"""
+    if os.environ.get("PYTEST_XDIST_WORKER") is not None:
+        # Other workers may still hold leases; only the controller drains the pool
+        return
+    _get_deployment_pool().drain()
+
+
 def cleanup_airflow_resource(
     test_name: str,
     resource_id: str,
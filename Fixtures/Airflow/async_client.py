@@ -0,0 +1,157 @@
+"""
+Asyncio client for the Airflow REST API, used alongside Airflow_Local to watch many DAG runs at once.
+
+All waits share one event loop and one httpx connection pool, so a single process can monitor
+dozens of runs (across deployments) without pinning a thread or a worker per run.
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from Environment.polling import async_poll
+
+from .states import TERMINAL_DAG_RUN_STATES, TERMINAL_TASK_STATES
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+DEFAULT_MAX_CONNECTIONS = 20
+
+
+def create_async_http_client(max_connections: int = DEFAULT_MAX_CONNECTIONS) -> httpx.AsyncClient:
+    """
+    Create an httpx client that can be shared by several AsyncAirflowClient instances.
+
+    :param max_connections: Upper bound on open connections across all hosts.
+    :return: The client; close it with `await client.aclose()`.
+    :rtype: httpx.AsyncClient
+    """
+    return httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        # Retries connection failures only, never a request that reached the server
+        transport=httpx.AsyncHTTPTransport(retries=3),
+    )
+
+
+class AsyncAirflowClient:
+    """
+    Awaitable Airflow REST calls for one deployment.
+
+    :param host: The Airflow base URL (without /api/v1).
+    :param api_token: The deployment API token.
+    :param http_client: An httpx.AsyncClient to share with other deployments; one is created (and
+        closed by aclose) if not given.
+    """
+
+    def __init__(self, host: str, api_token: str, http_client: Optional[httpx.AsyncClient] = None):
+        self.api_url = f"{host.rstrip('/')}/api/v1"
+        self.headers = {"Authorization": f"Bearer {api_token}", "Cache-Control": "no-cache"}
+        self._owns_client = http_client is None
+        self.http_client = http_client or create_async_http_client()
+
+    async def __aenter__(self) -> "AsyncAirflowClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if this instance created it."""
+        if self._owns_client:
+            await self.http_client.aclose()
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = await self.http_client.get(f"{self.api_url}{path}", headers=self.headers, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_dag_run(self, dag_id: str, dag_run_id: str) -> Dict[str, Any]:
+        """
+        Get a DAG run.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :return: The DAG run as returned by the API.
+        :rtype: Dict[str, Any]
+        """
+        return await self._get(f"/dags/{dag_id}/dagRuns/{dag_run_id}")
+
+    async def get_task_instances(self, dag_id: str, dag_run_id: str) -> List[Dict[str, Any]]:
+        """
+        Get all task instances of a DAG run, following pagination.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :return: The task instances.
+        :rtype: List[Dict[str, Any]]
+        """
+        task_instances = []
+        while True:
+            page = await self._get(
+                f"/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances",
+                params={"limit": 100, "offset": len(task_instances)},
+            )
+            task_instances.extend(page["task_instances"])
+            if not page["task_instances"] or len(task_instances) >= page["total_entries"]:
+                return task_instances
+
+    async def wait_for_run(self, dag_id: str, dag_run_id: str, timeout: float = 600,
+                           max_interval: float = 30) -> Dict[str, Any]:
+        """
+        Wait until a DAG run reaches a terminal state.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :param timeout: Seconds to wait before raising PollTimeout.
+        :param max_interval: Upper bound for the backoff between checks.
+        :return: The finished DAG run.
+        :rtype: Dict[str, Any]
+        """
+        dag_run = await async_poll(
+            lambda: self.get_dag_run(dag_id, dag_run_id),
+            is_done=lambda dag_run: dag_run.get("state") in TERMINAL_DAG_RUN_STATES,
+            timeout=timeout,
+            max_interval=max_interval,
+            retry_on=(httpx.TransportError, httpx.HTTPStatusError),
+            description=f"DAG run {dag_id}/{dag_run_id}",
+        )
+        print(f"DAG run {dag_id}/{dag_run_id} finished with state: {dag_run['state']}")
+        return dag_run
+
+    async def wait_for_task_instances(self, dag_id: str, dag_run_id: str, timeout: float = 600,
+                                      max_interval: float = 30) -> List[Dict[str, Any]]:
+        """
+        Wait until every task instance of a DAG run reaches a terminal state.
+
+        :param str dag_id: The ID of the DAG.
+        :param str dag_run_id: The ID of the DAG run.
+        :param timeout: Seconds to wait before raising PollTimeout.
+        :param max_interval: Upper bound for the backoff between checks.
+        :return: The finished task instances.
+        :rtype: List[Dict[str, Any]]
+        """
+        return await async_poll(
+            lambda: self.get_task_instances(dag_id, dag_run_id),
+            is_done=lambda task_instances: bool(task_instances)
+            and all(ti["state"] in TERMINAL_TASK_STATES for ti in task_instances),
+            timeout=timeout,
+            max_interval=max_interval,
+            retry_on=(httpx.TransportError, httpx.HTTPStatusError),
+            description=f"task instances of {dag_id}/{dag_run_id}",
+        )
+
+
+async def wait_for_runs(runs: Iterable[Tuple[AsyncAirflowClient, str, str]], timeout: float = 600) -> List[Any]:
+    """
+    Wait for many DAG runs concurrently, possibly on different deployments.
+
+    :param runs: (client, dag_id, dag_run_id) tuples.
+    :param timeout: Seconds to wait for each run.
+    :return: The finished DAG runs in input order; a run that failed to finish has its exception instead.
+    :rtype: List[Any]
+    """
+    return await asyncio.gather(
+        *(client.wait_for_run(dag_id, dag_run_id, timeout=timeout) for client, dag_id, dag_run_id in runs),
+        return_exceptions=True,
+    )
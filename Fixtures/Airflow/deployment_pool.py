@@ -0,0 +1,315 @@
+"""
+Warm pool of pre-provisioned Astronomer deployments shared by pytest-xdist workers.
+
+Deployments are tracked in a SQLite lease table in .tmp and every state change happens
+under a FileLock, so each deployment is leased by exactly one worker at a time. Leased
+deployments are reset and handed back instead of deleted, and missing deployments are
+created in a background thread so later leases don't wait for `astro deployment create`.
+
+Leased and provisioning slots carry a heartbeat refreshed by a background thread of the owning
+process. Slots of a crashed worker stop being refreshed: a stale lease is taken over (reset
+first) by the next lease() call, and a stale creation frees its slot to be filled again.
+
+The pool is disabled unless ASTRO_DEPLOYMENT_POOL_SIZE is set to a positive number.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from filelock import FileLock
+
+TMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".tmp")
+POOL_DB = os.path.join(TMP_DIR, "airflow_deployment_pool.db")
+POOL_LOCK = os.path.join(TMP_DIR, "airflow_deployment_pool.lock")
+
+DEFAULT_LEASE_TIMEOUT = 30 * 60
+LEASE_POLL_INTERVAL = 15
+HEARTBEAT_INTERVAL = 30
+# A slot whose heartbeat is older than this belongs to a dead worker
+LEASE_TTL = 4 * HEARTBEAT_INTERVAL
+
+# Deployment states in the lease table
+PROVISIONING = "provisioning"
+AVAILABLE = "available"
+LEASED = "leased"
+
+_POOLS: List["DeploymentPool"] = []
+
+
+def get_pool_size() -> int:
+    """Number of deployments to keep in the pool (0 disables pooling)"""
+    try:
+        return max(0, int(os.getenv("ASTRO_DEPLOYMENT_POOL_SIZE", "0")))
+    except ValueError:
+        print(f"Worker {os.getpid()}: Invalid ASTRO_DEPLOYMENT_POOL_SIZE, deployment pool disabled")
+        return 0
+
+
+class DeploymentPool:
+    """
+    Cross-process pool of Astronomer deployments.
+
+    :param create_deployment: Creates a deployment with the given name and returns its info dict
+        (must contain "deployment_id").
+    :param reset_deployment: Resets a deployment's info dict to a clean state between leases.
+    :param delete_deployment: Deletes a deployment given its info dict.
+    :param size: Number of deployments to keep, defaults to ASTRO_DEPLOYMENT_POOL_SIZE.
+    """
+
+    def __init__(
+        self,
+        create_deployment: Callable[[str], Dict[str, Any]],
+        reset_deployment: Callable[[Dict[str, Any]], None],
+        delete_deployment: Callable[[Dict[str, Any]], None],
+        size: Optional[int] = None,
+    ):
+        self.create_deployment = create_deployment
+        self.reset_deployment = reset_deployment
+        self.delete_deployment = delete_deployment
+        self.size = get_pool_size() if size is None else size
+        self._stop = threading.Event()
+        self._replenish_thread: Optional[threading.Thread] = None
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        _POOLS.append(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _lock(self) -> FileLock:
+        os.makedirs(TMP_DIR, exist_ok=True)
+        return FileLock(POOL_LOCK)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(POOL_DB, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS deployments (slot_id TEXT PRIMARY KEY, status TEXT, info TEXT, "
+            "leased_by INTEGER, updated_time REAL)"
+        )
+        return conn
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with self._lock(), self._connect() as conn:
+                    conn.execute(
+                        "UPDATE deployments SET updated_time = ? WHERE leased_by = ? AND status IN (?, ?)",
+                        (time.time(), os.getpid(), LEASED, PROVISIONING),
+                    )
+            except Exception as e:
+                print(f"Worker {os.getpid()}: Error refreshing deployment pool leases: {e}")
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
+            return
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name="deployment-pool-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def _take_over_stale_lease(self) -> Optional[Dict[str, Any]]:
+        """
+        Drop slots whose creation was abandoned and take over one stale lease of a dead worker.
+        Call with the lock held.
+        """
+        stale_before = time.time() - LEASE_TTL
+        with self._connect() as conn:
+            # The deployment of an abandoned creation is unknown; free the slot so it gets refilled
+            conn.execute(
+                "DELETE FROM deployments WHERE info IS NULL AND status IN (?, ?) AND updated_time < ?",
+                (LEASED, PROVISIONING, stale_before),
+            )
+            row = conn.execute(
+                "SELECT slot_id, info, leased_by FROM deployments WHERE status = ? AND updated_time < ? "
+                "ORDER BY updated_time LIMIT 1",
+                (LEASED, stale_before),
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE deployments SET leased_by = ?, updated_time = ? WHERE slot_id = ?",
+                (os.getpid(), time.time(), row[0]),
+            )
+        print(f"Worker {os.getpid()}: Taking over pooled deployment {row[0]} from dead worker {row[2]}")
+        return {**json.loads(row[1]), "slot_id": row[0]}
+
+    def _claim_slot(self, status: str) -> Optional[str]:
+        """Reserve a slot for a new deployment if the pool is below its size. Call with the lock held."""
+        with self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM deployments").fetchone()
+            if count >= self.size:
+                return None
+            slot_id = uuid.uuid4().hex[:12]
+            conn.execute(
+                "INSERT INTO deployments (slot_id, status, info, leased_by, updated_time) VALUES (?, ?, NULL, ?, ?)",
+                (slot_id, status, os.getpid(), time.time()),
+            )
+        return slot_id
+
+    def _fill_slot(self, slot_id: str) -> Dict[str, Any]:
+        """Create the deployment for a reserved slot, freeing the slot if creation fails"""
+        deployment_name = f"de_bench_pool_{slot_id}"
+        try:
+            info = self.create_deployment(deployment_name)
+        except Exception as e:
+            print(f"Worker {os.getpid()}: Error creating pooled deployment {deployment_name}: {e}")
+            with self._lock(), self._connect() as conn:
+                conn.execute("DELETE FROM deployments WHERE slot_id = ?", (slot_id,))
+            raise
+        with self._lock(), self._connect() as conn:
+            conn.execute(
+                "UPDATE deployments SET info = ?, status = CASE WHEN status = ? THEN ? ELSE status END, "
+                "leased_by = CASE WHEN status = ? THEN NULL ELSE leased_by END, updated_time = ? WHERE slot_id = ?",
+                (json.dumps(info), PROVISIONING, AVAILABLE, PROVISIONING, time.time(), slot_id),
+            )
+        return info
+
+    def lease(self, timeout: float = DEFAULT_LEASE_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """
+        Lease a deployment for the current worker.
+
+        Takes an available deployment if there is one, otherwise takes over (and resets) the lease
+        of a worker that stopped heartbeating, otherwise creates one if the pool is below its size,
+        otherwise waits for a release. Returns None if the pool is disabled
+        or nothing frees up within timeout, so the caller can fall back to a dedicated deployment.
+
+        :param timeout: Seconds to wait for a deployment to be released.
+        :return: The deployment info dict (with "slot_id" added) or None.
+        :rtype: Optional[Dict[str, Any]]
+        """
+        if not self.enabled:
+            return None
+
+        self._start_heartbeat()
+        deadline = time.time() + timeout
+        while True:
+            stale = None
+            with self._lock():
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT slot_id, info FROM deployments WHERE status = ? ORDER BY updated_time LIMIT 1",
+                        (AVAILABLE,),
+                    ).fetchone()
+                    if row:
+                        conn.execute(
+                            "UPDATE deployments SET status = ?, leased_by = ?, updated_time = ? WHERE slot_id = ?",
+                            (LEASED, os.getpid(), time.time(), row[0]),
+                        )
+                if not row:
+                    stale = self._take_over_stale_lease()
+                slot_id = None if row or stale else self._claim_slot(LEASED)
+
+            if stale:
+                # The dead worker's test left its DAGs and variables behind
+                info = {key: value for key, value in stale.items() if key != "slot_id"}
+                try:
+                    self.reset_deployment(info)
+                except Exception as e:
+                    print(f"Worker {os.getpid()}: Error resetting pooled deployment {stale['slot_id']}, retiring it: {e}")
+                    self.retire(stale)
+                    continue
+                print(f"Worker {os.getpid()}: Leased pooled deployment {stale['slot_id']}")
+                return stale
+            if row:
+                print(f"Worker {os.getpid()}: Leased pooled deployment {row[0]}")
+                self.replenish_async()
+                return {**json.loads(row[1]), "slot_id": row[0]}
+            if slot_id:
+                print(f"Worker {os.getpid()}: Deployment pool is not full, creating deployment for slot {slot_id}")
+                self.replenish_async()
+                try:
+                    info = self._fill_slot(slot_id)
+                except Exception:
+                    return None
+                return {**info, "slot_id": slot_id}
+            if time.time() >= deadline:
+                print(f"Worker {os.getpid()}: No pooled deployment released within {timeout}s")
+                return None
+            time.sleep(LEASE_POLL_INTERVAL)
+
+    def release(self, deployment: Dict[str, Any]) -> None:
+        """Reset a leased deployment and make it available again, retiring it if the reset fails"""
+        slot_id = deployment["slot_id"]
+        info = {key: value for key, value in deployment.items() if key != "slot_id"}
+        try:
+            self.reset_deployment(info)
+        except Exception as e:
+            print(f"Worker {os.getpid()}: Error resetting pooled deployment {slot_id}, retiring it: {e}")
+            self.retire(deployment)
+            return
+        with self._lock(), self._connect() as conn:
+            released = conn.execute(
+                "UPDATE deployments SET status = ?, leased_by = NULL, updated_time = ? "
+                "WHERE slot_id = ? AND leased_by = ?",
+                (AVAILABLE, time.time(), slot_id, os.getpid()),
+            ).rowcount
+        if not released:
+            print(f"Worker {os.getpid()}: Pooled deployment {slot_id} was taken over by another worker")
+            return
+        print(f"Worker {os.getpid()}: Released pooled deployment {slot_id}")
+
+    def retire(self, deployment: Dict[str, Any]) -> None:
+        """Delete a deployment and free its slot so it gets replaced"""
+        try:
+            self.delete_deployment(deployment)
+        except Exception as e:
+            print(f"Worker {os.getpid()}: Error deleting pooled deployment {deployment['slot_id']}: {e}")
+        with self._lock(), self._connect() as conn:
+            conn.execute("DELETE FROM deployments WHERE slot_id = ?", (deployment["slot_id"],))
+        self.replenish_async()
+
+    def _replenish(self) -> None:
+        self._start_heartbeat()
+        while not self._stop.is_set():
+            with self._lock():
+                slot_id = self._claim_slot(PROVISIONING)
+            if not slot_id:
+                return
+            print(f"Worker {os.getpid()}: Replenishing deployment pool slot {slot_id}")
+            try:
+                self._fill_slot(slot_id)
+            except Exception:
+                return
+
+    def replenish_async(self) -> None:
+        """Create missing pool deployments in a background thread"""
+        if not self.enabled or self._stop.is_set():
+            return
+        if self._replenish_thread and self._replenish_thread.is_alive():
+            return
+        self._replenish_thread = threading.Thread(target=self._replenish, name="deployment-pool-replenish")
+        self._replenish_thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop replenishing and wait for an in-flight deployment creation to finish"""
+        self._stop.set()
+        if self._replenish_thread and self._replenish_thread.is_alive():
+            self._replenish_thread.join(timeout)
+
+    def drain(self) -> None:
+        """Delete every pooled deployment (session spindown)"""
+        if not os.path.exists(POOL_DB):
+            return
+        with self._lock(), self._connect() as conn:
+            rows = conn.execute("SELECT slot_id, info FROM deployments").fetchall()
+            conn.execute("DELETE FROM deployments")
+        for slot_id, info in rows:
+            if info is None:
+                continue
+            try:
+                self.delete_deployment(json.loads(info))
+                print(f"Worker {os.getpid()}: Deleted pooled deployment {slot_id}")
+            except Exception as e:
+                print(f"Worker {os.getpid()}: Error deleting pooled deployment {slot_id}: {e}")
+
+
+def stop_replenishing() -> None:
+    """Stop the background replenishment of every pool in this process"""
+    for pool in _POOLS:
+        pool.stop()
@@ -0,0 +1,9 @@
+"""
+Airflow states shared by the sync (Airflow_Local) and async (AsyncAirflowClient) waiters, so both
+agree on when a DAG run or task instance is done.
+"""
+
+# DAG run states after which the run won't change anymore
+TERMINAL_DAG_RUN_STATES = ("success", "failed", "error")
+# Task instance states after which no more log lines are written for the try
+TERMINAL_TASK_STATES = ("success", "failed", "skipped", "upstream_failed", "removed", "up_for_retry")
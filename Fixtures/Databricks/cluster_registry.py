@@ -0,0 +1,203 @@
+"""
+Cross-process registry of shared Databricks clusters for pytest-xdist workers.
+
+Clusters are tracked per config hash in a SQLite database in .tmp and every state change
+happens under a FileLock, so all workers share one cluster per configuration: the first
+worker creates it while the others wait, each test holds a lease on it, and the last lease
+to be released gets the cluster deleted.
+
+Leases carry a heartbeat refreshed by a background thread of the owning process. Leases of a
+crashed worker stop being refreshed and are dropped once they go stale, so they neither keep a
+cluster alive forever nor block a new creation.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from filelock import FileLock
+
+TMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".tmp")
+REGISTRY_DB = os.path.join(TMP_DIR, "databricks_clusters.db")
+REGISTRY_LOCK = os.path.join(TMP_DIR, "databricks_clusters.lock")
+
+HEARTBEAT_INTERVAL = 30
+# A lease (or a cluster creation) whose heartbeat is older than this belongs to a dead worker
+LEASE_TTL = 4 * HEARTBEAT_INTERVAL
+WAIT_POLL_INTERVAL = 5
+
+# Cluster states in the registry
+CREATING = "creating"
+READY = "ready"
+FAILED = "failed"
+
+
+class ClusterRegistry:
+    """
+    Reference-counted shared clusters keyed by config hash, visible to every worker process.
+    """
+
+    def __init__(self):
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def _lock(self) -> FileLock:
+        os.makedirs(TMP_DIR, exist_ok=True)
+        return FileLock(REGISTRY_LOCK)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(REGISTRY_DB, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS clusters (config_hash TEXT PRIMARY KEY, cluster_id TEXT, status TEXT, "
+            "created_by_us INTEGER, creator_pid INTEGER, creation_time REAL, error TEXT, heartbeat_time REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (lease_id TEXT PRIMARY KEY, config_hash TEXT, worker_pid INTEGER, "
+            "heartbeat_time REAL)"
+        )
+        return conn
+
+    def _prune_stale(self, conn: sqlite3.Connection) -> None:
+        """Drop leases and creations of workers that stopped heartbeating. Call with the lock held."""
+        stale_before = time.time() - LEASE_TTL
+        conn.execute("DELETE FROM leases WHERE heartbeat_time < ?", (stale_before,))
+        conn.execute(
+            "UPDATE clusters SET status = ?, error = 'creator stopped responding' "
+            "WHERE status = ? AND heartbeat_time < ?",
+            (FAILED, CREATING, stale_before),
+        )
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with self._lock(), self._connect() as conn:
+                    now = time.time()
+                    conn.execute("UPDATE leases SET heartbeat_time = ? WHERE worker_pid = ?", (now, os.getpid()))
+                    conn.execute(
+                        "UPDATE clusters SET heartbeat_time = ? WHERE creator_pid = ? AND status = ?",
+                        (now, os.getpid(), CREATING),
+                    )
+            except Exception as e:
+                print(f"Worker {os.getpid()}: Error refreshing Databricks cluster leases: {e}")
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
+            return
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name="databricks-cluster-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def acquire(
+        self,
+        config_hash: str,
+        create_cluster: Callable[[], Tuple[str, bool]],
+        timeout: float = 300,
+    ) -> Dict[str, Any]:
+        """
+        Lease the shared cluster for a config hash, creating it if no worker has.
+
+        If another worker is creating the cluster, waits up to timeout for it. A failed or
+        abandoned creation is retried by the next caller.
+
+        :param config_hash: Hash of the cluster relevant configuration.
+        :param create_cluster: Creates the cluster, returning (cluster_id, created_by_us).
+        :param timeout: Seconds to wait for another worker's creation.
+        :return: Dict with cluster_id, created_by_us (True only for the creating caller) and lease_id.
+        :rtype: Dict[str, Any]
+        :raises TimeoutError: If another worker's creation didn't finish within timeout.
+        :raises Exception: Whatever create_cluster raised, after marking the creation as failed.
+        """
+        self._start_heartbeat()
+        lease_id = uuid.uuid4().hex
+        deadline = time.time() + timeout
+        waiting = False
+        while True:
+            with self._lock(), self._connect() as conn:
+                self._prune_stale(conn)
+                now = time.time()
+                row = conn.execute(
+                    "SELECT cluster_id, status, creator_pid FROM clusters WHERE config_hash = ?", (config_hash,)
+                ).fetchone()
+                if row is None or row[1] == FAILED:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO clusters (config_hash, cluster_id, status, created_by_us, creator_pid, "
+                        "creation_time, error, heartbeat_time) VALUES (?, NULL, ?, 0, ?, ?, NULL, ?)",
+                        (config_hash, CREATING, os.getpid(), now, now),
+                    )
+                if row is None or row[1] in (READY, FAILED):
+                    conn.execute(
+                        "INSERT INTO leases (lease_id, config_hash, worker_pid, heartbeat_time) VALUES (?, ?, ?, ?)",
+                        (lease_id, config_hash, os.getpid(), now),
+                    )
+            if row is not None and row[1] == READY:
+                print(f"Worker {os.getpid()}: Reusing existing shared cluster {row[0]}")
+                return {"cluster_id": row[0], "created_by_us": False, "lease_id": lease_id}
+            if row is None or row[1] == FAILED:
+                break
+            if time.time() >= deadline:
+                raise TimeoutError(
+                    f"Shared cluster creation by worker {row[2]} did not finish within {timeout}s"
+                )
+            if not waiting:
+                print(f"Worker {os.getpid()}: Another worker ({row[2]}) is creating shared cluster, waiting...")
+                waiting = True
+            time.sleep(WAIT_POLL_INTERVAL)
+
+        print(f"Worker {os.getpid()}: Creating new shared cluster (config_hash: {config_hash[:8]}...)")
+        try:
+            cluster_id, created_by_us = create_cluster()
+        except Exception as e:
+            with self._lock(), self._connect() as conn:
+                conn.execute(
+                    "UPDATE clusters SET status = ?, error = ? WHERE config_hash = ?", (FAILED, str(e), config_hash)
+                )
+                conn.execute("DELETE FROM leases WHERE lease_id = ?", (lease_id,))
+            raise
+        with self._lock(), self._connect() as conn:
+            conn.execute(
+                "UPDATE clusters SET cluster_id = ?, status = ?, created_by_us = ?, heartbeat_time = ? "
+                "WHERE config_hash = ?",
+                (cluster_id, READY, int(created_by_us), time.time(), config_hash),
+            )
+        print(f"Worker {os.getpid()}: Successfully created shared cluster {cluster_id}")
+        return {"cluster_id": cluster_id, "created_by_us": created_by_us, "lease_id": lease_id}
+
+    def release(self, config_hash: str, lease_id: str) -> Optional[Tuple[str, bool]]:
+        """
+        Release a lease; the last release removes the cluster from the registry.
+
+        :param config_hash: Hash the cluster was acquired with.
+        :param lease_id: The lease_id returned by acquire.
+        :return: (cluster_id, created_by_us) if this was the last lease, None while others still use it.
+        :rtype: Optional[Tuple[str, bool]]
+        """
+        with self._lock(), self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE lease_id = ?", (lease_id,))
+            self._prune_stale(conn)
+            (remaining,) = conn.execute(
+                "SELECT COUNT(*) FROM leases WHERE config_hash = ?", (config_hash,)
+            ).fetchone()
+            if remaining:
+                print(f"Worker {os.getpid()}: Shared cluster still in use by {remaining} other test(s)")
+                return None
+            row = conn.execute(
+                "SELECT cluster_id, created_by_us FROM clusters WHERE config_hash = ? AND status = ?",
+                (config_hash, READY),
+            ).fetchone()
+            conn.execute("DELETE FROM clusters WHERE config_hash = ? AND status = ?", (config_hash, READY))
+        return (row[0], bool(row[1])) if row else None
+
+
+_registry: Optional[ClusterRegistry] = None
+
+
+def get_cluster_registry() -> ClusterRegistry:
+    """The registry of this process, created on first use"""
+    global _registry
+    if _registry is None:
+        _registry = ClusterRegistry()
+    return _registry
@@ -1,94 +1,11 @@
 import pytest
-import json
 import time
 import os
 import importlib
 import uuid
-import hashlib
-import threading
-from threading import Lock
 from databricks_api import DatabricksAPI
-from Environment.Databricks import get_or_create_cluster
-
-# Global registry for shared cluster coordination
-SHARED_CLUSTERS = {}
-CLUSTER_LOCKS = {}
-CLUSTER_USAGE_COUNT = {}
-REGISTRY_LOCK = Lock()  # Protects the global registries themselves
-
-
-class ClusterInfo:
-    """Information about a shared cluster being created or in use."""
-    def __init__(self):
-        self.cluster_id = None
-        self.created_by_us = False
-        self.status = "creating"  # creating, ready, failed
-        self.error = None
-        self.creation_time = None
-        self.creator_pid = None
-        self.client_info = None
-
-
-def get_cluster_config_hash(config):
-    """
-    Create a unique hash for cluster configuration, excluding test-specific fields.
-    Only configuration that affects cluster creation should be included.
-    """
-    cluster_relevant_config = {
-        "host": config.get("host", ""),
-        "cluster_name": config.get("cluster_name", ""),
-        "node_type_id": config.get("node_type_id", ""),
-        "spark_version": config.get("spark_version", ""),
-        "num_workers": config.get("num_workers", 1),
-        "autotermination_minutes": config.get("autotermination_minutes", 120),
-        "spark_conf": config.get("spark_conf", {}),
-        "aws_attributes": config.get("aws_attributes", {}),
-        # Exclude: resource_id, test_id, unique_message, delta_table_path, etc.
-    }
-    config_str = json.dumps(cluster_relevant_config, sort_keys=True)
-    return hashlib.md5(config_str.encode()).hexdigest()
-
-
-def wait_for_cluster_creation(config_hash, client, config, timeout=300, poll_interval=5, fallback=True):
-    """
-    Wait for another worker to finish creating the cluster.
-    """
-    start_time = time.time()
-    print(f"Worker {os.getpid()}: Waiting for shared cluster creation (config_hash: {config_hash[:8]}..., timeout={timeout}s)")
-    
-    while time.time() - start_time < timeout:
-        time.sleep(poll_interval)
-        
-        if config_hash in SHARED_CLUSTERS:
-            cluster_info = SHARED_CLUSTERS[config_hash]
-            
-            if cluster_info.status == "ready":
-                with REGISTRY_LOCK:
-                    CLUSTER_USAGE_COUNT[config_hash] += 1
-                print(f"Worker {os.getpid()}: Shared cluster {cluster_info.cluster_id} is now ready")
-                return {
-                    "cluster_id": cluster_info.cluster_id,
-                    "created_by_us": False,
-                    "client": client,
-                    "config": config,
-                    "creation_time": cluster_info.creation_time,
-                    "worker_pid": os.getpid(),
-                    "is_shared": True,
-                    "config_hash": config_hash
-                }
-            
-            elif cluster_info.status == "failed":
-                print(f"Worker {os.getpid()}: Shared cluster creation failed: {cluster_info.error}")
-                break
-    
-    # Timeout or failure - handle based on fallback setting
-    if fallback:
-        print(f"Worker {os.getpid()}: Timeout/failure waiting for shared cluster, creating fallback cluster")
-        return create_fallback_cluster(client, config)
-    else:
-        error_msg = f"Shared cluster creation failed/timed out and fallback is disabled"
-        print(f"Worker {os.getpid()}: {error_msg}")
-        raise RuntimeError(error_msg)
+from Environment.Databricks import clear_cluster_cache, get_cluster_config_hash, get_or_create_cluster
+from .cluster_registry import get_cluster_registry
 
 
 def create_fallback_cluster(client, config):
@@ -109,64 +26,10 @@ def create_fallback_cluster(client, config):
     }
 
 
-def create_new_shared_cluster(config_hash, client_info):
-    """
-    Create a new shared cluster and register it in the global registry.
-    """
-    config = client_info["config"]
-    client = client_info["client"]
-    
-    print(f"Worker {os.getpid()}: Creating new shared cluster (config_hash: {config_hash[:8]}...)")
-    
-    # Create cluster info and mark as creating
-    cluster_info = ClusterInfo()
-    cluster_info.creator_pid = os.getpid()
-    cluster_info.creation_time = time.time()
-    cluster_info.client_info = client_info
-    
-    with REGISTRY_LOCK:
-        SHARED_CLUSTERS[config_hash] = cluster_info
-        CLUSTER_USAGE_COUNT[config_hash] = 1  # This worker will use it
-    
-    try:
-        # Actually create the cluster
-        cluster_id, cluster_created_by_us = get_or_create_cluster(client, config)
-        
-        # Update cluster info on success
-        cluster_info.cluster_id = cluster_id
-        cluster_info.created_by_us = cluster_created_by_us
-        cluster_info.status = "ready"
-        
-        print(f"Worker {os.getpid()}: Successfully created shared cluster {cluster_id}")
-        
-        return {
-            "cluster_id": cluster_id,
-            "created_by_us": cluster_created_by_us,
-            "client": client,
-            "config": config,
-            "creation_time": cluster_info.creation_time,
-            "worker_pid": os.getpid(),
-            "is_shared": True,
-            "config_hash": config_hash
-        }
-        
-    except Exception as e:
-        # Mark as failed on error
-        cluster_info.status = "failed"
-        cluster_info.error = str(e)
-        
-        with REGISTRY_LOCK:
-            CLUSTER_USAGE_COUNT[config_hash] -= 1  # This worker won't use it
-        
-        print(f"Worker {os.getpid()}: Failed to create shared cluster: {e}")
-        
-        # Fall back to creating our own cluster
-        return create_fallback_cluster(client, config)
-
-
 def create_shared_cluster_with_mutex(client_info, timeout=300, fallback=True):
     """
-    Thread-safe shared cluster creation with mutex/wait mechanism.
+    Lease the shared cluster for this config from the cross-process registry, creating it if
+    no worker has. Falls back to an individual cluster if the creation fails or times out.
     """
     config = client_info["config"]
     config_hash = get_cluster_config_hash(config)
@@ -174,89 +37,53 @@ def create_shared_cluster_with_mutex(client_info, timeout=300, fallback=True):
     
     print(f"Worker {os.getpid()}: Requesting shared cluster (config_hash: {config_hash[:8]}..., timeout={timeout}s)")
     
-    # Get or create lock for this config
-    with REGISTRY_LOCK:
-        if config_hash not in CLUSTER_LOCKS:
-            CLUSTER_LOCKS[config_hash] = Lock()
-            CLUSTER_USAGE_COUNT[config_hash] = 0
-    
-    with CLUSTER_LOCKS[config_hash]:
-        # Check if cluster already exists and is ready
-        if config_hash in SHARED_CLUSTERS:
-            cluster_info = SHARED_CLUSTERS[config_hash]
-            
-            if cluster_info.status == "ready":
-                # Cluster is ready, increment usage and return
-                with REGISTRY_LOCK:
-                    CLUSTER_USAGE_COUNT[config_hash] += 1
-                print(f"Worker {os.getpid()}: Reusing existing shared cluster {cluster_info.cluster_id}")
-                return {
-                    "cluster_id": cluster_info.cluster_id,
-                    "created_by_us": False,  # We didn't create it
-                    "client": client,
-                    "config": config,
-                    "creation_time": cluster_info.creation_time,
-                    "worker_pid": os.getpid(),
-                    "is_shared": True,
-                    "config_hash": config_hash
-                }
-            
-            elif cluster_info.status == "failed":
-                # Previous creation failed, clean up and try again
-                print(f"Worker {os.getpid()}: Previous shared cluster creation failed, retrying")
-                with REGISTRY_LOCK:
-                    if config_hash in SHARED_CLUSTERS:
-                        del SHARED_CLUSTERS[config_hash]
-                    CLUSTER_USAGE_COUNT[config_hash] = 0
-            
-            elif cluster_info.status == "creating":
-                # Another worker is creating, wait for it
-                print(f"Worker {os.getpid()}: Another worker ({cluster_info.creator_pid}) is creating shared cluster")
-                # Release the config-specific lock to allow creator to work
-    
-    # Check if we need to wait for creation (outside the lock)
-    if config_hash in SHARED_CLUSTERS and SHARED_CLUSTERS[config_hash].status == "creating":
-        return wait_for_cluster_creation(config_hash, client, config, timeout=timeout, fallback=fallback)
+    try:
+        lease = get_cluster_registry().acquire(
+            config_hash,
+            create_cluster=lambda: get_or_create_cluster(client, config),
+            timeout=timeout,
+        )
+    except Exception as e:
+        if not fallback:
+            error_msg = f"Shared cluster creation failed/timed out and fallback is disabled: {e}"
+            print(f"Worker {os.getpid()}: {error_msg}")
+            raise RuntimeError(error_msg) from e
+        print(f"Worker {os.getpid()}: Shared cluster unavailable ({e}), creating fallback cluster")
+        return create_fallback_cluster(client, config)
     
-    # We need to create the cluster
-    return create_new_shared_cluster(config_hash, client_info)
+    return {
+        "cluster_id": lease["cluster_id"],
+        "created_by_us": lease["created_by_us"],
+        "client": client,
+        "config": config,
+        "creation_time": time.time(),
+        "worker_pid": os.getpid(),
+        "is_shared": True,
+        "config_hash": config_hash,
+        "lease_id": lease["lease_id"]
+    }
 
 
-def cleanup_shared_cluster(cluster_id, config_hash, client):
+def cleanup_shared_cluster(cluster_id, config_hash, client, lease_id=None):
     """
-    Coordinate cleanup of shared clusters - only delete when no tests are using it.
+    Release this test's lease on a shared cluster; the last user deletes it (and evicts it from the
+    cluster cache) if this session created it.
     """
-    if config_hash not in CLUSTER_USAGE_COUNT:
-        print(f"Worker {os.getpid()}: No usage count found for cluster {cluster_id}")
+    if not lease_id:
+        print(f"Worker {os.getpid()}: No lease found for cluster {cluster_id}")
         return
     
     print(f"Worker {os.getpid()}: Cleaning up shared cluster {cluster_id} (config_hash: {config_hash[:8]}...)")
     
-    should_delete = False
-    
-    with REGISTRY_LOCK:
-        if config_hash in CLUSTER_USAGE_COUNT:
-            CLUSTER_USAGE_COUNT[config_hash] -= 1
-            remaining_count = CLUSTER_USAGE_COUNT[config_hash]
-            
-            if remaining_count <= 0:
-                # No more tests using this cluster, safe to delete
-                if config_hash in SHARED_CLUSTERS:
-                    cluster_info = SHARED_CLUSTERS[config_hash]
-                    should_delete = cluster_info.created_by_us
-                    
-                    # Clean up registry
-                    del SHARED_CLUSTERS[config_hash]
-                    del CLUSTER_USAGE_COUNT[config_hash]
-                    if config_hash in CLUSTER_LOCKS:
-                        del CLUSTER_LOCKS[config_hash]
-            else:
-                print(f"Worker {os.getpid()}: Shared cluster {cluster_id} still in use by {remaining_count} other test(s)")
+    last_user = get_cluster_registry().release(config_hash, lease_id)
+    should_delete = bool(last_user and last_user[1])
     
     if should_delete:
         print(f"Worker {os.getpid()}: Deleting shared cluster {cluster_id} (last user)")
+        # Evict it first so later get_or_create_cluster calls don't restart a deleted cluster
+        clear_cluster_cache(config_hash)
         try:
-            client.clusters.delete_cluster(cluster_id)
+            client.cluster.delete_cluster(cluster_id)
             print(f"Worker {os.getpid()}: Successfully deleted shared cluster {cluster_id}")
         except Exception as e:
             print(f"Warning: Could not delete shared cluster {cluster_id}: {e}")
@@ -390,6 +217,7 @@ def databricks_resource(request):
     cluster_created_by_us = False
     
     cluster_config_hash = None
+    cluster_lease_id = None
     is_shared_cluster = False
     
     if build_template.get("use_shared_cluster", False):
@@ -401,6 +229,7 @@ def databricks_resource(request):
         cluster_id = cluster_info["cluster_id"]
         cluster_created_by_us = cluster_info["created_by_us"]
         cluster_config_hash = cluster_info.get("config_hash")
+        cluster_lease_id = cluster_info.get("lease_id")
         is_shared_cluster = cluster_info.get("is_shared", True)
         # Don't add to created_resources since this is a shared cluster managed globally
     elif "cluster_config" in build_template:
@@ -510,7 +339,8 @@ def databricks_resource(request):
         "cluster_id": cluster_id,
         "cluster_created_by_us": cluster_created_by_us,
         "is_shared_cluster": is_shared_cluster,
-        "cluster_config_hash": cluster_config_hash
+        "cluster_config_hash": cluster_config_hash,
+        "cluster_lease_id": cluster_lease_id
     }
     
     print(f"Worker {os.getpid()}: Created Databricks resource {resource_id}")
@@ -543,7 +373,7 @@ def databricks_resource(request):
             elif resource["type"] == "cluster" and resource.get("created_by_us", False):
                 # This handles non-shared clusters
                 try:
-                    client.clusters.delete_cluster(resource["cluster_id"])
+                    client.cluster.delete_cluster(resource["cluster_id"])
                 except Exception as e:
                     print(f"Warning: Could not delete cluster {resource['cluster_id']}: {e}")
         
@@ -552,13 +382,14 @@ def databricks_resource(request):
             cleanup_shared_cluster(
                 cluster_id=resource_data["cluster_id"],
                 config_hash=resource_data["cluster_config_hash"],
-                client=client
+                client=client,
+                lease_id=resource_data["cluster_lease_id"]
             )
         elif cluster_id and not resource_data.get("is_shared_cluster", False):
             # Handle non-shared cluster cleanup (fallback clusters, etc.)
             if cluster_created_by_us:
                 try:
-                    client.clusters.delete_cluster(cluster_id)
+                    client.cluster.delete_cluster(cluster_id)
                     print(f"Worker {os.getpid()}: Deleted non-shared cluster {cluster_id}")
                 except Exception as e:
                     print(f"Warning: Could not delete non-shared cluster {cluster_id}: {e}")
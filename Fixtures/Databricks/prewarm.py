@@ -0,0 +1,70 @@
+"""
+Pre-warming of the Databricks clusters used by the selected tests.
+
+A cold cluster takes several minutes to start, and without pre-warming the first Databricks test
+of a session waits for it in front of everything else. Once collection has finished (after -k/-m
+deselection) and shows which Databricks tests were selected, their cluster configs are resolved the same way databricks_resource does and
+each cluster is started (or restarted, or attached to DATABRICKS_INSTANCE_POOL_ID) in the
+background. Every xdist worker collects the same tests; the cluster cache makes them agree on one
+cluster per config, and the tests' get_or_create_cluster calls wait for it to finish starting.
+
+Set DATABRICKS_PREWARM=false to disable.
+"""
+
+import importlib
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from Environment.Databricks import get_cluster_config_hash, prewarm_cluster
+from .databricks_resources import create_databricks_client
+
+
+def prewarm_enabled() -> bool:
+    """Pre-warming is on unless DATABRICKS_PREWARM is set to a false value"""
+    return os.getenv("DATABRICKS_PREWARM", "true").lower() not in ("0", "false", "no", "off")
+
+
+def _cluster_config(item) -> Optional[Dict[str, Any]]:
+    """The cluster config a collected test will ask get_or_create_cluster for, if it can be resolved"""
+    callspec = getattr(item, "callspec", None)
+    template = (callspec.params.get("databricks_resource") if callspec else None) or {}
+    config = template.get("databricks_config")
+    if not config:
+        test_dir = os.path.basename(os.path.dirname(str(item.fspath)))
+        try:
+            config = importlib.import_module(f"Tests.{test_dir}.Test_Configs").Configs["services"]["databricks"]
+        except (ImportError, KeyError, EnvironmentError):
+            return None
+    if "cluster_config" in template:
+        config = {**config, **template["cluster_config"]}
+    if not config.get("host") or not config.get("token"):
+        return None
+    return config
+
+
+def prewarm_selected_clusters(items: List[Any]) -> List[threading.Thread]:
+    """
+    Start the clusters of the selected Databricks tests in the background.
+
+    :param items: The selected test items (session.items once collection has finished).
+    :return: The pre-warm threads started, one per distinct cluster config.
+    :rtype: List[threading.Thread]
+    """
+    if not prewarm_enabled():
+        return []
+
+    configs = {}
+    for item in items:
+        if item.get_closest_marker("databricks") is None and "databricks_resource" not in item.fixturenames:
+            continue
+        config = _cluster_config(item)
+        if config:
+            configs.setdefault(get_cluster_config_hash(config), config)
+
+    threads = []
+    for config_hash, config in configs.items():
+        print(f"Worker {os.getpid()}: Pre-warming Databricks cluster for config {config_hash[:8]}...")
+        client_info = create_databricks_client(config=config)
+        threads.append(prewarm_cluster(client_info["client"], config))
+    return threads
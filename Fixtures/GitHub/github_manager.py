@@ -2,12 +2,20 @@
 This module provides a class for managing GitHub operations.
 """
 
+import json
 import os
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import github
-import time
-from github import Github, Repository
+from github import Github, InputGitTreeElement, Repository
+
+from Environment.polling import PollTimeout, poll
+
+from .secret_sync import sync_secrets
+
+# Maps a file path to its new content, or to None to delete the file
+TreeChanges = Dict[str, Optional[str]]
 
 
 class GitHubManager:
@@ -31,6 +39,11 @@ class GitHubManager:
         self.build_info = "./build-info.properties"
         self.create_branch = create_branch
         self.branch_name = test_name
+        # (path, parameters) -> (etag, data) of the last response, for conditional requests
+        self._etag_cache: Dict[Tuple[str, Tuple], Tuple[str, Any]] = {}
+        self.request_stats = {"requests": 0, "not_modified": 0}
+        # When find_and_merge_pr last merged a PR, so action checks ignore runs of earlier merges
+        self.last_merged_at: Optional[datetime] = None
         if create_branch:
             self.branch_name = self.create_test_branch(
                 test_name=test_name,
@@ -90,26 +103,88 @@ class GitHubManager:
             return f"{parts[-2]}/{parts[-1]}"
         return repo_url
 
-    def _iterate_directory_and_files(self, folder_name: str, keep_file_names: list[str]) -> None:
-        for keep_file_name in keep_file_names:
+    def commit_tree_changes(
+            self,
+            changes: Union[TreeChanges, Callable[[List[str]], TreeChanges]],
+            message: str,
+            branch: str = "main",
+            max_retries: int = 3,
+    ) -> Optional[str]:
+        """
+        Add, update and delete any number of files in a single commit using the Git Data API
+        (create tree -> create commit -> update ref), instead of one contents API commit per file.
+
+        If the branch moves between reading it and updating the ref, the commit is rebuilt on the
+        new head. Pass a function instead of a dict to compute the changes from the file paths of
+        the head commit; it is called again on every retry.
+
+        :param changes: Mapping of file path to new content (None deletes the file), or a function
+            returning it given the list of file paths on the branch
+        :param str message: Commit message
+        :param str branch: Branch to commit to, defaults to "main"
+        :param int max_retries: Number of times to rebuild the commit if the branch moved, defaults to 3
+        :return: SHA of the new commit, or None if there was nothing to change
+        :rtype: Optional[str]
+        """
+        for attempt in range(max_retries + 1):
+            ref = self.repo.get_git_ref(f"heads/{branch}")
+            head_commit = self.repo.get_git_commit(ref.object.sha)
+
+            tree_changes = changes
+            if callable(changes):
+                head_tree = self.repo.get_git_tree(head_commit.tree.sha, recursive=True)
+                tree_changes = changes([element.path for element in head_tree.tree if element.type == "blob"])
+            if not tree_changes:
+                print(f"No changes to commit on {branch}")
+                return None
+
+            elements = [
+                InputGitTreeElement(path=path, mode="100644", type="blob", content=content)
+                if content is not None
+                else InputGitTreeElement(path=path, mode="100644", type="blob", sha=None)
+                for path, content in tree_changes.items()
+            ]
+            tree = self.repo.create_git_tree(elements, base_tree=head_commit.tree)
+            commit = self.repo.create_git_commit(message, tree, [head_commit])
             try:
-                self.repo.get_contents(f"{folder_name}/{keep_file_name}")
-                print(f"{folder_name}/{keep_file_name} already exists")
+                # Fast-forward only, so a concurrent commit is never overwritten
+                ref.edit(commit.sha)
             except github.GithubException as e:
-                if e.status == 404:
-                    self.repo.create_file(
-                        path=f"{folder_name}/{keep_file_name}",
-                        message=f"Add {keep_file_name} to {folder_name} folder",
-                        content="",
-                        branch="main",
-                    )
-                    print(f"Created {folder_name}/{keep_file_name}")
-                else:
-                    raise e
-    
+                if e.status != 422 or attempt >= max_retries:
+                    raise
+                print(f"Branch {branch} moved while committing, retrying... ({attempt + 1} of {max_retries})")
+                continue
+            print(f"✓ Committed {len(tree_changes)} file changes to {branch}: {message}")
+            return commit.sha
+
+    @staticmethod
+    def _folder_reset_changes(folder_name: str, keep_file_names: List[str]) -> Callable[[List[str]], TreeChanges]:
+        """
+        Build the changes that leave only keep_file_names in a folder, creating them empty if missing.
+
+        :param str folder_name: Name of the folder to reset
+        :param List[str] keep_file_names: Names of the entries to keep in the folder
+        :return: A function computing the changes from the file paths on the branch
+        :rtype: Callable[[List[str]], TreeChanges]
+        """
+        prefix = f"{folder_name.strip('/')}/"
+
+        def build_changes(paths: List[str]) -> TreeChanges:
+            changes: TreeChanges = {
+                path: None
+                for path in paths
+                if path.startswith(prefix) and path[len(prefix):].split("/")[0] not in keep_file_names
+            }
+            for keep_file_name in keep_file_names:
+                if f"{prefix}{keep_file_name}" not in paths:
+                    changes[f"{prefix}{keep_file_name}"] = ""
+            return changes
+
+        return build_changes
+
     def clear_folder(self, folder_name: str, keep_file_names: Optional[list[str]] = None) -> None:
         """
-        Clear the folder and ensure .gitkeep exists and nothing else.
+        Clear the folder and ensure .gitkeep exists and nothing else, in a single commit.
 
         :param str folder_name: Name of the folder to setup
         :param Optional[list[str]] keep_file_names: List of file names to keep in the folder, defaults to [".gitkeep"]
@@ -117,29 +192,10 @@ class GitHubManager:
         """
         if keep_file_names is None:
             keep_file_names = [".gitkeep"]
-        try:
-            # Clear folder contents except .gitkeep
-            folder_contents = self.repo.get_contents(folder_name)
-            for content in folder_contents:
-                if content.name not in keep_file_names:
-                    self.repo.delete_file(
-                        path=content.path,
-                        message=f"Clear {folder_name} folder",
-                        sha=content.sha,
-                        branch="main",
-                    )
-                    print(f"Deleted file: {content.path}")
-            self._iterate_directory_and_files(folder_name, keep_file_names)
-
-        except github.GithubException as e:
-            if e.status == 404:
-                # Folder doesn't exist, create it with .gitkeep
-                print(f"Folder '{folder_name}' doesn't exist, creating it...")
-                self._iterate_directory_and_files(folder_name, keep_file_names)
-            elif "sha" not in str(e):  # If error is not about folder already existing
-                raise e
-            else:
-                print(f"{folder_name} folder setup completed with warning: {e}")
+        self.commit_tree_changes(
+            self._folder_reset_changes(folder_name, keep_file_names),
+            message=f"Clear {folder_name} folder",
+        )
     
     def verify_branch_exists(self, branch_name: str, test_step: Dict[str, str]) -> Tuple[bool, Dict[str, str]]:
         """
@@ -171,6 +227,79 @@ class GitHubManager:
             print(f"✗ Branch '{branch_name}' was not created.")
         return branch_exists, test_step
     
+    def _conditional_get(self, path: str, parameters: Dict[str, Any]) -> Any:
+        """
+        GET a repository endpoint with If-None-Match, returning the cached data on 304 Not Modified.
+        Conditional requests answered with 304 don't count against the rate limit.
+
+        :param str path: Path below the repository URL (e.g. "/pulls")
+        :param Dict[str, Any] parameters: Query parameters
+        :return: The decoded JSON response
+        :rtype: Any
+        """
+        key = (path, tuple(sorted(parameters.items())))
+        cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        status, response_headers, output = self.github_client.requester.requestJson(
+            "GET", f"{self.repo.url}{path}", parameters=parameters, headers=headers
+        )
+        self.request_stats["requests"] += 1
+        if status == 304 and cached:
+            self.request_stats["not_modified"] += 1
+            return cached[1]
+        data = json.loads(output) if output else None
+        if status >= 400:
+            raise github.GithubException(status, data, response_headers)
+        if response_headers.get("etag"):
+            self._etag_cache[key] = (response_headers["etag"], data)
+        return data
+
+    def wait_for_pull_request(
+            self,
+            pr_title: str,
+            head_branch: Optional[str] = None,
+            base_branch: Optional[str] = None,
+            timeout: float = 60,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Wait for an open PR with the given title, polling with conditional requests and backoff.
+
+        :param str pr_title: Title of the PR to find
+        :param str head_branch: Only consider PRs from this branch (filtered by the API), optional
+        :param str base_branch: Only consider PRs into this branch (filtered by the API), optional
+        :param float timeout: Seconds to wait for the PR, defaults to 60
+        :return: The PR as returned by the API, or None if it wasn't found in time
+        :rtype: Optional[Dict[str, Any]]
+        """
+        parameters = {"state": "open", "sort": "created", "direction": "desc", "per_page": 100}
+        if head_branch:
+            parameters["head"] = f"{self.repo.owner.login}:{head_branch}"
+        if base_branch:
+            parameters["base"] = base_branch
+
+        def find_pr() -> Optional[Dict[str, Any]]:
+            pulls = self._conditional_get("/pulls", parameters)
+            return next((pr for pr in pulls if pr["title"] == pr_title), None)
+
+        print(f"Searching for PR with title: '{pr_title}'")
+        try:
+            return poll(
+                find_pr,
+                timeout=timeout,
+                initial_interval=2,
+                max_interval=15,
+                retry_on=(github.GithubException,),
+                description=f"PR '{pr_title}'",
+            )
+        except PollTimeout as e:
+            print(f"✗ {e}")
+            return None
+        finally:
+            print(
+                f"PR search used {self.request_stats['requests']} requests so far, "
+                f"{self.request_stats['not_modified']} not modified"
+            )
+
     def find_and_merge_pr(
             self,
             pr_title: str,
@@ -179,6 +308,8 @@ class GitHubManager:
             merge_method: str = "squash",
             build_info: Optional[Dict[str, str]] = None,
             max_retries: Optional[int] = 10,
+            head_branch: Optional[str] = None,
+            base_branch: Optional[str] = None,
     ) -> Tuple[bool, Dict[str, str]]:
         """
         Find a PR by title and merge it, updating test steps.
@@ -188,41 +319,25 @@ class GitHubManager:
         :param str commit_title: Custom commit title for merge (optional)
         :param str merge_method: Merge method ('squash', 'merge', 'rebase')
         :param Dict[str, str] build_info: Build info dictionary to update (optional)
-        :param int max_retries: Maximum number of retries to find the PR, defaults to 10
+        :param int max_retries: Bounds the wait for the PR to about 5 seconds per retry, defaults to 10
+        :param str head_branch: Branch the PR is opened from, narrows the search (optional)
+        :param str base_branch: Branch the PR is opened into, narrows the search (optional)
         :return: True if PR was found and merged, False otherwise, and the updated test step
         :rtype: Tuple[bool, Dict[str, str]]
         """
-        pulls = self.repo.get_pulls(state="open")
-        target_pr = None
-        
-        print(f"Searching for PR with title: '{pr_title}'")
-        print(f"Found {pulls.totalCount} open PRs:")
-        for pr in pulls:
-            print(f"  - PR: '{pr.title}' (branch: {pr.head.ref})")
-            if pr.title == pr_title:
-                target_pr = pr
-                test_step["status"] = "passed"
-                test_step["Result_Message"] = f"PR '{pr_title}' was created successfully"
-                print(f"✓ Found PR: {pr_title}")
-                break
-        
-        if not target_pr and max_retries > 0:
-            print(f"✗ PR '{pr_title}' not found, retrying... ({max_retries} retries left)")
-            time.sleep(5)
-            # Return the result of the recursive retry so the caller gets the correct status
-            return self.find_and_merge_pr(
-                pr_title=pr_title,
-                test_step=test_step,
-                commit_title=commit_title,
-                merge_method=merge_method,
-                build_info=build_info,
-                max_retries=max_retries - 1,
-            )
-        elif not target_pr and max_retries <= 0:
+        found_pr = self.wait_for_pull_request(
+            pr_title, head_branch=head_branch, base_branch=base_branch, timeout=5 * max(max_retries, 1)
+        )
+        if not found_pr:
             test_step["status"] = "failed"
             test_step["Result_Message"] = f"PR '{pr_title}' not found"
             print(f"✗ PR '{pr_title}' not found")
             return False, test_step
+
+        target_pr = self.repo.get_pull(found_pr["number"])
+        test_step["status"] = "passed"
+        test_step["Result_Message"] = f"PR '{pr_title}' was created successfully"
+        print(f"✓ Found PR: {pr_title} (branch: {target_pr.head.ref})")
         
         # Merge the PR
         try:
@@ -238,6 +353,8 @@ class GitHubManager:
             if not merge_result.merged:
                 raise Exception(f"Failed to merge PR: {merge_result.message}")
             
+            # GitHub's own merge time, so runs are compared without local clock skew
+            self.last_merged_at = self.repo.get_pull(target_pr.number).merged_at
             print(f"✓ Successfully merged PR: {pr_title}")
             return True, test_step
             
@@ -286,27 +403,14 @@ class GitHubManager:
 
     def check_and_update_gh_secrets(self, secrets: Dict[str, str]) -> None:
         """
-        Checks if the GitHub secrets exists, deletes them if they do, and creates new ones with the given
-            key value pairs.
+        Makes the GitHub secrets hold the given key value pairs, writing only the ones that changed
+            (see Fixtures.GitHub.secret_sync).
 
         :param Dict[str, str] secrets: Dictionary of secrets to update
         :rtype: None
         """
         try:
-            for secret, value in secrets.items():
-                try:
-                    if self.repo.get_secret(secret):
-                        print(f"Worker {os.getpid()}: {secret} already exists, deleting...")
-                        self.repo.delete_secret(secret)
-                    print(f"Worker {os.getpid()}: Creating {secret}...")
-                except github.GithubException as e:
-                    if e.status == 404:
-                        print(f"Worker {os.getpid()}: {secret} does not exist, creating...")
-                    else:
-                        print(f"Worker {os.getpid()}: Error checking secret {secret}: {e}")
-                        raise e
-                self.repo.create_secret(secret, value)
-                print(f"Worker {os.getpid()}: {secret} created successfully.")
+            sync_secrets(self.repo, secrets)
         except Exception as e:
             print(f"Worker {os.getpid()}: Error checking and updating GitHub secrets: {e}")
             raise e from e
@@ -324,86 +428,105 @@ class GitHubManager:
         except Exception as e:
             print(f"Branch '{branch_name}' might not exist or other error: {e}")
     
-    def reset_repo_state(self, folder_name: str, keep_file_names: Optional[List[str]] = None) -> None:
+    def reset_repo_state(
+            self,
+            folder_name: str,
+            keep_file_names: Optional[List[str]] = None,
+            extra_changes: Optional[TreeChanges] = None,
+    ) -> None:
         """
-        Reset the repository to a clean state by clearing a folder.
+        Reset the repository to a clean state by clearing a folder in a single commit.
         This is typically called during cleanup.
 
         :param str folder_name: Name of the folder to clear
         :param List[str] keep_file_names: List of file names to keep in the folder, defaults to [".gitkeep"]
+        :param TreeChanges extra_changes: Other file changes to make in the same commit, e.g.
+            {"Requirements/requirements.txt": ""} to blank the requirements, optional
         :rtype: None
         """
-        # TODO: may need to use a commit to reset the repo state rather than just deleting/recreating files
         if keep_file_names is None:
             keep_file_names = [".gitkeep"]
+        folder_changes = self._folder_reset_changes(folder_name, keep_file_names)
+
+        def build_changes(paths: List[str]) -> TreeChanges:
+            return {**folder_changes(paths), **(extra_changes or {})}
 
         try:
-            folder_contents = self.repo.get_contents(folder_name)
-            for content in folder_contents:
-                if content.name not in keep_file_names:
-                    self.repo.delete_file(
-                        path=content.path,
-                        message=f"Clear {folder_name} folder",
-                        sha=content.sha,
-                        branch="main",
-                    )
-            
-            self._iterate_directory_and_files(folder_name, keep_file_names)
+            self.commit_tree_changes(build_changes, message=f"Clear {folder_name} folder")
             print(f"✓ {folder_name} folder reset successfully")
             
         except Exception as e:
             print(f"Error resetting repository state: {e}")
     
-    def check_if_action_is_complete(self, pr_title: str, wait_before_checking: Optional[int] = 60, max_retries: Optional[int] = 10, branch_name: Optional[str] = None) -> bool:
+    def check_if_action_is_complete(
+            self,
+            pr_title: str,
+            wait_before_checking: Optional[int] = 60,
+            max_retries: Optional[int] = 10,
+            branch_name: Optional[str] = None,
+            event: Optional[str] = None,
+            created_after: Optional[datetime] = None,
+    ) -> bool:
         """
-        Check if an action is complete.
+        Wait for the workflow run of a PR to complete, polling with conditional requests and backoff.
+        The runs are filtered by branch (and event) on the API side.
         
         :param str pr_title: Title of the PR to check the action for
-        :param int wait_before_checking: Time to wait before checking if the action is complete, defaults to 60 seconds
-        :param int max_retries: Maximum number of retries, defaults to 10
+        :param int wait_before_checking: Added to the wait budget, defaults to 60 seconds
+        :param int max_retries: Adds a minute each to the wait budget, defaults to 10
         :param str branch_name: Name of the branch to check
+        :param str event: Only consider runs triggered by this event (e.g. "push"), optional
+        :param datetime created_after: Only consider runs created at or after this time, defaults to the
+            time of the last merge by find_and_merge_pr, so a completed run of an earlier session with the
+            same PR title isn't mistaken for this one
         :return: True if action is complete, False otherwise
         """
-        import time
-        print(f"Waiting {wait_before_checking} seconds before checking if action is complete...")
-        time.sleep(wait_before_checking)
-        print(f"Checking if action is complete...")
         if not branch_name:
             branch_name = self.branch_name
-        for retry in range(max_retries):
-            workflow_runs = self.repo.get_workflow_runs(branch=branch_name)  # type: ignore
-            if workflow_runs.totalCount > 0:
-                if filtered_runs := [run for run in workflow_runs if run.display_title.lower() == pr_title.lower()]:
-                    # check the first run in the list
-                    if filtered_runs[0].status == "completed":
-                        print(f"✓ Action is complete")
-                        return True
-                print(f"✗ Action is not complete")
-            print(f"Waiting 60 seconds before checking again...{retry + 1} of {max_retries}")
-            time.sleep(60)
-        print(f"✗ Action is not complete after {max_retries} retries")
-        return False
-    
-    def cleanup_requirements(self, requirements_path: str = "Requirements/") -> None:
-        """
-        Reset requirements.txt to blank.
-        
-        :param str requirements_path: Path to requirements folder
-        :rtype: None
-        """
-        #TODO: this can be removed once we reset the repo using a commit
+        created_after = created_after or self.last_merged_at
+        parameters = {"branch": branch_name, "per_page": 20}
+        if event:
+            parameters["event"] = event
+        created_since = None
+        if created_after:
+            if created_after.tzinfo is None:
+                created_after = created_after.replace(tzinfo=timezone.utc)
+            created_since = created_after.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            parameters["created"] = f">={created_since}"
+
+        def latest_run() -> Optional[Dict[str, Any]]:
+            runs = self._conditional_get("/actions/runs", parameters)["workflow_runs"]
+            # Runs are returned newest first
+            return next(
+                (
+                    run for run in runs
+                    if run["display_title"].lower() == pr_title.lower()
+                    and (created_since is None or run["created_at"] >= created_since)
+                ),
+                None,
+            )
+
+        print(f"Checking if action is complete...")
         try:
-            requirements_file = self.repo.get_contents(os.path.join(requirements_path, "requirements.txt"))
-            self.repo.update_file(
-                path=requirements_file.path,
-                message="Reset requirements.txt to blank",
-                content="",
-                sha=requirements_file.sha,
-                branch="main",
+            run = poll(
+                latest_run,
+                is_done=lambda run: run is not None and run["status"] == "completed",
+                timeout=wait_before_checking + 60 * max_retries,
+                initial_interval=5,
+                max_interval=30,
+                retry_on=(github.GithubException,),
+                description=f"action of '{pr_title}' on {branch_name}",
             )
-            print("✓ Requirements.txt reset successfully")
-        except Exception as e:
-            print(f"Error cleaning up requirements: {e}")
+        except PollTimeout as e:
+            print(f"✗ Action is not complete: {e}")
+            return False
+        finally:
+            print(
+                f"Action check used {self.request_stats['requests']} requests so far, "
+                f"{self.request_stats['not_modified']} not modified"
+            )
+        print(f"✓ Action is complete ({run['conclusion']})")
+        return True
     
     def get_repo_info(self) -> Dict[str, str]:
         """
@@ -9,23 +9,22 @@ import time
 import pytest
 
 from .github_manager import GitHubManager
+from .repo_pool import get_repo_pool, lease_repo, release_repo
 
 
 @pytest.fixture(scope="function")
 def github_resource(request):
     """
     A function-scoped fixture that provides a GitHub manager for test operations.
-    Each test gets its own GitHub manager instance.
+    Each test gets its own GitHub manager instance, on a repository leased from AIRFLOW_REPO_POOL
+    if it is set.
     """
     raw_test_name = request.node.name
     # Sanitize test name to remove pytest parametrization brackets  
     test_name = re.sub(r'[^\w\-]', '_', raw_test_name)
     resource_id = f"github_resource_{test_name}"
     # Verify required environment variables
-    required_envars = [
-        "AIRFLOW_GITHUB_TOKEN",
-        "AIRFLOW_REPO",
-    ]
+    required_envars = ["AIRFLOW_GITHUB_TOKEN"] + ([] if get_repo_pool() else ["AIRFLOW_REPO"])
 
     if missing_envars := [envar for envar in required_envars if not os.getenv(envar)]:
         raise ValueError(f"The following envars are not set: {missing_envars}")
@@ -35,10 +34,14 @@ def github_resource(request):
     
     # Create GitHub manager
     access_token = os.getenv("AIRFLOW_GITHUB_TOKEN")
-    repo_url = os.getenv("AIRFLOW_REPO")
-    
-    github_manager = GitHubManager(access_token, repo_url, test_name)
-    
+    repo_url = lease_repo()
+
+    try:
+        github_manager = GitHubManager(access_token, repo_url, test_name)
+    except Exception:
+        release_repo()
+        raise
+
     try:
         # Clear the main dags folder
         try:
@@ -75,7 +78,10 @@ def github_resource(request):
         raise e from e
     finally:
         print(f"Worker {os.getpid()}: Cleaning up GitHub resource {resource_id}")
-        cleanup_github_resource(github_manager)
+        try:
+            cleanup_github_resource(github_manager)
+        finally:
+            release_repo()
 
 
 def cleanup_github_resource(
@@ -89,6 +95,6 @@ def cleanup_github_resource(
     :param created_resources: The list of created resources.
     :param test_dir: The path to the test directory.
     """
-    github_manager.reset_repo_state("dags")
-    github_manager.cleanup_requirements()
+    # Clear the DAGs and blank the requirements in one commit
+    github_manager.reset_repo_state("dags", extra_changes={"Requirements/requirements.txt": ""})
     github_manager.delete_branch(github_manager.branch_name)
\ No newline at end of file
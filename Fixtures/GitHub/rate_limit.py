@@ -0,0 +1,238 @@
+"""
+Cross-process GitHub API budget shared by pytest-xdist workers.
+
+Every request made by a PyGithub client goes through a token bucket persisted in .tmp, so all
+workers together stay under GitHub's secondary rate limit (points per minute, where a write
+costs 5 points and a read 1). The X-RateLimit-Remaining/Reset headers and Retry-After of each
+response are written back to the shared state, so when one worker sees the primary limit run
+low or gets rate limited, every worker pauses until the reset instead of collecting 403s.
+
+API spend is recorded per test (from PYTEST_CURRENT_TEST) and can be reported at session end.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+from filelock import FileLock
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+
+TMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".tmp")
+BUDGET_DB = os.path.join(TMP_DIR, "github_rate_limit.db")
+BUDGET_LOCK = os.path.join(TMP_DIR, "github_rate_limit.lock")
+
+# Points per second refilled into the bucket; GitHub allows 900 points per minute for REST calls
+DEFAULT_POINTS_PER_SECOND = 10.0
+DEFAULT_BURST = 30.0
+# Pause every worker once fewer requests than this remain in the primary rate limit window
+DEFAULT_RESERVE = 50
+# Pause after a secondary rate limit response without Retry-After, as GitHub recommends
+SECONDARY_LIMIT_PAUSE = 60
+
+WRITE_VERBS = ("POST", "PATCH", "PUT", "DELETE")
+WRITE_COST = 5
+READ_COST = 1
+
+_budget: Optional["RateLimitBudget"] = None
+_sessions: Dict[tuple, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _current_test() -> str:
+    """Node ID of the running test, or "session" outside of a test"""
+    return os.environ.get("PYTEST_CURRENT_TEST", "session").split(" ")[0]
+
+
+class RateLimitBudget:
+    """
+    Token bucket for GitHub API points, shared across processes through SQLite and a FileLock.
+
+    :param points_per_second: Refill rate of the bucket, defaults to GITHUB_RATE_LIMIT_POINTS_PER_SECOND or 10.
+    :param burst: Bucket capacity, defaults to GITHUB_RATE_LIMIT_BURST or 30.
+    :param reserve: Remaining primary rate limit at which all workers pause until the reset.
+    """
+
+    def __init__(self, points_per_second: Optional[float] = None, burst: Optional[float] = None,
+                 reserve: int = DEFAULT_RESERVE):
+        self.points_per_second = points_per_second or float(
+            os.getenv("GITHUB_RATE_LIMIT_POINTS_PER_SECOND", DEFAULT_POINTS_PER_SECOND)
+        )
+        self.burst = burst or float(os.getenv("GITHUB_RATE_LIMIT_BURST", DEFAULT_BURST))
+        self.reserve = reserve
+        self._initialized = False
+
+    def _lock(self) -> FileLock:
+        os.makedirs(TMP_DIR, exist_ok=True)
+        return FileLock(BUDGET_LOCK)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(BUDGET_DB, timeout=30)
+        # The budget only lives for the session, it doesn't need to survive a crash
+        conn.execute("PRAGMA synchronous = OFF")
+        if self._initialized:
+            return conn
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS budget (id INTEGER PRIMARY KEY CHECK (id = 0), tokens REAL, "
+            "updated_time REAL, remaining INTEGER, reset_time REAL, paused_until REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS spend (test TEXT PRIMARY KEY, requests INTEGER, points INTEGER, "
+            "waited REAL, rate_limited INTEGER)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO budget (id, tokens, updated_time, remaining, reset_time, paused_until) "
+            "VALUES (0, ?, ?, NULL, NULL, 0)",
+            (self.burst, time.time()),
+        )
+        conn.commit()
+        self._initialized = True
+        return conn
+
+    def acquire(self, cost: int) -> float:
+        """
+        Block until the bucket holds cost points and the API isn't paused, then take them.
+
+        :param cost: Points the request costs.
+        :return: Seconds spent waiting.
+        :rtype: float
+        """
+        waited = 0.0
+        while True:
+            with self._lock(), self._connect() as conn:
+                tokens, updated_time, paused_until = conn.execute(
+                    "SELECT tokens, updated_time, paused_until FROM budget WHERE id = 0"
+                ).fetchone()
+                now = time.time()
+                tokens = min(self.burst, tokens + (now - updated_time) * self.points_per_second)
+                if paused_until > now:
+                    wait = paused_until - now
+                elif tokens >= cost:
+                    conn.execute(
+                        "UPDATE budget SET tokens = ?, updated_time = ? WHERE id = 0", (tokens - cost, now)
+                    )
+                    return waited
+                else:
+                    wait = (cost - tokens) / self.points_per_second
+                conn.execute("UPDATE budget SET tokens = ?, updated_time = ? WHERE id = 0", (tokens, now))
+            time.sleep(wait)
+            waited += wait
+
+    def record(self, status: int, headers: Any, body: str, cost: int, waited: float) -> None:
+        """
+        Store the rate limit headers of a response and the spend of the current test.
+
+        :param status: HTTP status of the response.
+        :param headers: Response headers (case-insensitive mapping).
+        :param body: Response body, checked for the secondary rate limit message on 403.
+        :param cost: Points the request cost.
+        :param waited: Seconds the request waited for the budget.
+        """
+        now = time.time()
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_time = headers.get("X-RateLimit-Reset")
+        retry_after = headers.get("Retry-After")
+
+        paused_until = 0.0
+        rate_limited = status in (403, 429) and (
+            retry_after is not None or remaining == "0" or "rate limit" in (body or "").lower()
+        )
+        if retry_after is not None:
+            paused_until = now + float(retry_after)
+        elif remaining is not None and reset_time is not None and int(remaining) <= self.reserve:
+            paused_until = float(reset_time)
+        elif rate_limited:
+            paused_until = now + SECONDARY_LIMIT_PAUSE
+
+        with self._lock(), self._connect() as conn:
+            if remaining is not None:
+                conn.execute(
+                    "UPDATE budget SET remaining = ?, reset_time = ? WHERE id = 0",
+                    (int(remaining), float(reset_time) if reset_time else None),
+                )
+            if paused_until > now:
+                conn.execute(
+                    "UPDATE budget SET paused_until = MAX(paused_until, ?) WHERE id = 0", (paused_until,)
+                )
+            conn.execute(
+                "INSERT INTO spend (test, requests, points, waited, rate_limited) VALUES (?, 1, ?, ?, ?) "
+                "ON CONFLICT(test) DO UPDATE SET requests = requests + 1, points = points + excluded.points, "
+                "waited = waited + excluded.waited, rate_limited = rate_limited + excluded.rate_limited",
+                (_current_test(), cost, waited, int(rate_limited)),
+            )
+        if paused_until > now:
+            print(
+                f"Worker {os.getpid()}: GitHub rate limit low (status {status}, remaining {remaining}), "
+                f"pausing GitHub calls for {paused_until - now:.0f}s"
+            )
+
+    def get_spend(self) -> List[Dict[str, Any]]:
+        """
+        API spend per test, most expensive first.
+
+        :return: Dicts with test, requests, points, waited and rate_limited.
+        :rtype: List[Dict[str, Any]]
+        """
+        if not os.path.exists(BUDGET_DB):
+            return []
+        with self._lock(), self._connect() as conn:
+            rows = conn.execute(
+                "SELECT test, requests, points, waited, rate_limited FROM spend ORDER BY points DESC"
+            ).fetchall()
+        return [
+            {"test": test, "requests": requests_made, "points": points, "waited": waited, "rate_limited": rate_limited}
+            for test, requests_made, points, waited, rate_limited in rows
+        ]
+
+
+def get_budget() -> RateLimitBudget:
+    """The budget of this process, created on first use"""
+    global _budget
+    if _budget is None:
+        _budget = RateLimitBudget()
+    return _budget
+
+
+class _BudgetedConnectionMixin:
+    """Routes a PyGithub connection through the budget and shares one keep-alive session per host"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # PyGithub doesn't keep connections around while custom connection classes are injected
+        with _sessions_lock:
+            shared_session = _sessions.setdefault((self.protocol, self.host, self.port), self.session)
+        if shared_session is not self.session:
+            self.session.close()
+            self.session = shared_session
+
+    def getresponse(self):
+        cost = WRITE_COST if self.verb.upper() in WRITE_VERBS else READ_COST
+        budget = get_budget()
+        waited = budget.acquire(cost)
+        response = super().getresponse()
+        budget.record(response.status, response.headers, response.text if response.status == 403 else "", cost, waited)
+        return response
+
+    def close(self) -> None:
+        # The session is shared with the other connections to the host
+        pass
+
+
+class BudgetedHTTPConnection(_BudgetedConnectionMixin, HTTPRequestsConnectionClass):
+    pass
+
+
+class BudgetedHTTPSConnection(_BudgetedConnectionMixin, HTTPSRequestsConnectionClass):
+    pass
+
+
+def install_rate_limiter() -> None:
+    """Make every PyGithub client in this process use the shared budget"""
+    Requester.injectConnectionClasses(BudgetedHTTPConnection, BudgetedHTTPSConnection)
+
+
+def get_api_spend() -> List[Dict[str, Any]]:
+    """API spend per test recorded by all workers, most expensive first"""
+    return get_budget().get_spend()
@@ -0,0 +1,114 @@
+"""
+Pool of Airflow GitHub repositories leased to one test at a time.
+
+All Airflow tests push DAGs to the dags/ folder on main of AIRFLOW_REPO, so two tests running
+at once would clear each other's DAGs. When AIRFLOW_REPO_POOL lists several repositories created
+from the same template (each with its own deploy action and secrets), every test leases one of
+them under a FileLock in .tmp and sees it as AIRFLOW_REPO for its duration, so Airflow tests on
+different xdist workers run concurrently without sharing a DAG folder. Test_Configs are imported
+before any lease exists, so tests hand the leased URL (airflow_resource["repo_url"]) to the agent.
+
+Without AIRFLOW_REPO_POOL every test uses AIRFLOW_REPO, as before.
+"""
+
+import os
+import threading
+import time
+from typing import List, Optional
+
+from filelock import FileLock, Timeout
+
+TMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".tmp")
+
+DEFAULT_LEASE_TIMEOUT = 60 * 60
+LEASE_POLL_INTERVAL = 10
+
+
+def get_repo_pool() -> List[str]:
+    """Repository URLs listed in AIRFLOW_REPO_POOL (comma or whitespace separated)"""
+    return [url for url in os.getenv("AIRFLOW_REPO_POOL", "").replace(",", " ").split() if url]
+
+
+class _RepoLease:
+    """The repository leased by this process; fixtures of the same test share it through a refcount"""
+
+    def __init__(self):
+        self.lock: Optional[FileLock] = None
+        self.repo_url: Optional[str] = None
+        self.previous_repo_url: Optional[str] = None
+        self.refcount = 0
+        self.guard = threading.Lock()
+
+
+_lease = _RepoLease()
+
+
+def _lock_path(repo_url: str) -> str:
+    return os.path.join(TMP_DIR, f"airflow_repo_{repo_url.rstrip('/').split('/')[-1]}.lock")
+
+
+def lease_repo(timeout: float = DEFAULT_LEASE_TIMEOUT) -> str:
+    """
+    Lease an Airflow repository for the current test and expose it as AIRFLOW_REPO.
+
+    Calls from several fixtures of the same test return the same repository; each call must be
+    matched by release_repo. Workers start at different pool entries to avoid contending for the
+    first one.
+
+    :param timeout: Seconds to wait for a repository to be released.
+    :return: The leased repository URL.
+    :rtype: str
+    :raises TimeoutError: If no repository was released within timeout.
+    """
+    with _lease.guard:
+        if _lease.refcount:
+            _lease.refcount += 1
+            return _lease.repo_url
+
+        pool = get_repo_pool()
+        if not pool:
+            _lease.repo_url = os.getenv("AIRFLOW_REPO")
+            _lease.refcount = 1
+            return _lease.repo_url
+
+        os.makedirs(TMP_DIR, exist_ok=True)
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+        offset = int(worker[2:]) if worker[2:].isdigit() else 0
+        ordered_pool = pool[offset % len(pool):] + pool[:offset % len(pool)]
+
+        deadline = time.time() + timeout
+        while True:
+            for repo_url in ordered_pool:
+                lock = FileLock(_lock_path(repo_url))
+                try:
+                    lock.acquire(timeout=0)
+                except Timeout:
+                    continue
+                _lease.lock = lock
+                _lease.repo_url = repo_url
+                _lease.previous_repo_url = os.environ.get("AIRFLOW_REPO")
+                _lease.refcount = 1
+                os.environ["AIRFLOW_REPO"] = repo_url
+                print(f"Worker {os.getpid()}: Leased Airflow repository {repo_url}")
+                return repo_url
+            if time.time() >= deadline:
+                raise TimeoutError(f"No Airflow repository of AIRFLOW_REPO_POOL was released within {timeout}s")
+            time.sleep(LEASE_POLL_INTERVAL)
+
+
+def release_repo() -> None:
+    """Release one lease taken by lease_repo, freeing the repository when the test no longer uses it"""
+    with _lease.guard:
+        if not _lease.refcount:
+            return
+        _lease.refcount -= 1
+        if _lease.refcount or _lease.lock is None:
+            return
+        if _lease.previous_repo_url is None:
+            os.environ.pop("AIRFLOW_REPO", None)
+        else:
+            os.environ["AIRFLOW_REPO"] = _lease.previous_repo_url
+        _lease.lock.release()
+        print(f"Worker {os.getpid()}: Released Airflow repository {_lease.repo_url}")
+        _lease.lock = None
+        _lease.repo_url = None
@@ -0,0 +1,109 @@
+"""
+Desired-state sync of GitHub Actions secrets.
+
+Secret values can't be read back, so a local cache remembers a digest of the value last written
+for each secret together with the secret's updated_at on GitHub. A secret whose digest and
+updated_at both still match is skipped; anything else is encrypted with a public key fetched
+once per sync and written with a single PUT (which creates or replaces it), concurrently.
+The cache outlives the .tmp directory so repeat runs against the same deployment write nothing.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from filelock import FileLock
+from github import Repository
+
+SECRET_CACHE_PATH = os.getenv(
+    "GITHUB_SECRET_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "de-bench", "github_secrets.json")
+)
+DEFAULT_MAX_WORKERS = 4
+
+
+def _secret_digest(repo_name: str, secret_name: str, value: str) -> str:
+    return hashlib.sha256(f"{repo_name}\0{secret_name}\0{value}".encode()).hexdigest()
+
+
+def _read_cache() -> Dict[str, Dict[str, str]]:
+    if not os.path.exists(SECRET_CACHE_PATH):
+        return {}
+    try:
+        with open(SECRET_CACHE_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_cache(entries: Dict[str, Dict[str, str]]) -> None:
+    """Merge entries into the cache file, atomically and under a lock shared with other workers"""
+    os.makedirs(os.path.dirname(SECRET_CACHE_PATH), exist_ok=True)
+    with FileLock(f"{SECRET_CACHE_PATH}.lock"):
+        cache = _read_cache()
+        cache.update(entries)
+        temp_path = f"{SECRET_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_path, SECRET_CACHE_PATH)
+
+
+def _list_secret_updates(repo: Repository) -> Dict[str, str]:
+    """Names of the repository's Actions secrets mapped to their updated_at"""
+    return {secret.name: secret.updated_at.isoformat() for secret in repo.get_secrets()}
+
+
+def sync_secrets(repo: Repository, secrets: Dict[str, str], max_workers: int = DEFAULT_MAX_WORKERS) -> List[str]:
+    """
+    Make the repository's Actions secrets hold the given values, writing only the ones that changed.
+
+    :param Repository repo: The repository to update.
+    :param Dict[str, str] secrets: Secret names mapped to their values.
+    :param int max_workers: Maximum number of secrets written concurrently.
+    :return: The names of the secrets that were written.
+    :rtype: List[str]
+    """
+    repo_name = repo.full_name
+    cache = _read_cache()
+    remote_updates = _list_secret_updates(repo)
+
+    changed = {}
+    for secret_name, value in secrets.items():
+        cached = cache.get(f"{repo_name}/{secret_name}")
+        if (
+            cached
+            and cached["digest"] == _secret_digest(repo_name, secret_name, value)
+            and cached["updated_at"] == remote_updates.get(secret_name)
+        ):
+            print(f"Worker {os.getpid()}: {secret_name} is up to date, skipping...")
+            continue
+        changed[secret_name] = value
+
+    if not changed:
+        return []
+
+    # One public key for every secret of this sync
+    public_key = repo.get_public_key()
+
+    def write_secret(secret_name: str) -> None:
+        repo.requester.requestJsonAndCheck(
+            "PUT",
+            f"{repo.url}/actions/secrets/{secret_name}",
+            input={"key_id": public_key.key_id, "encrypted_value": public_key.encrypt(changed[secret_name])},
+        )
+        print(f"Worker {os.getpid()}: {secret_name} written successfully.")
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(changed))) as executor:
+        # list() re-raises the first failed write
+        list(executor.map(write_secret, changed))
+
+    remote_updates = _list_secret_updates(repo)
+    _update_cache({
+        f"{repo_name}/{secret_name}": {
+            "digest": _secret_digest(repo_name, secret_name, value),
+            "updated_at": remote_updates.get(secret_name),
+        }
+        for secret_name, value in changed.items()
+    })
+    return list(changed)
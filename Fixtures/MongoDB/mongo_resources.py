@@ -4,6 +4,7 @@ import time
 import os
 from Configs.MongoConfig import syncMongoClient
 from pymongo.errors import CollectionInvalid
+from Environment.MongoDB import DEFAULT_BATCH_SIZE, iter_documents_from_file, seed_collection
 
 
 @pytest.fixture(scope="function")
@@ -11,6 +12,11 @@ def mongo_resource(request):
     """
     A function-scoped fixture that creates MongoDB resources based on template.
     Template structure: {"resource_id": "id", "databases": [{"name": "db", "collections": [{"name": "col", "data": []}]}]}
+    Collections may also set:
+        "data_file": "path/to/data.jsonl"  # JSONL or BSON file streamed into the collection, relative to the test file
+        "data_format": "jsonl"             # Optional: "jsonl" or "bson", inferred from the extension
+        "batch_size": 1000                 # Optional: documents per insert_many / bulk_write call
+        "upsert_key": "field"              # Optional: upsert on this field with bulk_write instead of inserting
     """
     start_time = time.time()
     test_name = request.node.name
@@ -45,11 +51,24 @@ def mongo_resource(request):
                     
                     created_resources.append({"db": db_name, "collection": collection_name})
                     
-                    # Add data if specified
-                    if "data" in collection_config:
-                        collection = db[collection_name]
-                        for record in collection_config["data"]:
-                            collection.insert_one(record)
+                    # Add data if specified, inline and/or streamed from a data file
+                    sources = []
+                    if collection_config.get("data"):
+                        sources.append(collection_config["data"])
+                    if "data_file" in collection_config:
+                        data_file = collection_config["data_file"]
+                        if not os.path.isabs(data_file):
+                            data_file = os.path.join(os.path.dirname(str(request.fspath)), data_file)
+                        sources.append(iter_documents_from_file(data_file, collection_config.get("data_format")))
+                    
+                    for documents in sources:
+                        seed_stats = seed_collection(
+                            db[collection_name],
+                            documents,
+                            batch_size=collection_config.get("batch_size", DEFAULT_BATCH_SIZE),
+                            upsert_key=collection_config.get("upsert_key"),
+                        )
+                        print(f"Worker {os.getpid()}: Inserted {seed_stats['documents']} documents into {collection_name} in {seed_stats['batches']} batches ({seed_stats['duration']:.2f}s)")
     
     creation_end = time.time()
     print(f"Worker {os.getpid()}: MongoDB resource creation took {creation_end - creation_start:.2f}s")
@@ -2,7 +2,15 @@ import pytest
 import json
 import time
 import os
+import threading
 import mysql.connector
+from Environment.MySQL import DEFAULT_SEED_METHOD, get_max_allowed_packet, seed_table
+from Environment.provisioning import (
+    DEFAULT_MAX_WORKERS,
+    build_task_graph,
+    format_provisioning_stats,
+    run_task_graph,
+)
 
 
 @pytest.fixture(scope="function")
@@ -11,6 +19,8 @@ def mysql_resource(request):
     A function-scoped fixture that creates MySQL resources based on template.
     Template structure: {
         "resource_id": "id", 
+        "parallel_provisioning": False,  # Optional: create databases and tables concurrently (FK order is kept)
+        "max_workers": 4,  # Optional: thread pool size for parallel provisioning
         "databases": [
             {
                 "name": "db_name", 
@@ -20,7 +30,8 @@ def mysql_resource(request):
                         "columns": [
                             {"name": "col_name", "type": "VARCHAR(100)", "not_null": True, "primary_key": False, "unique": False, "default": "value"}
                         ],
-                        "data": [{"col1": "val1", "col2": "val2"}]
+                        "data": [{"col1": "val1", "col2": "val2"}],
+                        "seed_method": "batch"  # Optional: "batch" (default), "infile" or "row"
                     }
                 ]
             }
@@ -39,77 +50,52 @@ def mysql_resource(request):
     
     created_resources = []
     
-    # Connect to MySQL (single connection for everything)
-    connection = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        port=os.getenv("MYSQL_PORT"),
-        user=os.getenv("MYSQL_USERNAME"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        connect_timeout=10,
+    # LOAD DATA LOCAL INFILE has to be enabled on the client connection
+    use_local_infile = any(
+        table_config.get("seed_method") == "infile"
+        for db_config in build_template.get("databases", [])
+        for table_config in db_config.get("tables", [])
     )
-    cursor = connection.cursor()
     
-    try:
-        # Process databases from template
-        if "databases" in build_template:
-            for db_config in build_template["databases"]:
-                db_name = db_config["name"]
-                
-                # Drop and create database
-                cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
-                cursor.execute(f"CREATE DATABASE {db_name}")
-                print(f"Worker {os.getpid()}: Created database {db_name}")
-                
-                created_resources.append({"type": "database", "name": db_name, "tables": []})
-                db_resource = created_resources[-1]
+    databases = build_template.get("databases", [])
+    provisioning_stats = None
+    
+    if build_template.get("parallel_provisioning", False):
+        provisioning_stats = _provision_in_parallel(
+            databases,
+            use_local_infile,
+            build_template.get("max_workers", DEFAULT_MAX_WORKERS),
+        )
+        print(f"Worker {os.getpid()}: Parallel MySQL provisioning: {format_provisioning_stats(provisioning_stats)}")
+    else:
+        # Connect to MySQL (single connection for everything)
+        connection = _connect(allow_local_infile=use_local_infile)
+        cursor = connection.cursor()
+        
+        try:
+            # Batched INSERTs are sized to fit the server's packet limit
+            max_allowed_packet = get_max_allowed_packet(cursor)
+            
+            # Process databases from template
+            for db_config in databases:
+                _create_database(cursor, db_config["name"])
                 
                 # Switch to the new database (MySQL allows this!)
-                cursor.execute(f"USE {db_name}")
+                cursor.execute(f"USE {db_config['name']}")
                 
                 # Process tables in this database
-                if "tables" in db_config:
-                    for table_config in db_config["tables"]:
-                        table_name = table_config["name"]
-                        
-                        # Generate and execute CREATE TABLE from JSON columns
-                        if "columns" in table_config:
-                            # Build CREATE TABLE SQL from column definitions
-                            column_definitions = []
-                            for col in table_config["columns"]:
-                                col_def = f"{col['name']} {col['type']}"
-                                
-                                if col.get('primary_key'):
-                                    col_def += " PRIMARY KEY"
-                                if col.get('not_null'):
-                                    col_def += " NOT NULL"
-                                if col.get('unique'):
-                                    col_def += " UNIQUE"
-                                if col.get('default'):
-                                    col_def += f" DEFAULT {col['default']}"
-                                    
-                                column_definitions.append(col_def)
-                            
-                            create_table_sql = f"CREATE TABLE {table_name} ({', '.join(column_definitions)})"
-                            cursor.execute(create_table_sql)
-                            print(f"Worker {os.getpid()}: Created table {table_name} in {db_name}")
-                            db_resource["tables"].append(table_name)
-                            
-                            # Insert data if provided
-                            if "data" in table_config and table_config["data"]:
-                                for record in table_config["data"]:
-                                    # Generate INSERT statement from record data
-                                    columns = list(record.keys())
-                                    values = list(record.values())
-                                    placeholders = ", ".join(["%s"] * len(values))
-                                    insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
-                                    cursor.execute(insert_sql, values)
-                                
-                                connection.commit()
-                                print(f"Worker {os.getpid()}: Inserted {len(table_config['data'])} records into {table_name}")
-        
-    finally:
-        cursor.close()
-        connection.close()
+                for table_config in db_config.get("tables", []):
+                    if "columns" in table_config:
+                        _create_table(cursor, db_config["name"], table_config, max_allowed_packet)
+                        connection.commit()
+            
+        finally:
+            cursor.close()
+            connection.close()
+    
+    for db_config in databases:
+        table_names = [table_config["name"] for table_config in db_config.get("tables", []) if "columns" in table_config]
+        created_resources.append({"type": "database", "name": db_config["name"], "tables": table_names})
     
     creation_end = time.time()
     print(f"Worker {os.getpid()}: MySQL resource creation took {creation_end - creation_start:.2f}s")
@@ -126,7 +112,8 @@ def mysql_resource(request):
         "creation_duration": creation_end - creation_start,
         "description": f"A MySQL resource for {test_name}",
         "status": "active",
-        "created_resources": created_resources
+        "created_resources": created_resources,
+        "provisioning_stats": provisioning_stats
     }
     
     print(f"Worker {os.getpid()}: Created MySQL resource {resource_id}")
@@ -140,13 +127,7 @@ def mysql_resource(request):
     print(f"Worker {os.getpid()}: Cleaning up MySQL resource {resource_id}")
     try:
         # Connect for cleanup
-        cleanup_connection = mysql.connector.connect(
-            host=os.getenv("MYSQL_HOST"),
-            port=os.getenv("MYSQL_PORT"),
-            user=os.getenv("MYSQL_USERNAME"),
-            password=os.getenv("MYSQL_PASSWORD"),
-            connect_timeout=10,
-        )
+        cleanup_connection = _connect()
         cleanup_cursor = cleanup_connection.cursor()
         
         # Clean up created databases in reverse order
@@ -162,4 +143,108 @@ def mysql_resource(request):
         print(f"Worker {os.getpid()}: MySQL resource {resource_id} cleaned up successfully")
         
     except Exception as e:
-        print(f"Worker {os.getpid()}: Error cleaning up MySQL resource: {e}") 
\ No newline at end of file
+        print(f"Worker {os.getpid()}: Error cleaning up MySQL resource: {e}") 
+
+
+def _connect(**kwargs):
+    """Connect to the MySQL server configured in the environment"""
+    return mysql.connector.connect(
+        host=os.getenv("MYSQL_HOST"),
+        port=os.getenv("MYSQL_PORT"),
+        user=os.getenv("MYSQL_USERNAME"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        connect_timeout=10,
+        **kwargs,
+    )
+
+
+def _create_database(cursor, db_name: str) -> None:
+    """Drop and recreate a database"""
+    cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+    cursor.execute(f"CREATE DATABASE {db_name}")
+    print(f"Worker {os.getpid()}: Created database {db_name}")
+
+
+def _create_table(cursor, db_name: str, table_config: dict, max_allowed_packet: int) -> None:
+    """
+    Create a table from its JSON column definitions and seed its data. The caller commits.
+
+    :param cursor: Cursor with the table's database selected.
+    :param db_name: Name of that database (for logging).
+    :param table_config: The table entry of the build template.
+    :param max_allowed_packet: Server max_allowed_packet in bytes, used to size batched INSERTs.
+    """
+    table_name = table_config["name"]
+    
+    # Build CREATE TABLE SQL from column definitions
+    column_definitions = []
+    for col in table_config["columns"]:
+        col_def = f"{col['name']} {col['type']}"
+        
+        if col.get('primary_key'):
+            col_def += " PRIMARY KEY"
+        if col.get('not_null'):
+            col_def += " NOT NULL"
+        if col.get('unique'):
+            col_def += " UNIQUE"
+        if col.get('default'):
+            col_def += f" DEFAULT {col['default']}"
+            
+        column_definitions.append(col_def)
+    
+    create_table_sql = f"CREATE TABLE {table_name} ({', '.join(column_definitions)})"
+    cursor.execute(create_table_sql)
+    print(f"Worker {os.getpid()}: Created table {table_name} in {db_name}")
+    
+    # Insert data if provided (multi-row INSERTs by default)
+    if "data" in table_config and table_config["data"]:
+        seed_stats = seed_table(
+            cursor,
+            table_name,
+            table_config["data"],
+            method=table_config.get("seed_method", DEFAULT_SEED_METHOD),
+            max_allowed_packet=max_allowed_packet,
+        )
+        print(f"Worker {os.getpid()}: Inserted {seed_stats['rows']} records into {table_name} via {seed_stats['method']} ({seed_stats['statements']} statements) in {seed_stats['duration']:.2f}s")
+
+
+def _provision_in_parallel(databases: list, use_local_infile: bool, max_workers: int) -> dict:
+    """
+    Create databases and their tables concurrently. mysql.connector connections are not
+    thread-safe, so each pool thread opens one connection and reuses it for its tasks.
+    Tables wait for their database and for the tables they reference.
+
+    :param databases: The "databases" entries of the build template.
+    :param use_local_infile: Whether connections need LOAD DATA LOCAL INFILE enabled.
+    :param max_workers: Maximum number of concurrent provisioning tasks.
+    :return: Timing statistics from run_task_graph.
+    :rtype: dict
+    """
+    thread_state = threading.local()
+    opened_connections = []
+    opened_lock = threading.Lock()
+    
+    def get_cursor():
+        if not hasattr(thread_state, "connection"):
+            thread_state.connection = _connect(allow_local_infile=use_local_infile)
+            thread_state.cursor = thread_state.connection.cursor()
+            thread_state.max_allowed_packet = get_max_allowed_packet(thread_state.cursor)
+            with opened_lock:
+                opened_connections.append(thread_state.connection)
+        return thread_state.cursor
+    
+    def create_database(db_config):
+        _create_database(get_cursor(), db_config["name"])
+    
+    def create_table(db_config, table_config):
+        cursor = get_cursor()
+        cursor.execute(f"USE {db_config['name']}")
+        _create_table(cursor, db_config["name"], table_config, thread_state.max_allowed_packet)
+        thread_state.connection.commit()
+    
+    try:
+        tasks = build_task_graph(databases, create_database, create_table)
+        return run_task_graph(tasks, max_workers=max_workers)
+    finally:
+        for connection in opened_connections:
+            connection.close()
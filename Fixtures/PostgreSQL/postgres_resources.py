@@ -2,8 +2,28 @@ import pytest
 import json
 import time
 import os
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+import sqlite3
+from filelock import FileLock
+from Environment.PostgreSQL import (
+    DEFAULT_SEED_METHOD,
+    clone_database,
+    close_pool,
+    database_exists,
+    drop_template_database,
+    get_template_database_name,
+    get_template_hash,
+    mark_as_template,
+    pooled_connection,
+    seed_table,
+)
+from Environment.provisioning import (
+    DEFAULT_MAX_WORKERS,
+    build_task_graph,
+    format_provisioning_stats,
+    run_task_graph,
+)
+
+TMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".tmp")
 
 
 
@@ -13,6 +33,9 @@ def postgres_resource(request):
     A function-scoped fixture that creates PostgreSQL resources based on template.
     Template structure: {
         "resource_id": "id", 
+        "clone_from_template": False,  # Optional: build each database once as a template and clone it per test
+        "parallel_provisioning": False,  # Optional: create databases and tables concurrently (FK order is kept)
+        "max_workers": 4,  # Optional: thread pool size for parallel provisioning
         "databases": [
             {
                 "name": "db_name", 
@@ -22,7 +45,8 @@ def postgres_resource(request):
                         "columns": [
                             {"name": "col_name", "type": "VARCHAR(100)", "not_null": True, "primary_key": False, "unique": False, "default": "value"}
                         ],
-                        "data": [{"col1": "val1", "col2": "val2"}]
+                        "data": [{"col1": "val1", "col2": "val2"}],
+                        "seed_method": "copy"  # Optional: "copy" (default), "values" or "row"
                     }
                 ]
             }
@@ -41,105 +65,35 @@ def postgres_resource(request):
     
     created_resources = []
     
-    # Connect to postgres system database for database creation
-    system_connection = psycopg2.connect(
-        host=os.getenv("POSTGRES_HOSTNAME"),
-        port=os.getenv("POSTGRES_PORT"),
-        user=os.getenv("POSTGRES_USERNAME"),
-        password=os.getenv("POSTGRES_PASSWORD"),
-        database="postgres",
-        sslmode="require",
-    )
-    system_connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-    system_cursor = system_connection.cursor()
+    databases = build_template.get("databases", [])
+    clone_from_template = build_template.get("clone_from_template", False)
+    provisioning_stats = None
     
-    try:
-        # Process databases from template
-        if "databases" in build_template:
-            for db_config in build_template["databases"]:
-                db_name = db_config["name"]
-                
-                # Check and kill any existing connections to the database
-                try:
-                    system_cursor.execute(
-                        """
-                        SELECT pg_terminate_backend(pid) 
-                        FROM pg_stat_activity 
-                        WHERE datname = %s AND pid <> pg_backend_pid()
-                        """,
-                        (db_name,)
-                    )
-                except Exception as e:
-                    print(f"Worker {os.getpid()}: Warning - could not terminate connections: {e}")
-                
-                # Drop and create database
-                system_cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
-                system_cursor.execute(f"CREATE DATABASE {db_name}")
-                print(f"Worker {os.getpid()}: Created database {db_name}")
-                
-                created_resources.append({"type": "database", "name": db_name, "tables": []})
-                db_resource = created_resources[-1]
-                
-                # Connect to the new database for table operations
-                db_connection = psycopg2.connect(
-                    host=os.getenv("POSTGRES_HOSTNAME"),
-                    port=os.getenv("POSTGRES_PORT"),
-                    user=os.getenv("POSTGRES_USERNAME"),
-                    password=os.getenv("POSTGRES_PASSWORD"),
-                    database=db_name,
-                    sslmode="require",
-                )
-                db_cursor = db_connection.cursor()
-                
-                try:
-                    # Process tables in this database
-                    if "tables" in db_config:
-                        for table_config in db_config["tables"]:
-                            table_name = table_config["name"]
-                            
-                            # Generate and execute CREATE TABLE from JSON columns
-                            if "columns" in table_config:
-                                # Build CREATE TABLE SQL from column definitions
-                                column_definitions = []
-                                for col in table_config["columns"]:
-                                    col_def = f"{col['name']} {col['type']}"
-                                    
-                                    if col.get('primary_key'):
-                                        col_def += " PRIMARY KEY"
-                                    if col.get('not_null'):
-                                        col_def += " NOT NULL"
-                                    if col.get('unique'):
-                                        col_def += " UNIQUE"
-                                    if col.get('default'):
-                                        col_def += f" DEFAULT {col['default']}"
-                                        
-                                    column_definitions.append(col_def)
-                                
-                                create_table_sql = f"CREATE TABLE {table_name} ({', '.join(column_definitions)})"
-                                db_cursor.execute(create_table_sql)
-                                print(f"Worker {os.getpid()}: Created table {table_name} in {db_name}")
-                                db_resource["tables"].append(table_name)
-                                
-                                # Insert data if provided
-                                if "data" in table_config and table_config["data"]:
-                                    for record in table_config["data"]:
-                                        # Generate INSERT statement from record data
-                                        columns = list(record.keys())
-                                        values = list(record.values())
-                                        placeholders = ", ".join(["%s"] * len(values))
-                                        insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
-                                        db_cursor.execute(insert_sql, values)
-                                    
-                                    db_connection.commit()
-                                    print(f"Worker {os.getpid()}: Inserted {len(table_config['data'])} records into {table_name}")
-                    
-                finally:
-                    db_cursor.close()
-                    db_connection.close()
-        
-    finally:
-        system_cursor.close()
-        system_connection.close()
+    if build_template.get("parallel_provisioning", False):
+        provisioning_stats = _provision_in_parallel(
+            databases,
+            clone_from_template,
+            build_template.get("max_workers", DEFAULT_MAX_WORKERS),
+        )
+        print(f"Worker {os.getpid()}: Parallel PostgreSQL provisioning: {format_provisioning_stats(provisioning_stats)}")
+    else:
+        # Borrow a pooled connection to the postgres system database for database creation
+        with pooled_connection("postgres", autocommit=True) as system_connection:
+            system_cursor = system_connection.cursor()
+            
+            try:
+                # Process databases from template
+                for db_config in databases:
+                    _create_database(system_cursor, db_config, clone_from_template)
+                    if not clone_from_template:
+                        _create_tables(db_config["name"], db_config)
+            
+            finally:
+                system_cursor.close()
+    
+    for db_config in databases:
+        table_names = [table_config["name"] for table_config in db_config.get("tables", []) if "columns" in table_config]
+        created_resources.append({"type": "database", "name": db_config["name"], "tables": table_names})
     
     creation_end = time.time()
     print(f"Worker {os.getpid()}: PostgreSQL resource creation took {creation_end - creation_start:.2f}s")
@@ -156,7 +110,8 @@ def postgres_resource(request):
         "creation_duration": creation_end - creation_start,
         "description": f"A PostgreSQL resource for {test_name}",
         "status": "active",
-        "created_resources": created_resources
+        "created_resources": created_resources,
+        "provisioning_stats": provisioning_stats
     }
     
     print(f"Worker {os.getpid()}: Created PostgreSQL resource {resource_id}")
@@ -169,43 +124,238 @@ def postgres_resource(request):
     # Cleanup after test completes
     print(f"Worker {os.getpid()}: Cleaning up PostgreSQL resource {resource_id}")
     try:
-        # Connect to system database for cleanup
-        cleanup_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="postgres",
-            sslmode="require",
+        # Borrow a pooled system database connection for cleanup
+        with pooled_connection("postgres", autocommit=True) as cleanup_connection:
+            cleanup_cursor = cleanup_connection.cursor()
+            
+            # Clean up created databases in reverse order
+            for resource in reversed(created_resources):
+                if resource["type"] == "database":
+                    db_name = resource["name"]
+                    
+                    # Close this worker's pooled connections, then terminate any others before dropping
+                    close_pool(db_name)
+                    try:
+                        cleanup_cursor.execute(
+                            """
+                            SELECT pg_terminate_backend(pid) 
+                            FROM pg_stat_activity 
+                            WHERE datname = %s AND pid <> pg_backend_pid()
+                            """,
+                            (db_name,)
+                        )
+                    except Exception as e:
+                        print(f"Worker {os.getpid()}: Warning during cleanup - could not terminate connections: {e}")
+                    
+                    # Drop the database
+                    cleanup_cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+                    print(f"Worker {os.getpid()}: Dropped database {db_name}")
+            
+            cleanup_cursor.close()
+        print(f"Worker {os.getpid()}: PostgreSQL resource {resource_id} cleaned up successfully")
+        
+    except Exception as e:
+        print(f"Worker {os.getpid()}: Error cleaning up PostgreSQL resource: {e}")
+
+
+def _create_database(system_cursor, db_config: dict, clone_from_template: bool) -> None:
+    """
+    Drop and recreate a database, cloning its materialized template if requested.
+
+    :param system_cursor: Autocommit cursor on the postgres system database.
+    :param db_config: The database entry of the build template.
+    :param clone_from_template: Whether to clone the database from its template database.
+    """
+    db_name = db_config["name"]
+    
+    # Check and kill any existing connections to the database
+    try:
+        system_cursor.execute(
+            """
+            SELECT pg_terminate_backend(pid) 
+            FROM pg_stat_activity 
+            WHERE datname = %s AND pid <> pg_backend_pid()
+            """,
+            (db_name,)
         )
-        cleanup_connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        cleanup_cursor = cleanup_connection.cursor()
+    except Exception as e:
+        print(f"Worker {os.getpid()}: Warning - could not terminate connections: {e}")
+    
+    # Drop and create database
+    system_cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+    if clone_from_template:
+        template_name = _get_or_create_template_database(system_cursor, db_config)
+        clone_database(system_cursor, db_name, template_name)
+        print(f"Worker {os.getpid()}: Created database {db_name} from template {template_name}")
+    else:
+        system_cursor.execute(f"CREATE DATABASE {db_name}")
+        print(f"Worker {os.getpid()}: Created database {db_name}")
+
+
+def _create_table(db_cursor, db_name: str, table_config: dict) -> None:
+    """
+    Create a table from its JSON column definitions and seed its data. The caller commits.
+
+    :param db_cursor: Cursor on the database the table belongs to.
+    :param db_name: Name of that database (for logging).
+    :param table_config: The table entry of the build template.
+    """
+    table_name = table_config["name"]
+    
+    # Build CREATE TABLE SQL from column definitions
+    column_definitions = []
+    for col in table_config["columns"]:
+        col_def = f"{col['name']} {col['type']}"
         
-        # Clean up created databases in reverse order
-        for resource in reversed(created_resources):
-            if resource["type"] == "database":
-                db_name = resource["name"]
-                
-                # Terminate connections before dropping
-                try:
-                    cleanup_cursor.execute(
-                        """
-                        SELECT pg_terminate_backend(pid) 
-                        FROM pg_stat_activity 
-                        WHERE datname = %s AND pid <> pg_backend_pid()
-                        """,
-                        (db_name,)
-                    )
-                except Exception as e:
-                    print(f"Worker {os.getpid()}: Warning during cleanup - could not terminate connections: {e}")
-                
-                # Drop the database
-                cleanup_cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
-                print(f"Worker {os.getpid()}: Dropped database {db_name}")
+        if col.get('primary_key'):
+            col_def += " PRIMARY KEY"
+        if col.get('not_null'):
+            col_def += " NOT NULL"
+        if col.get('unique'):
+            col_def += " UNIQUE"
+        if col.get('default'):
+            col_def += f" DEFAULT {col['default']}"
+            
+        column_definitions.append(col_def)
+    
+    create_table_sql = f"CREATE TABLE {table_name} ({', '.join(column_definitions)})"
+    db_cursor.execute(create_table_sql)
+    print(f"Worker {os.getpid()}: Created table {table_name} in {db_name}")
+    
+    # Insert data if provided (streamed through COPY by default)
+    if "data" in table_config and table_config["data"]:
+        seed_stats = seed_table(
+            db_cursor,
+            table_name,
+            table_config["data"],
+            method=table_config.get("seed_method", DEFAULT_SEED_METHOD),
+        )
+        print(f"Worker {os.getpid()}: Inserted {seed_stats['rows']} records into {table_name} via {seed_stats['method']} in {seed_stats['duration']:.2f}s")
+
+
+def _create_tables(db_name: str, db_config: dict) -> None:
+    """
+    Create the tables of a database config in template order and seed their data.
+
+    :param db_name: The database to create the tables in.
+    :param db_config: The database entry of the build template.
+    """
+    # Borrow a pooled connection to the new database for table operations
+    with pooled_connection(db_name) as db_connection:
+        db_cursor = db_connection.cursor()
         
-        cleanup_cursor.close()
-        cleanup_connection.close()
-        print(f"Worker {os.getpid()}: PostgreSQL resource {resource_id} cleaned up successfully")
+        try:
+            for table_config in db_config.get("tables", []):
+                if "columns" in table_config:
+                    _create_table(db_cursor, db_name, table_config)
+                db_connection.commit()
+        finally:
+            db_cursor.close()
+
+
+def _provision_in_parallel(databases: list, clone_from_template: bool, max_workers: int) -> dict:
+    """
+    Create databases and their tables concurrently, each task on its own pooled connection.
+    Tables wait for their database and for the tables they reference.
+
+    :param databases: The "databases" entries of the build template.
+    :param clone_from_template: Whether databases are cloned from template databases.
+    :param max_workers: Maximum number of concurrent provisioning tasks.
+    :return: Timing statistics from run_task_graph.
+    :rtype: dict
+    """
+    def create_database(db_config):
+        with pooled_connection("postgres", autocommit=True) as system_connection:
+            system_cursor = system_connection.cursor()
+            try:
+                _create_database(system_cursor, db_config, clone_from_template)
+            finally:
+                system_cursor.close()
+    
+    def create_table(db_config, table_config):
+        with pooled_connection(db_config["name"]) as db_connection:
+            db_cursor = db_connection.cursor()
+            try:
+                _create_table(db_cursor, db_config["name"], table_config)
+                db_connection.commit()
+            finally:
+                db_cursor.close()
+    
+    tasks = build_task_graph(databases, create_database, create_table, include_tables=not clone_from_template)
+    return run_task_graph(tasks, max_workers=max_workers)
+
+
+def _get_or_create_template_database(system_cursor, db_config: dict) -> str:
+    """
+    Materialize a database config once as a template database keyed by its content hash.
+    A FileLock ensures only one worker builds each template; the others reuse it.
+
+    :param system_cursor: Autocommit cursor on the postgres system database.
+    :param db_config: The database entry of the build template.
+    :return: The name of the template database.
+    :rtype: str
+    """
+    template_hash = get_template_hash(db_config)
+    template_name = get_template_database_name(template_hash)
+    os.makedirs(TMP_DIR, exist_ok=True)
+    
+    with FileLock(os.path.join(TMP_DIR, f"postgres_template_{template_hash}.lock")):
+        if database_exists(system_cursor, template_name):
+            print(f"Worker {os.getpid()}: Reusing template database {template_name}")
+            return template_name
+        
+        # Build under a temporary name and rename once complete, so a failed build is never cloned
+        creation_start = time.time()
+        building_name = f"{template_name}_building"
+        system_cursor.execute(f"DROP DATABASE IF EXISTS {building_name}")
+        system_cursor.execute(f"CREATE DATABASE {building_name}")
+        try:
+            _create_tables(building_name, db_config)
+            # Pooled connections to the template would block the rename and every clone
+            close_pool(building_name)
+            system_cursor.execute(f"ALTER DATABASE {building_name} RENAME TO {template_name}")
+        except Exception:
+            close_pool(building_name)
+            system_cursor.execute(f"DROP DATABASE IF EXISTS {building_name}")
+            raise
+        mark_as_template(system_cursor, template_name)
+        creation_end = time.time()
+        print(f"Worker {os.getpid()}: Materialized template database {template_name} in {creation_end - creation_start:.2f}s")
         
+        # Register the template so session spindown drops it
+        try:
+            with sqlite3.connect(os.path.join(TMP_DIR, "resources.db")) as conn:
+                conn.execute("""
+                    INSERT INTO resources (resource_id, type, creation_time, worker_pid, creation_duration, description, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    template_name,
+                    "postgres_template_database",
+                    creation_end,
+                    os.getpid(),
+                    creation_end - creation_start,
+                    f"PostgreSQL template database {template_name}",
+                    "active"
+                ))
+        except Exception as e:
+            print(f"Worker {os.getpid()}: Failed to log template database to SQLite: {e}")
+    
+    return template_name
+
+
+def cleanup_postgres_template_database(resource_data):
+    """Drop a template database materialized by postgres_resource (called from session spindown)"""
+    if os.environ.get("PYTEST_XDIST_WORKER") is not None:
+        # Other workers may still be cloning; only the controller drops templates
+        return
+    template_name = resource_data["resource_id"]
+    print(f"Worker {os.getpid()}: Dropping template database {template_name}")
+    try:
+        with pooled_connection("postgres", autocommit=True) as system_connection:
+            system_cursor = system_connection.cursor()
+            try:
+                drop_template_database(system_cursor, template_name)
+            finally:
+                system_cursor.close()
     except Exception as e:
-        print(f"Worker {os.getpid()}: Error cleaning up PostgreSQL resource: {e}") 
\ No newline at end of file
+        print(f"Worker {os.getpid()}: Error dropping template database {template_name}: {e}")
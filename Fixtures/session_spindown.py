@@ -1,4 +1,6 @@
 from Fixtures.Test.shared_resources import cleanup_shared_resource, cleanup_second_shared_resource
+from Fixtures.PostgreSQL.postgres_resources import cleanup_postgres_template_database
+from Fixtures.Airflow.airflow_resources import cleanup_airflow_deployment_pool
 import sqlite3
 
 def session_spindown():
@@ -12,7 +14,9 @@ def session_spindown():
         
         RESOURCE_HANDLERS = {
             "shared_test_resource": cleanup_shared_resource,
-            "second_shared_test_resource": cleanup_second_shared_resource
+            "second_shared_test_resource": cleanup_second_shared_resource,
+            "postgres_template_database": cleanup_postgres_template_database,
+            "airflow_pooled_deployment": cleanup_airflow_deployment_pool
         }
         
         for row in cursor:
@@ -3,7 +3,6 @@ import importlib
 import pytest
 import time
 from datetime import datetime, timedelta
-import psycopg2
 import requests
 from github import Github
 from requests.auth import HTTPBasicAuth
@@ -12,6 +11,8 @@ from Configs.ArdentConfig import Ardent_Client
 from model.Run_Model import run_model
 from model.Configure_Model import set_up_model_configs, remove_model_configs
 from Environment.Airflow.Airflow import Airflow_Local
+from Environment.PostgreSQL import close_pool, get_pool, pooled_connection
+from Fixtures.GitHub.repo_pool import lease_repo, release_repo
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir_name = os.path.basename(current_dir)
@@ -53,6 +54,9 @@ def test_airflow_agent_amazon_sp_api_to_postgresql(request):
     config_results = None
     airflow_local = Airflow_Local()
 
+    # Lease the test's Airflow repository (AIRFLOW_REPO without a pool) so the agent opens its PR there
+    Test_Configs.Configs["services"]["airflow"]["repo"] = lease_repo()
+
     # SECTION 1: SETUP THE TEST
     try:
         # Setup GitHub repository with empty dags folder
@@ -94,41 +98,25 @@ def test_airflow_agent_amazon_sp_api_to_postgresql(request):
             if "sha" not in str(e):
                 raise e
 
-        # Setup Postgres database
-        postgres_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="postgres",
-            sslmode="require",
-        )
-        postgres_connection.autocommit = True
-        postgres_cursor = postgres_connection.cursor()
+        # Setup Postgres database (pooled connections to amazon_sales are closed before the drop)
+        close_pool("amazon_sales")
+        with pooled_connection("postgres", autocommit=True) as system_connection:
+            system_cursor = system_connection.cursor()
 
-        # Drop and recreate amazon_sales database
-        postgres_cursor.execute(
+            # Drop and recreate amazon_sales database
+            system_cursor.execute(
+                """
+                SELECT pg_terminate_backend(pid) 
+                FROM pg_stat_activity 
+                WHERE datname = 'amazon_sales'
             """
-            SELECT pg_terminate_backend(pid) 
-            FROM pg_stat_activity 
-            WHERE datname = 'amazon_sales'
-        """
-        )
-        postgres_cursor.execute("DROP DATABASE IF EXISTS amazon_sales")
-        postgres_cursor.execute("CREATE DATABASE amazon_sales")
-
-        # Close connection and reconnect to new database
-        postgres_cursor.close()
-        postgres_connection.close()
-
-        postgres_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="amazon_sales",
-            sslmode="require",
-        )
+            )
+            system_cursor.execute("DROP DATABASE IF EXISTS amazon_sales")
+            system_cursor.execute("CREATE DATABASE amazon_sales")
+            system_cursor.close()
+
+        # Borrow a connection to the new database for the rest of the test
+        postgres_connection = get_pool("amazon_sales").acquire()
         postgres_cursor = postgres_connection.cursor()
 
         # Configure model with necessary configs
@@ -358,31 +346,23 @@ def test_airflow_agent_amazon_sp_api_to_postgresql(request):
 
             # Clean up Postgres database
             postgres_cursor.close()
-            postgres_connection.close()
+            get_pool("amazon_sales").release(postgres_connection)
+            close_pool("amazon_sales")
 
             # Reconnect to postgres database for cleanup
-            postgres_connection = psycopg2.connect(
-                host=os.getenv("POSTGRES_HOSTNAME"),
-                port=os.getenv("POSTGRES_PORT"),
-                user=os.getenv("POSTGRES_USERNAME"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                database="postgres",
-                sslmode="require",
-            )
-            postgres_connection.autocommit = True
-            postgres_cursor = postgres_connection.cursor()
-
-            # Drop the database
-            postgres_cursor.execute(
+            with pooled_connection("postgres", autocommit=True) as system_connection:
+                system_cursor = system_connection.cursor()
+
+                # Drop the database
+                system_cursor.execute(
+                    """
+                    SELECT pg_terminate_backend(pid) 
+                    FROM pg_stat_activity 
+                    WHERE datname = 'amazon_sales'
                 """
-                SELECT pg_terminate_backend(pid) 
-                FROM pg_stat_activity 
-                WHERE datname = 'amazon_sales'
-            """
-            )
-            postgres_cursor.execute("DROP DATABASE IF EXISTS amazon_sales")
-            postgres_cursor.close()
-            postgres_connection.close()
+                )
+                system_cursor.execute("DROP DATABASE IF EXISTS amazon_sales")
+                system_cursor.close()
 
             # Remove model configs
             remove_model_configs(
@@ -444,3 +424,5 @@ def test_airflow_agent_amazon_sp_api_to_postgresql(request):
 
         except Exception as e:
             print(f"Error during cleanup: {e}")
+        finally:
+            release_repo()
@@ -15,6 +15,7 @@ from model.Run_Model import run_model
 from Configs.MySQLConfig import connection
 from model.Configure_Model import set_up_model_configs, remove_model_configs
 from Environment.Airflow.Airflow import Airflow_Local
+from Fixtures.GitHub.repo_pool import lease_repo, release_repo
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir_name = os.path.basename(current_dir)
@@ -85,6 +86,9 @@ def test_airflow_agent_mysql_to_tigerbeetle(request):
     except Exception as e:
         print(f"Error during pre-cleanup: {e}")
 
+    # Lease the test's Airflow repository (AIRFLOW_REPO without a pool) so the agent opens its PR there
+    Test_Configs.Configs["services"]["airflow"]["repo"] = lease_repo()
+
     # SECTION 1: SETUP THE TEST
     try:
         # Setup GitHub repository with empty dags folder
@@ -438,3 +442,5 @@ def test_airflow_agent_mysql_to_tigerbeetle(request):
             
         except Exception as e:
             print(f"Error during cleanup: {e}")
+        finally:
+            release_repo()
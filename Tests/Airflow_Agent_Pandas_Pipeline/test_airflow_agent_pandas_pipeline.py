@@ -31,6 +31,7 @@ def test_airflow_agent_pandas_pipeline(request, airflow_resource):
     airflow_password = airflow_resource["password"]
 
     Test_Configs.Configs["services"]["airflow"]["host"] = airflow_base_url
+    Test_Configs.Configs["services"]["airflow"]["repo"] = airflow_resource["repo_url"]
 
     test_steps = [
         {
@@ -3,13 +3,13 @@ import os
 import time
 from datetime import datetime
 
-import psycopg2
 import pytest
 import requests
 from github import Github
 from requests.auth import HTTPBasicAuth
 
 from Configs.MySQLConfig import connection as mysql_connection
+from Environment.PostgreSQL import close_pool, get_pool, pooled_connection
 from model.Configure_Model import set_up_model_configs, remove_model_configs
 from model.Run_Model import run_model
 
@@ -37,6 +37,7 @@ def test_airflow_agent_postgresql_to_mysql(request, airflow_resource):
     airflow_password = airflow_resource["password"]
 
     Test_Configs.Configs["services"]["airflow"]["host"] = airflow_base_url
+    Test_Configs.Configs["services"]["airflow"]["repo"] = airflow_resource["repo_url"]
 
 
     test_steps = [
@@ -113,67 +114,42 @@ def test_airflow_agent_postgresql_to_mysql(request, airflow_resource):
                 raise e
 
         # Setup Postgres database and sample data
-        connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="postgres",
-            sslmode="require",
-        )
-        postgres_cursor = connection.cursor()
-
-        # First connect to postgres database
-        postgres_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="postgres",
-            sslmode="require",
-        )
-        postgres_connection.autocommit = True
-        postgres_cursor = postgres_connection.cursor()
+        # First connect to postgres database (pooled connections to sales_db are closed before the drop)
+        close_pool("sales_db")
+        with pooled_connection("postgres", autocommit=True) as system_connection:
+            system_cursor = system_connection.cursor()
 
-        # Check and kill any existing connections
-        postgres_cursor.execute(
+            # Check and kill any existing connections
+            system_cursor.execute(
+                """
+                SELECT pid, usename, datname 
+                FROM pg_stat_activity 
+                WHERE datname = 'sales_db'
             """
-            SELECT pid, usename, datname 
-            FROM pg_stat_activity 
-            WHERE datname = 'sales_db'
-        """
-        )
-        connections = postgres_cursor.fetchall()
-        print(f"Found connections to sales_db:", connections)
+            )
+            connections = system_cursor.fetchall()
+            print(f"Found connections to sales_db:", connections)
 
-        postgres_cursor.execute(
+            system_cursor.execute(
+                """
+                SELECT pg_terminate_backend(pid) 
+                FROM pg_stat_activity 
+                WHERE datname = 'sales_db'
             """
-            SELECT pg_terminate_backend(pid) 
-            FROM pg_stat_activity 
-            WHERE datname = 'sales_db'
-        """
-        )
-        print("Terminated all connections to sales_db")
-
-        # Now safe to drop and recreate
-        postgres_cursor.execute("DROP DATABASE IF EXISTS sales_db")
-        print("Dropped existing sales_db if it existed")
-        postgres_cursor.execute("CREATE DATABASE sales_db")
-        print("Created new sales_db")
-
-        # Close connection to postgres database
-        postgres_cursor.close()
-        postgres_connection.close()
-
-        # Reconnect to the new database
-        postgres_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="sales_db",
-            sslmode="require",
-        )
+            )
+            print("Terminated all connections to sales_db")
+
+            # Now safe to drop and recreate
+            system_cursor.execute("DROP DATABASE IF EXISTS sales_db")
+            print("Dropped existing sales_db if it existed")
+            system_cursor.execute("CREATE DATABASE sales_db")
+            print("Created new sales_db")
+
+            # Close cursor on postgres database
+            system_cursor.close()
+
+        # Borrow a connection to the new database for the rest of the test
+        postgres_connection = get_pool("sales_db").acquire()
         postgres_cursor = postgres_connection.cursor()
 
         # Create test table
@@ -440,50 +416,42 @@ def test_airflow_agent_postgresql_to_mysql(request, airflow_resource):
                 print(f"Error pausing DAG: {e}")
 
             # Rest of your existing cleanup...
-            # First close our connection to sales_db
+            # First return our connection to sales_db and close the pool's idle ones
             postgres_cursor.close()
-            postgres_connection.close()
+            get_pool("sales_db").release(postgres_connection)
+            close_pool("sales_db")
             print("Closed test connections")
 
             # Connect to postgres database for cleanup
-            postgres_connection = psycopg2.connect(
-                host=os.getenv("POSTGRES_HOSTNAME"),
-                port=os.getenv("POSTGRES_PORT"),
-                user=os.getenv("POSTGRES_USERNAME"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                database="postgres",
-                sslmode="require",
-            )
-            postgres_connection.autocommit = True
-            postgres_cursor = postgres_connection.cursor()
-
-            # Check and kill any remaining connections
-            postgres_cursor.execute(
+            with pooled_connection("postgres", autocommit=True) as system_connection:
+                system_cursor = system_connection.cursor()
+
+                # Check and kill any remaining connections
+                system_cursor.execute(
+                    """
+                    SELECT pid, usename, datname 
+                    FROM pg_stat_activity 
+                    WHERE datname = 'sales_db'
                 """
-                SELECT pid, usename, datname 
-                FROM pg_stat_activity 
-                WHERE datname = 'sales_db'
-            """
-            )
-            connections = postgres_cursor.fetchall()
-            print(f"Found connections to sales_db during cleanup:", connections)
-
-            postgres_cursor.execute(
+                )
+                connections = system_cursor.fetchall()
+                print(f"Found connections to sales_db during cleanup:", connections)
+
+                system_cursor.execute(
+                    """
+                    SELECT pg_terminate_backend(pid) 
+                    FROM pg_stat_activity 
+                    WHERE datname = 'sales_db'
                 """
-                SELECT pg_terminate_backend(pid) 
-                FROM pg_stat_activity 
-                WHERE datname = 'sales_db'
-            """
-            )
-            print("Terminated all connections to sales_db")
+                )
+                print("Terminated all connections to sales_db")
 
-            # Now safe to drop
-            postgres_cursor.execute("DROP DATABASE IF EXISTS sales_db")
-            print("Dropped sales_db in cleanup")
+                # Now safe to drop
+                system_cursor.execute("DROP DATABASE IF EXISTS sales_db")
+                print("Dropped sales_db in cleanup")
 
-            # Close final connection
-            postgres_cursor.close()
-            postgres_connection.close()
+                # Close final cursor
+                system_cursor.close()
             print("Cleanup completed successfully")
 
             # MySQL cleanup
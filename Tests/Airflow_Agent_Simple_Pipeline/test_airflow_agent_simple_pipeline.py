@@ -70,6 +70,7 @@ def test_airflow_agent_simple_pipeline(request, airflow_resource, github_resourc
         # set the airflow folder with the correct configs
         # this function is for you to take the configs for the test and set them up however you want. They follow a set structure
         Test_Configs.Configs["services"]["airflow"]["host"] = airflow_resource["base_url"]
+        Test_Configs.Configs["services"]["airflow"]["repo"] = airflow_resource["repo_url"]
         Test_Configs.Configs["services"]["airflow"]["username"] = airflow_resource["username"]
         Test_Configs.Configs["services"]["airflow"]["password"] = airflow_resource["password"]
         Test_Configs.Configs["services"]["airflow"]["api_token"] = airflow_resource["api_token"]
@@ -122,15 +123,14 @@ def test_airflow_agent_simple_pipeline(request, airflow_resource, github_resourc
         # Use the airflow instance from the fixture to pull DAGs from GitHub
         # The fixture already has the Docker instance running
         airflow_instance = airflow_resource["airflow_instance"]
-        if not airflow_instance.wait_for_airflow_to_be_ready(6):
-            raise Exception("Airflow instance did not redeploy successfully.")
-        
         if not github_manager.check_if_action_is_complete(pr_title=pr_title):
             raise Exception("Action is not complete")
         
-        # verify the airflow instance is ready after the github action redeployed
+        # verify the airflow instance serves the DAG after the github action redeployed
         if not airflow_instance.wait_for_airflow_to_be_ready(3):
             raise Exception("Airflow instance did not redeploy successfully.")
+        if not airflow_instance.wait_for_airflow_dag(dag_name, wait_time_in_minutes=10):
+            raise Exception("Airflow instance did not redeploy successfully.")
 
         # Use the connection details from the fixture
         airflow_base_url = airflow_resource["base_url"]
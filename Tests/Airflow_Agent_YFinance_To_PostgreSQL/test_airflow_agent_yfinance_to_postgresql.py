@@ -4,11 +4,11 @@ import pytest
 import time
 import requests
 from github import Github
-import psycopg2
 
 from model.Run_Model import run_model
 from model.Configure_Model import set_up_model_configs
 from model.Configure_Model import remove_model_configs
+from Environment.PostgreSQL import close_pool, pooled_connection
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir_name = os.path.basename(current_dir)
@@ -94,82 +94,69 @@ def test_airflow_agent_yfinance_to_postgresql(request, airflow_resource):
 
         # Setup Postgres database
         print("Setting up PostgreSQL database...")
-        postgres_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="postgres",
-            sslmode="require",
-        )
-        postgres_connection.autocommit = True
-        postgres_cursor = postgres_connection.cursor()
-
-        # Check and kill any existing connections (if we have permission)
-        postgres_cursor.execute(
-            """
-            SELECT pid, usename, datname 
-            FROM pg_stat_activity 
-            WHERE datname = 'stock_data'
-            """
-        )
-        connections = postgres_cursor.fetchall()
-        print(f"Found connections to stock_data db:", connections)
+        # Pooled connections to stock_data must be closed before it is dropped
+        close_pool("stock_data")
+        with pooled_connection("postgres", autocommit=True) as postgres_connection:
+            postgres_cursor = postgres_connection.cursor()
 
-        if connections:
-            try:
-                postgres_cursor.execute(
-                    """
-                    SELECT pg_terminate_backend(pid) 
-                    FROM pg_stat_activity 
-                    WHERE datname = 'stock_data'
-                    """
-                )
-                print("Terminated all connections to stock_data db")
-            except Exception as e:
-                print(f"Could not terminate connections (permission issue): {e}")
-                print("Continuing with database operations...")
+            # Check and kill any existing connections (if we have permission)
+            postgres_cursor.execute(
+                """
+                SELECT pid, usename, datname 
+                FROM pg_stat_activity 
+                WHERE datname = 'stock_data'
+                """
+            )
+            connections = postgres_cursor.fetchall()
+            print(f"Found connections to stock_data db:", connections)
+
+            if connections:
+                try:
+                    postgres_cursor.execute(
+                        """
+                        SELECT pg_terminate_backend(pid) 
+                        FROM pg_stat_activity 
+                        WHERE datname = 'stock_data'
+                        """
+                    )
+                    print("Terminated all connections to stock_data db")
+                except Exception as e:
+                    print(f"Could not terminate connections (permission issue): {e}")
+                    print("Continuing with database operations...")
 
-        # Now safe to drop and recreate
-        postgres_cursor.execute("DROP DATABASE IF EXISTS stock_data")
-        print("Dropped existing stock_data db if it existed")
-        postgres_cursor.execute("CREATE DATABASE stock_data")
-        print("Created new stock_data db")
+            # Now safe to drop and recreate
+            postgres_cursor.execute("DROP DATABASE IF EXISTS stock_data")
+            print("Dropped existing stock_data db if it existed")
+            postgres_cursor.execute("CREATE DATABASE stock_data")
+            print("Created new stock_data db")
 
-        # Close connection to postgres database
-        postgres_cursor.close()
-        postgres_connection.close()
+            # Close cursor on postgres database
+            postgres_cursor.close()
 
         # Reconnect to the new database
-        postgres_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="stock_data",
-            sslmode="require",
-        )
-        postgres_cursor = postgres_connection.cursor()
-
-        # Create tesla_stock table
-        postgres_cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tesla_stock (
-                date DATE PRIMARY KEY,
-                open DECIMAL(10,2),
-                high DECIMAL(10,2),
-                low DECIMAL(10,2),
-                close DECIMAL(10,2),
-                volume BIGINT
+        with pooled_connection("stock_data") as postgres_connection:
+            postgres_cursor = postgres_connection.cursor()
+
+            # Create tesla_stock table
+            postgres_cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tesla_stock (
+                    date DATE PRIMARY KEY,
+                    open DECIMAL(10,2),
+                    high DECIMAL(10,2),
+                    low DECIMAL(10,2),
+                    close DECIMAL(10,2),
+                    volume BIGINT
+                )
+                """
             )
-            """
-        )
-        postgres_connection.commit()
-        print("Created tesla_stock table")
+            postgres_connection.commit()
+            print("Created tesla_stock table")
 
         # Set up the airflow folder with the correct configs
         # this function is for you to take the configs for the test and set them up however you want. They follow a set structure
         Test_Configs.Configs["services"]["airflow"]["host"] = airflow_resource["base_url"]
+        Test_Configs.Configs["services"]["airflow"]["repo"] = airflow_resource["repo_url"]
         Test_Configs.Configs["services"]["airflow"]["username"] = airflow_resource["username"]
         Test_Configs.Configs["services"]["airflow"]["password"] = airflow_resource["password"]
         Test_Configs.Configs["services"]["airflow"]["api_token"] = airflow_resource["api_token"]
@@ -219,7 +206,7 @@ def test_airflow_agent_yfinance_to_postgresql(request, airflow_resource):
         # Use the airflow instance from the fixture to pull DAGs from GitHub
         # The fixture already has the Docker instance running
         airflow_instance = airflow_resource["airflow_instance"]
-        if not airflow_instance.wait_for_airflow_to_be_ready(wait_time_in_minutes=10):
+        if not airflow_instance.wait_for_airflow_dag("tesla_stock_dag", wait_time_in_minutes=15):
             raise Exception("Airflow instance did not redeploy successfully.")
 
         # Use the connection details from the fixture
@@ -307,38 +294,31 @@ def test_airflow_agent_yfinance_to_postgresql(request, airflow_resource):
 
         # SECTION 3: VERIFY THE OUTCOMES
         print("Verifying database results...")
-        conn = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database="stock_data",
-            sslmode="require"
-        )
-        cur = conn.cursor()
+        with pooled_connection("stock_data") as conn:
+            cur = conn.cursor()
         
-        # Check if table exists and has data
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM tesla_stock 
-            WHERE date >= CURRENT_DATE - INTERVAL '10 days'
-        """)
-        row_count = cur.fetchone()[0]
+            # Check if table exists and has data
+            cur.execute("""
+                SELECT COUNT(*) 
+                FROM tesla_stock 
+                WHERE date >= CURRENT_DATE - INTERVAL '10 days'
+            """)
+            row_count = cur.fetchone()[0]
         
-        assert row_count > 0, "No Tesla stock data found in the database"
-        assert row_count <= 10, "Too many days of data found"
-
-        # Check table structure
-        cur.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = 'tesla_stock'
-        """)
-        columns = cur.fetchall()
-        expected_columns = {'date', 'open', 'high', 'low', 'close', 'volume'}
-        actual_columns = {col[0] for col in columns}
+            assert row_count > 0, "No Tesla stock data found in the database"
+            assert row_count <= 10, "Too many days of data found"
+
+            # Check table structure
+            cur.execute("""
+                SELECT column_name, data_type 
+                FROM information_schema.columns 
+                WHERE table_name = 'tesla_stock'
+            """)
+            columns = cur.fetchall()
+            expected_columns = {'date', 'open', 'high', 'low', 'close', 'volume'}
+            actual_columns = {col[0] for col in columns}
         
-        assert expected_columns.issubset(actual_columns), "Missing expected columns in tesla_stock table"
+            assert expected_columns.issubset(actual_columns), "Missing expected columns in tesla_stock table"
         
         print(f"✓ Successfully verified {row_count} days of Tesla stock data")
         test_steps[2]["status"] = "passed"
@@ -395,68 +375,54 @@ def test_airflow_agent_yfinance_to_postgresql(request, airflow_resource):
                 print(f"Error cleaning up requirements: {e}")
 
             # Clean up database
-            postgres_connection = psycopg2.connect(
-                host=os.getenv("POSTGRES_HOSTNAME"),
-                port=os.getenv("POSTGRES_PORT"),
-                user=os.getenv("POSTGRES_USERNAME"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                database="stock_data",
-                sslmode="require",
-            )
-            postgres_cursor = postgres_connection.cursor()
+            with pooled_connection("stock_data") as postgres_connection:
+                postgres_cursor = postgres_connection.cursor()
 
-            # Drop tesla_stock table
-            postgres_cursor.execute("DROP TABLE IF EXISTS tesla_stock")
-            postgres_connection.commit()
-
-            # Close connection to postgres database
-            postgres_cursor.close()
-            postgres_connection.close()
-
-            # Connect to postgres database for cleanup
-            postgres_connection = psycopg2.connect(
-                host=os.getenv("POSTGRES_HOSTNAME"),
-                port=os.getenv("POSTGRES_PORT"),
-                user=os.getenv("POSTGRES_USERNAME"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                database="postgres",
-                sslmode="require",
-            )
-            postgres_connection.autocommit = True
-            postgres_cursor = postgres_connection.cursor()
+                # Drop tesla_stock table
+                postgres_cursor.execute("DROP TABLE IF EXISTS tesla_stock")
+                postgres_connection.commit()
 
-            # Check and kill any remaining connections (if we have permission)
-            postgres_cursor.execute(
-                """
-                SELECT pid, usename, datname 
-                FROM pg_stat_activity 
-                WHERE datname = 'stock_data'
-                """
-            )
-            connections = postgres_cursor.fetchall()
-            print(f"Found connections to stock_data db during cleanup:", connections)
+                # Close cursor on stock_data
+                postgres_cursor.close()
 
-            if connections:
-                try:
-                    postgres_cursor.execute(
-                        """
-                        SELECT pg_terminate_backend(pid) 
-                        FROM pg_stat_activity 
-                        WHERE datname = 'stock_data'
-                        """
-                    )
-                    print("Terminated all connections to stock_data db")
-                except Exception as e:
-                    print(f"Could not terminate connections during cleanup (permission issue): {e}")
-                    print("Continuing with cleanup...")
+            # Pooled connections to stock_data must be closed before it is dropped
+            close_pool("stock_data")
 
-            # Now safe to drop
-            postgres_cursor.execute("DROP DATABASE IF EXISTS stock_data")
-            print("Dropped stock_data db in cleanup")
+            # Connect to postgres database for cleanup
+            with pooled_connection("postgres", autocommit=True) as postgres_connection:
+                postgres_cursor = postgres_connection.cursor()
 
-            # Close final connection
-            postgres_cursor.close()
-            postgres_connection.close()
+                # Check and kill any remaining connections (if we have permission)
+                postgres_cursor.execute(
+                    """
+                    SELECT pid, usename, datname 
+                    FROM pg_stat_activity 
+                    WHERE datname = 'stock_data'
+                    """
+                )
+                connections = postgres_cursor.fetchall()
+                print(f"Found connections to stock_data db during cleanup:", connections)
+
+                if connections:
+                    try:
+                        postgres_cursor.execute(
+                            """
+                            SELECT pg_terminate_backend(pid) 
+                            FROM pg_stat_activity 
+                            WHERE datname = 'stock_data'
+                            """
+                        )
+                        print("Terminated all connections to stock_data db")
+                    except Exception as e:
+                        print(f"Could not terminate connections during cleanup (permission issue): {e}")
+                        print("Continuing with cleanup...")
+
+                # Now safe to drop
+                postgres_cursor.execute("DROP DATABASE IF EXISTS stock_data")
+                print("Dropped stock_data db in cleanup")
+
+                # Close final cursor
+                postgres_cursor.close()
             print("Database cleanup completed successfully")
 
         except Exception as e:
@@ -13,7 +13,11 @@ from Environment.Databricks import (
     setup_databricks_environment,
     cleanup_databricks_environment,
     extract_warehouse_id_from_http_path,
-    execute_sql_query
+    execute_sql_query,
+    StatementRunner,
+    validate_expectations,
+    PathExists,
+    RowExists
 )
 
 # Import test configurations
@@ -29,103 +33,67 @@ Test_Configs = importlib.import_module(module_path)
 def validate_hello_world_results(client, config, timeout=60):
     """Validate that the simple Spark job ran successfully and produced our unique string"""
     validation_results = {}
-    start_time = time.time()
     
     unique_message = config["unique_message"]
-    test_id = config["test_id"]
     
     print(f"🔍 Validating Hello World test with unique message: {unique_message}")
     
-    # 1. Check if Delta table files exist in DBFS
+    dbfs_path = config["delta_table_path"].replace("dbfs:", "")
+    full_table_name = f"{config['catalog']}.{config['schema']}.{config['table']}"
+    warehouse_id = extract_warehouse_id_from_http_path(config.get("http_path", ""))
+    runner = StatementRunner(
+        config["host"], config["token"], warehouse_id, config["catalog"], config["schema"]
+    ) if warehouse_id else None
+    
+    # Delta table files and log in DBFS, plus the unique message in the table: one SQL statement, parallel DBFS calls
     try:
-        if time.time() - start_time > timeout:
-            raise TimeoutError("Validation timeout reached")
-            
-        dbfs_path = config["delta_table_path"].replace("dbfs:", "")
-        dbfs_info = client.dbfs.get_status(dbfs_path)
-        validation_results["delta_table_exists"] = True
+        results = validate_expectations(client, runner, [
+            PathExists(dbfs_path, name="delta_table"),
+            PathExists(f"{dbfs_path}/_delta_log", name="delta_log"),
+            RowExists(full_table_name, "message", unique_message, contains=True, name="unique_message"),
+        ], timeout=timeout)
+    finally:
+        if runner:
+            runner.session.close()
+    
+    # 1. Check if Delta table files exist in DBFS
+    validation_results["delta_table_exists"] = results["delta_table"]["passed"]
+    if validation_results["delta_table_exists"]:
         validation_results["delta_table_path"] = dbfs_path
         print(f"✓ Delta table exists at {dbfs_path}")
-    except Exception as e:
-        validation_results["delta_table_exists"] = False
-        validation_results["delta_table_error"] = str(e)
-        print(f"✗ Delta table not found: {e}")
-        # If no Delta table, can't proceed with other validations
-        validation_results["overall_valid"] = False
-        return validation_results
+    else:
+        validation_results["delta_table_error"] = results["delta_table"]["error"]
+        print(f"✗ Delta table not found: {results['delta_table']['error']}")
     
     # 2. Check Delta table structure (basic validation)
-    try:
-        if time.time() - start_time > timeout:
-            raise TimeoutError("Validation timeout reached")
-            
-        # Check for Delta log directory
-        delta_log_path = config["delta_table_path"].replace("dbfs:", "") + "/_delta_log"
-        try:
-            delta_log_info = client.dbfs.get_status(delta_log_path)
-            validation_results["delta_log_exists"] = True
-            print(f"✓ Delta log directory exists")
-        except:
-            validation_results["delta_log_exists"] = False
-            print(f"⚠ Delta log directory not found")
-            
-    except Exception as e:
-        validation_results["delta_structure_error"] = str(e)
-        print(f"⚠ Delta table structure validation failed: {e}")
+    validation_results["delta_log_exists"] = results["delta_log"]["passed"]
+    if validation_results["delta_log_exists"]:
+        print(f"✓ Delta log directory exists")
+    else:
+        print(f"⚠ Delta log directory not found")
     
-    # 3. Try SQL validation if warehouse is available
-    warehouse_id = extract_warehouse_id_from_http_path(config.get("http_path", ""))
-    if warehouse_id:
-        try:
-            if time.time() - start_time > timeout:
-                raise TimeoutError("Validation timeout reached")
-            
-            host = config["host"]
-            token = config["token"]
-            catalog = config["catalog"]
-            schema = config["schema"]
-            table = config["table"]
-            
-            print(f"🔍 Attempting SQL validation using warehouse {warehouse_id}")
-            
-            # Check if table exists and contains our unique message
-            content_query = f"""
-            SELECT * FROM {catalog}.{schema}.{table}
-            WHERE CAST(message AS STRING) LIKE '%{unique_message}%'
-            OR CAST(message AS STRING) = '{unique_message}'
-            """
-            
-            result = execute_sql_query(host, token, warehouse_id, content_query, catalog, schema, timeout=30)
-            
-            if result["success"]:
-                validation_results["sql_validation"] = True
-                validation_results["unique_message_found"] = len(result["data"]) > 0
-                validation_results["sql_row_count"] = result["row_count"]
-                
-                if validation_results["unique_message_found"]:
-                    print(f"✓ Found unique message '{unique_message}' in table data")
-                    validation_results["table_data"] = result["data"][:3]  # Store first few rows for debugging
-                else:
-                    print(f"⚠ Unique message '{unique_message}' not found in table data")
-                    # Try a broader search
-                    all_data_query = f"SELECT * FROM {catalog}.{schema}.{table} LIMIT 5"
-                    all_result = execute_sql_query(host, token, warehouse_id, all_data_query, catalog, schema, timeout=30)
-                    if all_result["success"]:
-                        validation_results["sample_table_data"] = all_result["data"]
-                        print(f"Sample table data: {all_result['data']}")
-            else:
-                validation_results["sql_validation"] = False
-                validation_results["sql_error"] = result["error"]
-                print(f"⚠ SQL validation failed: {result['error']}")
-                
-        except Exception as e:
-            validation_results["sql_validation"] = False
-            validation_results["sql_error"] = str(e)
-            print(f"⚠ SQL validation failed with error: {e}")
+    # 3. SQL validation if warehouse is available
+    message_result = results["unique_message"]
+    if message_result["error"] is None:
+        validation_results["sql_validation"] = True
+        validation_results["unique_message_found"] = message_result["passed"]
+        validation_results["sql_row_count"] = int(message_result["actual"] or 0)
+        
+        if validation_results["unique_message_found"]:
+            print(f"✓ Found unique message '{unique_message}' in table data")
+        else:
+            print(f"⚠ Unique message '{unique_message}' not found in table data")
+            # Sample the table to help debug the failure
+            all_data_query = f"SELECT * FROM {full_table_name} LIMIT 5"
+            all_result = execute_sql_query(config["host"], config["token"], warehouse_id, all_data_query,
+                                           config["catalog"], config["schema"], timeout=30)
+            if all_result["success"]:
+                validation_results["sample_table_data"] = all_result["data"]
+                print(f"Sample table data: {all_result['data']}")
     else:
         validation_results["sql_validation"] = False
-        validation_results["sql_error"] = "No warehouse ID available for SQL validation"
-        print(f"⚠ No warehouse ID available, skipping SQL validation")
+        validation_results["sql_error"] = message_result["error"]
+        print(f"⚠ SQL validation failed: {message_result['error']}")
     
     # 4. Overall validation result
     validation_results["overall_valid"] = (
@@ -133,13 +101,6 @@ def validate_hello_world_results(client, config, timeout=60):
         (validation_results.get("unique_message_found", False) or not validation_results.get("sql_validation", False))
     )
     
-    # If SQL validation worked, require unique message to be found
-    if validation_results.get("sql_validation", False):
-        validation_results["overall_valid"] = (
-            validation_results["overall_valid"] and 
-            validation_results.get("unique_message_found", False)
-        )
-    
     if validation_results["overall_valid"]:
         print(f"✓ Hello World validation passed! Unique message: {unique_message}")
     else:
@@ -1,11 +1,11 @@
 # Import from the Model directory
 from model.Run_Model import run_model
 from model.Configure_Model import set_up_model_configs, remove_model_configs
+from Environment.PostgreSQL import pooled_connection
 import os
 import importlib
 import pytest
 import time
-import psycopg2
 import uuid
 
 # Dynamic config loading
@@ -114,60 +114,52 @@ def test_postgresql_agent_add_record(request, postgres_resource, supabase_accoun
         # SECTION 3: VERIFY THE OUTCOMES
         
         # Connect to database to verify results
-        db_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database=created_db_name,
-            sslmode="require",
-        )
-        db_cursor = db_connection.cursor()
+        with pooled_connection(created_db_name) as db_connection:
+            db_cursor = db_connection.cursor()
         
-        try:
-            # Step 2: Verify Alice Green was added
-            db_cursor.execute("SELECT name, email, age FROM users WHERE name = 'Alice Green'")
-            alice_record = db_cursor.fetchone()
+            try:
+                # Step 2: Verify Alice Green was added
+                db_cursor.execute("SELECT name, email, age FROM users WHERE name = 'Alice Green'")
+                alice_record = db_cursor.fetchone()
             
-            if alice_record and alice_record == ("Alice Green", "alice@example.com", 28):
-                test_steps[1]["status"] = "passed"
-                test_steps[1]["Result_Message"] = f"Alice Green record found with correct data: {alice_record}"
-            else:
-                test_steps[1]["status"] = "failed" 
-                test_steps[1]["Result_Message"] = f"Alice Green record incorrect or missing. Found: {alice_record}"
-                raise AssertionError("Agent failed to insert Alice Green correctly")
+                if alice_record and alice_record == ("Alice Green", "alice@example.com", 28):
+                    test_steps[1]["status"] = "passed"
+                    test_steps[1]["Result_Message"] = f"Alice Green record found with correct data: {alice_record}"
+                else:
+                    test_steps[1]["status"] = "failed" 
+                    test_steps[1]["Result_Message"] = f"Alice Green record incorrect or missing. Found: {alice_record}"
+                    raise AssertionError("Agent failed to insert Alice Green correctly")
             
-            # Step 3: Verify original records are intact
-            db_cursor.execute("SELECT name, email, age FROM users WHERE name IN ('John Doe', 'Jane Smith', 'Bob Johnson') ORDER BY name")
-            original_records = db_cursor.fetchall()
+                # Step 3: Verify original records are intact
+                db_cursor.execute("SELECT name, email, age FROM users WHERE name IN ('John Doe', 'Jane Smith', 'Bob Johnson') ORDER BY name")
+                original_records = db_cursor.fetchall()
             
-            expected_original = [
-                ("Bob Johnson", "bob@example.com", 35),
-                ("Jane Smith", "jane@example.com", 25), 
-                ("John Doe", "john@example.com", 30)
-            ]
+                expected_original = [
+                    ("Bob Johnson", "bob@example.com", 35),
+                    ("Jane Smith", "jane@example.com", 25), 
+                    ("John Doe", "john@example.com", 30)
+                ]
             
-            if original_records == expected_original:
-                test_steps[2]["status"] = "passed"
-                test_steps[2]["Result_Message"] = "Original records preserved correctly"
-            else:
-                test_steps[2]["status"] = "failed"
-                test_steps[2]["Result_Message"] = f"Original records modified. Expected: {expected_original}, Got: {original_records}"
-                raise AssertionError("Agent modified existing records incorrectly")
+                if original_records == expected_original:
+                    test_steps[2]["status"] = "passed"
+                    test_steps[2]["Result_Message"] = "Original records preserved correctly"
+                else:
+                    test_steps[2]["status"] = "failed"
+                    test_steps[2]["Result_Message"] = f"Original records modified. Expected: {expected_original}, Got: {original_records}"
+                    raise AssertionError("Agent modified existing records incorrectly")
             
-            # Final verification: Total record count should be 4
-            db_cursor.execute("SELECT COUNT(*) FROM users")
-            total_count = db_cursor.fetchone()[0]
+                # Final verification: Total record count should be 4
+                db_cursor.execute("SELECT COUNT(*) FROM users")
+                total_count = db_cursor.fetchone()[0]
             
-            if total_count == 4:
-                    # Test completed successfully - Alice Green added without modifying existing records
-                assert True, "Add Record to PostgreSQL Agent test passed - record inserted correctly"
-            else:
-                raise AssertionError(f"Unexpected record count. Expected 4, got {total_count}")
+                if total_count == 4:
+                        # Test completed successfully - Alice Green added without modifying existing records
+                    assert True, "Add Record to PostgreSQL Agent test passed - record inserted correctly"
+                else:
+                    raise AssertionError(f"Unexpected record count. Expected 4, got {total_count}")
         
-        finally:
-            db_cursor.close()
-            db_connection.close()
+            finally:
+                db_cursor.close()
 
     except Exception as e:
         # Update any remaining test steps that didn't reach
@@ -1,11 +1,11 @@
 # Import from the Model directory
 from model.Run_Model import run_model
 from model.Configure_Model import set_up_model_configs, remove_model_configs
+from Environment.PostgreSQL import pooled_connection
 import os
 import importlib
 import pytest
 import time
-import psycopg2
 import uuid
 
 # Dynamic config loading
@@ -104,30 +104,22 @@ def test_postgresql_agent_denormalized_normalized_many_to_many(request, postgres
         )
 
         # DEMONSTRATE THE DENORMALIZED PROBLEM FIRST (Layer 1: Basic validation)
-        db_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database=created_db_name,
-            sslmode="require",
-        )
-        db_cursor = db_connection.cursor()
+        with pooled_connection(created_db_name) as db_connection:
+            db_cursor = db_connection.cursor()
         
-        # Demonstrate the denormalization problem
-        db_cursor.execute("SELECT title, authors FROM books_bad WHERE authors ILIKE '%Gamma%'")
-        problem_result = db_cursor.fetchall()
+            # Demonstrate the denormalization problem
+            db_cursor.execute("SELECT title, authors FROM books_bad WHERE authors ILIKE '%Gamma%'")
+            problem_result = db_cursor.fetchall()
         
-        if len(problem_result) == 1 and 'Gamma,Others' in str(problem_result[0]):
-            test_steps[0]["status"] = "passed"
-            test_steps[0]["Result_Message"] = f"Denormalized problem confirmed: Co-authors bundled as comma-separated string: {problem_result}"
-        else:
-            test_steps[0]["status"] = "failed"
-            test_steps[0]["Result_Message"] = f"Denormalized problem demonstration failed: {problem_result}"
-            raise AssertionError("Initial denormalized problem setup validation failed")
+            if len(problem_result) == 1 and 'Gamma,Others' in str(problem_result[0]):
+                test_steps[0]["status"] = "passed"
+                test_steps[0]["Result_Message"] = f"Denormalized problem confirmed: Co-authors bundled as comma-separated string: {problem_result}"
+            else:
+                test_steps[0]["status"] = "failed"
+                test_steps[0]["Result_Message"] = f"Denormalized problem demonstration failed: {problem_result}"
+                raise AssertionError("Initial denormalized problem setup validation failed")
         
-        db_cursor.close()
-        db_connection.close()
+            db_cursor.close()
 
         # Running model on database: {created_db_name}
 
@@ -154,106 +146,98 @@ def test_postgresql_agent_denormalized_normalized_many_to_many(request, postgres
         # SECTION 3: VERIFY THE OUTCOMES
         
         # Reconnect to verify the agent's normalized solution
-        db_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database=created_db_name,
-            sslmode="require",
-        )
-        db_cursor = db_connection.cursor()
+        with pooled_connection(created_db_name) as db_connection:
+            db_cursor = db_connection.cursor()
         
-        try:
-            # Layer 1: Basic existence checks - Did agent create normalized tables?
-            db_cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND table_name != 'books_bad'
-                ORDER BY table_name
-            """)
+            try:
+                # Layer 1: Basic existence checks - Did agent create normalized tables?
+                db_cursor.execute("""
+                    SELECT table_name 
+                    FROM information_schema.tables 
+                    WHERE table_schema = 'public' 
+                    AND table_name != 'books_bad'
+                    ORDER BY table_name
+                """)
             
-            new_tables = [row[0] for row in db_cursor.fetchall()]
+                new_tables = [row[0] for row in db_cursor.fetchall()]
             
-            if len(new_tables) >= 2:  # Expecting normalized structure (e.g., authors, books, junction)
-                test_steps[2]["status"] = "passed"
-                test_steps[2]["Result_Message"] = f"Normalized structure created with tables: {new_tables}"
-            else:
-                test_steps[2]["status"] = "failed"
-                test_steps[2]["Result_Message"] = f"Insufficient normalization. New tables: {new_tables}"
-                raise AssertionError("Agent did not create properly normalized structure")
+                if len(new_tables) >= 2:  # Expecting normalized structure (e.g., authors, books, junction)
+                    test_steps[2]["status"] = "passed"
+                    test_steps[2]["Result_Message"] = f"Normalized structure created with tables: {new_tables}"
+                else:
+                    test_steps[2]["status"] = "failed"
+                    test_steps[2]["Result_Message"] = f"Insufficient normalization. New tables: {new_tables}"
+                    raise AssertionError("Agent did not create properly normalized structure")
             
-            # Layer 2: Content validation - Is original data preserved in normalized form?
-            books_found = False
-            authors_found = False
+                # Layer 2: Content validation - Is original data preserved in normalized form?
+                books_found = False
+                authors_found = False
             
-            for table in new_tables:
-                try:
-                    db_cursor.execute(f"SELECT * FROM {table} LIMIT 10")
-                    sample_data = db_cursor.fetchall()
+                for table in new_tables:
+                    try:
+                        db_cursor.execute(f"SELECT * FROM {table} LIMIT 10")
+                        sample_data = db_cursor.fetchall()
                     
-                    # Check for book titles
-                    if any('Design Patterns' in str(row) or 'Clean Code' in str(row) for row in sample_data):
-                        books_found = True
+                        # Check for book titles
+                        if any('Design Patterns' in str(row) or 'Clean Code' in str(row) for row in sample_data):
+                            books_found = True
                     
-                    # Check for author names  
-                    if any('Gamma' in str(row) or 'Robert Martin' in str(row) or 'Others' in str(row) for row in sample_data):
-                        authors_found = True
+                        # Check for author names  
+                        if any('Gamma' in str(row) or 'Robert Martin' in str(row) or 'Others' in str(row) for row in sample_data):
+                            authors_found = True
                         
-                except Exception as e:
-                    pass  # Table query failed, likely expected
-                    continue
+                    except Exception as e:
+                        pass  # Table query failed, likely expected
+                        continue
             
-            if books_found and authors_found:
-                test_steps[3]["status"] = "passed"
-                test_steps[3]["Result_Message"] = "Data preservation verified: Books and authors found in normalized structure"
-            else:
-                test_steps[3]["status"] = "failed"
-                test_steps[3]["Result_Message"] = f"Data preservation failed during normalization: books={books_found}, authors={authors_found}"
-                raise AssertionError("Original data not preserved during denormalized → normalized transformation")
+                if books_found and authors_found:
+                    test_steps[3]["status"] = "passed"
+                    test_steps[3]["Result_Message"] = "Data preservation verified: Books and authors found in normalized structure"
+                else:
+                    test_steps[3]["status"] = "failed"
+                    test_steps[3]["Result_Message"] = f"Data preservation failed during normalization: books={books_found}, authors={authors_found}"
+                    raise AssertionError("Original data not preserved during denormalized → normalized transformation")
             
-            # Layer 3: Functional validation - THE CRITICAL TEST
-            # Are co-authors properly separated (denormalization resolved)?
-            co_authors_separated = False
-            separation_evidence = ""
+                # Layer 3: Functional validation - THE CRITICAL TEST
+                # Are co-authors properly separated (denormalization resolved)?
+                co_authors_separated = False
+                separation_evidence = ""
             
-            for table in new_tables:
-                try:
-                    db_cursor.execute(f"SELECT * FROM {table}")
-                    all_data = db_cursor.fetchall()
+                for table in new_tables:
+                    try:
+                        db_cursor.execute(f"SELECT * FROM {table}")
+                        all_data = db_cursor.fetchall()
                     
-                    # Look for evidence that "Gamma" and "Others" exist as separate entities
-                    gamma_rows = [row for row in all_data if 'Gamma' in str(row)]
-                    others_rows = [row for row in all_data if 'Others' in str(row)]
+                        # Look for evidence that "Gamma" and "Others" exist as separate entities
+                        gamma_rows = [row for row in all_data if 'Gamma' in str(row)]
+                        others_rows = [row for row in all_data if 'Others' in str(row)]
                     
-                    # Critical check: Are Gamma and Others in separate rows (not bundled)?
-                    gamma_separate = any('Gamma' in str(row) and 'Others' not in str(row) for row in gamma_rows)
-                    others_separate = any('Others' in str(row) and 'Gamma' not in str(row) for row in others_rows)
+                        # Critical check: Are Gamma and Others in separate rows (not bundled)?
+                        gamma_separate = any('Gamma' in str(row) and 'Others' not in str(row) for row in gamma_rows)
+                        others_separate = any('Others' in str(row) and 'Gamma' not in str(row) for row in others_rows)
                     
-                    if gamma_separate and others_separate:
-                        co_authors_separated = True
-                        separation_evidence = f"Table '{table}': Gamma and Others found as separate normalized entities"
-                        break
+                        if gamma_separate and others_separate:
+                            co_authors_separated = True
+                            separation_evidence = f"Table '{table}': Gamma and Others found as separate normalized entities"
+                            break
                         
-                except Exception as e:
-                    continue
+                    except Exception as e:
+                        continue
             
-            if co_authors_separated:
-                test_steps[4]["status"] = "passed"
-                test_steps[4]["Result_Message"] = f"SUCCESS: Denormalized → Normalized transformation complete! {separation_evidence}"
-            else:
-                test_steps[4]["status"] = "failed"
-                test_steps[4]["Result_Message"] = "Co-authors still appear bundled - denormalized → normalized transformation incomplete"
-                raise AssertionError("Core denormalization issue not resolved - many-to-many relationships still bundled")
+                if co_authors_separated:
+                    test_steps[4]["status"] = "passed"
+                    test_steps[4]["Result_Message"] = f"SUCCESS: Denormalized → Normalized transformation complete! {separation_evidence}"
+                else:
+                    test_steps[4]["status"] = "failed"
+                    test_steps[4]["Result_Message"] = "Co-authors still appear bundled - denormalized → normalized transformation incomplete"
+                    raise AssertionError("Core denormalization issue not resolved - many-to-many relationships still bundled")
             
-            # Final success
-                    # Test completed successfully - denormalized co-authorship issue resolved
-            assert True, "Denormalized → Normalized many-to-many transformation successful - co-authors properly separated"
+                # Final success
+                        # Test completed successfully - denormalized co-authorship issue resolved
+                assert True, "Denormalized → Normalized many-to-many transformation successful - co-authors properly separated"
         
-        finally:
-            db_cursor.close()
-            db_connection.close()
+            finally:
+                db_cursor.close()
 
     except Exception as e:
         # Update any remaining test steps that didn't reach
@@ -1,11 +1,11 @@
 # Import from the Model directory
 from model.Run_Model import run_model
 from model.Configure_Model import set_up_model_configs, remove_model_configs
+from Environment.PostgreSQL import pooled_connection
 import os
 import importlib
 import pytest
 import time
-import psycopg2
 import uuid
 
 # Dynamic config loading
@@ -99,52 +99,44 @@ def test_postgresql_agent_integer_division_fix(request, postgres_resource, supab
         )
 
         # DEMONSTRATE THE INTEGER DIVISION PROBLEM FIRST
-        db_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database=created_db_name,
-            sslmode="require",
-        )
-        db_cursor = db_connection.cursor()
+        with pooled_connection(created_db_name) as db_connection:
+            db_cursor = db_connection.cursor()
 
-        print("\n=== BEFORE MODEL RUN - DATABASE STATE ===")
+            print("\n=== BEFORE MODEL RUN - DATABASE STATE ===")
         
-        # Show current table structure
-        db_cursor.execute("""
-            SELECT column_name, data_type, is_nullable
-            FROM information_schema.columns
-            WHERE table_name = 'purchases_bad'
-            ORDER BY ordinal_position
-        """)
-        initial_schema = db_cursor.fetchall()
-        print(f"INITIAL SCHEMA: {initial_schema}")
+            # Show current table structure
+            db_cursor.execute("""
+                SELECT column_name, data_type, is_nullable
+                FROM information_schema.columns
+                WHERE table_name = 'purchases_bad'
+                ORDER BY ordinal_position
+            """)
+            initial_schema = db_cursor.fetchall()
+            print(f"INITIAL SCHEMA: {initial_schema}")
         
-        # Show current data
-        db_cursor.execute("SELECT * FROM purchases_bad ORDER BY user_id")
-        initial_data = db_cursor.fetchall()
-        print(f"INITIAL DATA: {initial_data}")
-
-        # Demonstrate integer division truncation problem
-        db_cursor.execute("SELECT user_id, total_items, total_orders, total_items/total_orders AS avg_items FROM purchases_bad WHERE total_orders > 0")
-        problem_results = db_cursor.fetchall()
-        print(f"INTEGER DIVISION RESULTS: {problem_results}")
-
-        # Check if all results are 0 (integer division truncation)
-        all_zero = all(result[3] == 0 for result in problem_results)
-        print(f"ALL RESULTS ARE ZERO: {all_zero}")
-
-        if all_zero and len(problem_results) >= 3:
-            test_steps[0]["status"] = "passed"
-            test_steps[0]["Result_Message"] = f"Integer division problem confirmed: All averages truncated to 0: {problem_results}"
-        else:
-            test_steps[0]["status"] = "failed"
-            test_steps[0]["Result_Message"] = f"Integer division problem not demonstrated as expected: {problem_results}"
-            raise AssertionError("Initial integer division problem setup validation failed")
-
-        db_cursor.close()
-        db_connection.close()
+            # Show current data
+            db_cursor.execute("SELECT * FROM purchases_bad ORDER BY user_id")
+            initial_data = db_cursor.fetchall()
+            print(f"INITIAL DATA: {initial_data}")
+
+            # Demonstrate integer division truncation problem
+            db_cursor.execute("SELECT user_id, total_items, total_orders, total_items/total_orders AS avg_items FROM purchases_bad WHERE total_orders > 0")
+            problem_results = db_cursor.fetchall()
+            print(f"INTEGER DIVISION RESULTS: {problem_results}")
+
+            # Check if all results are 0 (integer division truncation)
+            all_zero = all(result[3] == 0 for result in problem_results)
+            print(f"ALL RESULTS ARE ZERO: {all_zero}")
+
+            if all_zero and len(problem_results) >= 3:
+                test_steps[0]["status"] = "passed"
+                test_steps[0]["Result_Message"] = f"Integer division problem confirmed: All averages truncated to 0: {problem_results}"
+            else:
+                test_steps[0]["status"] = "failed"
+                test_steps[0]["Result_Message"] = f"Integer division problem not demonstrated as expected: {problem_results}"
+                raise AssertionError("Initial integer division problem setup validation failed")
+
+            db_cursor.close()
         
         print(f"\n=== ABOUT TO RUN MODEL ===")
         print(f"Database: {created_db_name}")
@@ -173,306 +165,298 @@ def test_postgresql_agent_integer_division_fix(request, postgres_resource, supab
         # SECTION 3: VERIFY THE OUTCOMES
 
         # Reconnect to verify the agent's solution
-        db_connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOSTNAME"),
-            port=os.getenv("POSTGRES_PORT"),
-            user=os.getenv("POSTGRES_USERNAME"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database=created_db_name,
-            sslmode="require",
-        )
-        db_cursor = db_connection.cursor()
-
-        print("\n=== AFTER MODEL RUN - DATABASE STATE ===")
-
-        try:
-            # Show all tables in the database
-            db_cursor.execute("""
-                SELECT table_schema, table_name, table_type
-                FROM information_schema.tables
-                WHERE table_schema NOT IN ('information_schema', 'pg_catalog')
-                ORDER BY table_schema, table_name
-            """)
-            all_tables = db_cursor.fetchall()
-            print(f"ALL TABLES: {all_tables}")
-
-            # Show all views in the database
-            db_cursor.execute("""
-                SELECT table_schema, table_name
-                FROM information_schema.views
-                WHERE table_schema NOT IN ('information_schema', 'pg_catalog')
-            """)
-            all_views = db_cursor.fetchall()
-            print(f"ALL VIEWS: {all_views}")
-
-            # Show all functions
-            db_cursor.execute("""
-                SELECT routine_schema, routine_name, routine_type
-                FROM information_schema.routines
-                WHERE routine_schema NOT IN ('information_schema', 'pg_catalog')
-            """)
-            all_functions = db_cursor.fetchall()
-            print(f"ALL FUNCTIONS: {all_functions}")
-
-            # Check current schema of purchases_bad table
-            db_cursor.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns
-                WHERE table_name = 'purchases_bad'
-                ORDER BY ordinal_position
-            """)
-            current_schema = db_cursor.fetchall()
-            print(f"CURRENT PURCHASES_BAD SCHEMA: {current_schema}")
-
-            # Check current data in purchases_bad
-            db_cursor.execute("SELECT * FROM purchases_bad ORDER BY user_id")
-            current_data = db_cursor.fetchall()
-            print(f"CURRENT PURCHASES_BAD DATA: {current_data}")
-
-            # Test current division behavior
-            db_cursor.execute("SELECT user_id, total_items, total_orders, total_items/total_orders AS division_result FROM purchases_bad WHERE total_orders > 0")
-            current_division = db_cursor.fetchall()
-            print(f"CURRENT DIVISION RESULTS: {current_division}")
-
-            # Look for evidence of the agent's fix - check if proper decimal calculations now exist
-            # The agent might have created new columns, views, functions, or modified existing data types
-
-            # First, check if original data is preserved
-            db_cursor.execute("SELECT COUNT(*) FROM purchases_bad")
-            row_count = db_cursor.fetchone()[0]
-            print(f"ROW COUNT: {row_count}")
-
-            if row_count == 3:
-                test_steps[3]["status"] = "passed"
-                test_steps[3]["Result_Message"] = "Original data preserved (3 rows maintained)"
-            else:
-                test_steps[3]["status"] = "failed"
-                test_steps[3]["Result_Message"] = f"Data preservation failed: Expected 3 rows, found {row_count}"
-                raise AssertionError("Original data not preserved during fix")
+        with pooled_connection(created_db_name) as db_connection:
+            db_cursor = db_connection.cursor()
+
+            print("\n=== AFTER MODEL RUN - DATABASE STATE ===")
+
+            try:
+                # Show all tables in the database
+                db_cursor.execute("""
+                    SELECT table_schema, table_name, table_type
+                    FROM information_schema.tables
+                    WHERE table_schema NOT IN ('information_schema', 'pg_catalog')
+                    ORDER BY table_schema, table_name
+                """)
+                all_tables = db_cursor.fetchall()
+                print(f"ALL TABLES: {all_tables}")
+
+                # Show all views in the database
+                db_cursor.execute("""
+                    SELECT table_schema, table_name
+                    FROM information_schema.views
+                    WHERE table_schema NOT IN ('information_schema', 'pg_catalog')
+                """)
+                all_views = db_cursor.fetchall()
+                print(f"ALL VIEWS: {all_views}")
+
+                # Show all functions
+                db_cursor.execute("""
+                    SELECT routine_schema, routine_name, routine_type
+                    FROM information_schema.routines
+                    WHERE routine_schema NOT IN ('information_schema', 'pg_catalog')
+                """)
+                all_functions = db_cursor.fetchall()
+                print(f"ALL FUNCTIONS: {all_functions}")
+
+                # Check current schema of purchases_bad table
+                db_cursor.execute("""
+                    SELECT column_name, data_type, is_nullable, column_default
+                    FROM information_schema.columns
+                    WHERE table_name = 'purchases_bad'
+                    ORDER BY ordinal_position
+                """)
+                current_schema = db_cursor.fetchall()
+                print(f"CURRENT PURCHASES_BAD SCHEMA: {current_schema}")
+
+                # Check current data in purchases_bad
+                db_cursor.execute("SELECT * FROM purchases_bad ORDER BY user_id")
+                current_data = db_cursor.fetchall()
+                print(f"CURRENT PURCHASES_BAD DATA: {current_data}")
+
+                # Test current division behavior
+                db_cursor.execute("SELECT user_id, total_items, total_orders, total_items/total_orders AS division_result FROM purchases_bad WHERE total_orders > 0")
+                current_division = db_cursor.fetchall()
+                print(f"CURRENT DIVISION RESULTS: {current_division}")
+
+                # Look for evidence of the agent's fix - check if proper decimal calculations now exist
+                # The agent might have created new columns, views, functions, or modified existing data types
+
+                # First, check if original data is preserved
+                db_cursor.execute("SELECT COUNT(*) FROM purchases_bad")
+                row_count = db_cursor.fetchone()[0]
+                print(f"ROW COUNT: {row_count}")
+
+                if row_count == 3:
+                    test_steps[3]["status"] = "passed"
+                    test_steps[3]["Result_Message"] = "Original data preserved (3 rows maintained)"
+                else:
+                    test_steps[3]["status"] = "failed"
+                    test_steps[3]["Result_Message"] = f"Data preservation failed: Expected 3 rows, found {row_count}"
+                    raise AssertionError("Original data not preserved during fix")
             
-            # Look for the agent's solution - could be new columns, views, or altered table structure
-            # Check for any new columns that might contain proper averages
-            db_cursor.execute("""
-                SELECT column_name, data_type
-                FROM information_schema.columns
-                WHERE table_name = 'purchases_bad'
-                AND column_name LIKE '%avg%'
-            """)
-            avg_columns = db_cursor.fetchall()
-            print(f"AVG COLUMNS FOUND: {avg_columns}")
+                # Look for the agent's solution - could be new columns, views, or altered table structure
+                # Check for any new columns that might contain proper averages
+                db_cursor.execute("""
+                    SELECT column_name, data_type
+                    FROM information_schema.columns
+                    WHERE table_name = 'purchases_bad'
+                    AND column_name LIKE '%avg%'
+                """)
+                avg_columns = db_cursor.fetchall()
+                print(f"AVG COLUMNS FOUND: {avg_columns}")
+
+                # Check for any new views that might handle the calculation
+                db_cursor.execute("""
+                    SELECT table_name
+                    FROM information_schema.views
+                    WHERE table_schema = 'public'
+                """)
+                views = db_cursor.fetchall()
+                print(f"VIEWS FOUND: {views}")
+
+                # Check for any new functions that might handle the calculation
+                db_cursor.execute("""
+                    SELECT routine_name
+                    FROM information_schema.routines
+                    WHERE routine_type = 'FUNCTION'
+                    AND specific_schema = 'public'
+                """)
+                functions = db_cursor.fetchall()
+                print(f"FUNCTIONS FOUND: {functions}")
+
+                # Try different approaches the agent might have used
+                decimal_results_found = False
+                solution_method = ""
+            
+                print(f"\n=== TESTING DIFFERENT SOLUTION APPROACHES ===")
 
-            # Check for any new views that might handle the calculation
-            db_cursor.execute("""
-                SELECT table_name
-                FROM information_schema.views
-                WHERE table_schema = 'public'
-            """)
-            views = db_cursor.fetchall()
-            print(f"VIEWS FOUND: {views}")
+                # Method 1: Check if agent created a computed column
+                if avg_columns:
+                    print(f"Testing Method 1: Computed column approach with {avg_columns}")
+                    try:
+                        db_cursor.execute("SELECT user_id, avg_items_per_order FROM purchases_bad ORDER BY user_id")
+                        computed_results = db_cursor.fetchall()
+                        print(f"COMPUTED COLUMN RESULTS: {computed_results}")
 
-            # Check for any new functions that might handle the calculation
-            db_cursor.execute("""
-                SELECT routine_name
-                FROM information_schema.routines
-                WHERE routine_type = 'FUNCTION'
-                AND specific_schema = 'public'
-            """)
-            functions = db_cursor.fetchall()
-            print(f"FUNCTIONS FOUND: {functions}")
+                        # Validate the results
+                        expected_results = [(1, 0.5), (2, 0.4286), (3, 0.75)]
 
-            # Try different approaches the agent might have used
-            decimal_results_found = False
-            solution_method = ""
-            
-            print(f"\n=== TESTING DIFFERENT SOLUTION APPROACHES ===")
-
-            # Method 1: Check if agent created a computed column
-            if avg_columns:
-                print(f"Testing Method 1: Computed column approach with {avg_columns}")
-                try:
-                    db_cursor.execute("SELECT user_id, avg_items_per_order FROM purchases_bad ORDER BY user_id")
-                    computed_results = db_cursor.fetchall()
-                    print(f"COMPUTED COLUMN RESULTS: {computed_results}")
-
-                    # Validate the results
-                    expected_results = [(1, 0.5), (2, 0.4286), (3, 0.75)]
-
-                    for i, (user_id, avg_val) in enumerate(computed_results[:3]):
-                        expected_avg = expected_results[i][1]
-                        if abs(float(avg_val) - expected_avg) < 0.01:  # Allow small floating point differences
-                            decimal_results_found = True
+                        for i, (user_id, avg_val) in enumerate(computed_results[:3]):
+                            expected_avg = expected_results[i][1]
+                            if abs(float(avg_val) - expected_avg) < 0.01:  # Allow small floating point differences
+                                decimal_results_found = True
 
-                    solution_method = f"Generated column: {avg_columns[0][0]}"
-                    print(f"Method 1 Results: decimal_results_found={decimal_results_found}")
-                except Exception as e:
-                    print(f"Method 1 Failed: {e}")
-                    pass
-            else:
-                print("Method 1: No avg columns found, skipping")
+                        solution_method = f"Generated column: {avg_columns[0][0]}"
+                        print(f"Method 1 Results: decimal_results_found={decimal_results_found}")
+                    except Exception as e:
+                        print(f"Method 1 Failed: {e}")
+                        pass
+                else:
+                    print("Method 1: No avg columns found, skipping")
+
+                # Method 2: Check if agent created a view
+                if views and not decimal_results_found:
+                    print(f"Testing Method 2: View approach with {views}")
+                    for view in views:
+                        try:
+                            view_name = view[0]
+                            db_cursor.execute(f"SELECT user_id, * FROM {view_name} ORDER BY user_id")
+                            view_results = db_cursor.fetchall()
+                            print(f"VIEW {view_name} RESULTS: {view_results}")
+
+                            # Look for decimal values in any column
+                            for row in view_results:
+                                for val in row[1:]:  # Skip user_id
+                                    if val is not None and isinstance(val, (float, int)) and 0 < val < 1:
+                                        decimal_results_found = True
+                                        solution_method = f"View: {view_name}"
+                                        break
+                                if decimal_results_found:
+                                    break
 
-            # Method 2: Check if agent created a view
-            if views and not decimal_results_found:
-                print(f"Testing Method 2: View approach with {views}")
-                for view in views:
-                    try:
-                        view_name = view[0]
-                        db_cursor.execute(f"SELECT user_id, * FROM {view_name} ORDER BY user_id")
-                        view_results = db_cursor.fetchall()
-                        print(f"VIEW {view_name} RESULTS: {view_results}")
-
-                        # Look for decimal values in any column
-                        for row in view_results:
-                            for val in row[1:]:  # Skip user_id
-                                if val is not None and isinstance(val, (float, int)) and 0 < val < 1:
+                            print(f"Method 2 Results for {view_name}: decimal_results_found={decimal_results_found}")
+
+                        except Exception as e:
+                            print(f"Method 2 Failed for {view_name}: {e}")
+                            continue
+                else:
+                    print("Method 2: No views found or decimal results already found, skipping")
+
+                # Method 3: Check if agent created a function
+                if functions and not decimal_results_found:
+                    print(f"Testing Method 3: Function approach with {functions}")
+                    for func in functions:
+                        try:
+                            func_name = func[0]
+                            # Try to call the function
+                            db_cursor.execute(f"SELECT user_id, {func_name}(total_items, total_orders) FROM purchases_bad ORDER BY user_id")
+                            func_results = db_cursor.fetchall()
+                            print(f"FUNCTION {func_name} RESULTS: {func_results}")
+
+                            # Check for decimal results
+                            for user_id, avg_val in func_results:
+                                if avg_val is not None and isinstance(avg_val, (float, int)) and 0 < avg_val < 1:
                                     decimal_results_found = True
-                                    solution_method = f"View: {view_name}"
+                                    solution_method = f"Function: {func_name}"
                                     break
-                            if decimal_results_found:
-                                break
 
-                        print(f"Method 2 Results for {view_name}: decimal_results_found={decimal_results_found}")
+                            print(f"Method 3 Results for {func_name}: decimal_results_found={decimal_results_found}")
 
-                    except Exception as e:
-                        print(f"Method 2 Failed for {view_name}: {e}")
-                        continue
-            else:
-                print("Method 2: No views found or decimal results already found, skipping")
+                        except Exception as e:
+                            print(f"Method 3 Failed for {func_name}: {e}")
+                            continue
+                else:
+                    print("Method 3: No functions found or decimal results already found, skipping")
+            
+                # Method 4: Check if agent properly fixed the underlying data types (REQUIRED)
+                # This is now the primary validation - we require structural fixes, not workarounds
+                print(f"\n=== TESTING METHOD 4: DATA TYPE FIX ===")
+                db_cursor.execute("""
+                    SELECT column_name, data_type
+                    FROM information_schema.columns
+                    WHERE table_name = 'purchases_bad'
+                    AND column_name IN ('total_items', 'total_orders')
+                    ORDER BY column_name
+                """)
+                current_types = db_cursor.fetchall()
+                print(f"DEBUG: Raw column types from DB: {current_types}")
+
+                # Check if BOTH columns were properly changed to numeric types
+                items_type = next((col[1] for col in current_types if col[0] == 'total_items'), None)
+                orders_type = next((col[1] for col in current_types if col[0] == 'total_orders'), None)
+
+                print(f"DEBUG: Column types detected - total_items: {items_type}, total_orders: {orders_type}")
+
+                # Check for various numeric data types PostgreSQL might return
+                numeric_types = ['numeric', 'decimal', 'real', 'double precision', 'float']
+                proper_types_fixed = (items_type and any(nt in items_type.lower() for nt in numeric_types) and
+                                    orders_type and any(nt in orders_type.lower() for nt in numeric_types))
+            
+                print(f"DEBUG: proper_types_fixed = {proper_types_fixed}")
+                print(f"DEBUG: numeric_types checked: {numeric_types}")
 
-            # Method 3: Check if agent created a function
-            if functions and not decimal_results_found:
-                print(f"Testing Method 3: Function approach with {functions}")
-                for func in functions:
+                if proper_types_fixed:
+                    print("DEBUG: Data types were properly fixed, testing calculations...")
+                    # Test the calculation with the fixed types
                     try:
-                        func_name = func[0]
-                        # Try to call the function
-                        db_cursor.execute(f"SELECT user_id, {func_name}(total_items, total_orders) FROM purchases_bad ORDER BY user_id")
-                        func_results = db_cursor.fetchall()
-                        print(f"FUNCTION {func_name} RESULTS: {func_results}")
+                        db_cursor.execute("""
+                            SELECT user_id,
+                                   CASE WHEN total_orders > 0
+                                        THEN total_items / total_orders
+                                        ELSE NULL
+                                   END AS avg_items
+                            FROM purchases_bad
+                            ORDER BY user_id
+                        """)
+                        type_results = db_cursor.fetchall()
+                        print(f"DEBUG: Type-fixed calculation results: {type_results}")
 
                         # Check for decimal results
-                        for user_id, avg_val in func_results:
-                            if avg_val is not None and isinstance(avg_val, (float, int)) and 0 < avg_val < 1:
-                                decimal_results_found = True
-                                solution_method = f"Function: {func_name}"
-                                break
-
-                        print(f"Method 3 Results for {func_name}: decimal_results_found={decimal_results_found}")
-
-                    except Exception as e:
-                        print(f"Method 3 Failed for {func_name}: {e}")
-                        continue
-            else:
-                print("Method 3: No functions found or decimal results already found, skipping")
-            
-            # Method 4: Check if agent properly fixed the underlying data types (REQUIRED)
-            # This is now the primary validation - we require structural fixes, not workarounds
-            print(f"\n=== TESTING METHOD 4: DATA TYPE FIX ===")
-            db_cursor.execute("""
-                SELECT column_name, data_type
-                FROM information_schema.columns
-                WHERE table_name = 'purchases_bad'
-                AND column_name IN ('total_items', 'total_orders')
-                ORDER BY column_name
-            """)
-            current_types = db_cursor.fetchall()
-            print(f"DEBUG: Raw column types from DB: {current_types}")
-
-            # Check if BOTH columns were properly changed to numeric types
-            items_type = next((col[1] for col in current_types if col[0] == 'total_items'), None)
-            orders_type = next((col[1] for col in current_types if col[0] == 'total_orders'), None)
-
-            print(f"DEBUG: Column types detected - total_items: {items_type}, total_orders: {orders_type}")
-
-            # Check for various numeric data types PostgreSQL might return
-            numeric_types = ['numeric', 'decimal', 'real', 'double precision', 'float']
-            proper_types_fixed = (items_type and any(nt in items_type.lower() for nt in numeric_types) and
-                                orders_type and any(nt in orders_type.lower() for nt in numeric_types))
-            
-            print(f"DEBUG: proper_types_fixed = {proper_types_fixed}")
-            print(f"DEBUG: numeric_types checked: {numeric_types}")
-
-            if proper_types_fixed:
-                print("DEBUG: Data types were properly fixed, testing calculations...")
-                # Test the calculation with the fixed types
-                try:
-                    db_cursor.execute("""
-                        SELECT user_id,
-                               CASE WHEN total_orders > 0
-                                    THEN total_items / total_orders
-                                    ELSE NULL
-                               END AS avg_items
-                        FROM purchases_bad
-                        ORDER BY user_id
-                    """)
-                    type_results = db_cursor.fetchall()
-                    print(f"DEBUG: Type-fixed calculation results: {type_results}")
-
-                    # Check for decimal results
-                    decimal_found = any(result[1] is not None and 0 < result[1] < 1 for result in type_results)
+                        decimal_found = any(result[1] is not None and 0 < result[1] < 1 for result in type_results)
                     
-                    print(f"DEBUG: decimal_found={decimal_found}")
+                        print(f"DEBUG: decimal_found={decimal_found}")
                     
-                    if decimal_found:
-                        decimal_results_found = True
-                        solution_method = "Proper data type fix - columns changed to NUMERIC"
-                        print(f"DEBUG: Method 4 SUCCESS - decimal calculations working")
-
-                except Exception as e:
-                    print(f"DEBUG: Method 4 calculation test failed: {e}")
-                    # Even with proper types, calculation failed
-                    pass
-            else:
-                print("DEBUG: Data types were NOT properly fixed - still using integer types")
-
-            print(f"\n=== FINAL VALIDATION DECISIONS ===")
-            print(f"proper_types_fixed: {proper_types_fixed}")
-            print(f"decimal_results_found: {decimal_results_found}")
-            print(f"solution_method: '{solution_method}'")
-            print(f"avg_columns: {len(avg_columns) if avg_columns else 0}")
-            print(f"views: {len(views) if views else 0}")
-            print(f"functions: {len(functions) if functions else 0}")
-
-            # If proper structural fix wasn't implemented, this is a failure
-            if not proper_types_fixed and (avg_columns or views or functions):
-                workaround_type = "view" if views else "function" if functions else "computed column"
-                test_steps[2]["status"] = "failed"
-                test_steps[2]["Result_Message"] = f"INCORRECT SOLUTION: Agent created workaround ({workaround_type}) instead of fixing the underlying data structure. Original columns still have wrong data types: total_items={items_type}, total_orders={orders_type}"
-                print(f"DEBUG: Test failing at condition 1 - proper_types_fixed={proper_types_fixed}, workarounds found: avg_columns={len(avg_columns) if avg_columns else 0}, views={len(views) if views else 0}, functions={len(functions) if functions else 0}")
-                raise AssertionError("Agent used workaround instead of proper structural fix - original table columns must be changed to NUMERIC types")
+                        if decimal_found:
+                            decimal_results_found = True
+                            solution_method = "Proper data type fix - columns changed to NUMERIC"
+                            print(f"DEBUG: Method 4 SUCCESS - decimal calculations working")
+
+                    except Exception as e:
+                        print(f"DEBUG: Method 4 calculation test failed: {e}")
+                        # Even with proper types, calculation failed
+                        pass
+                else:
+                    print("DEBUG: Data types were NOT properly fixed - still using integer types")
+
+                print(f"\n=== FINAL VALIDATION DECISIONS ===")
+                print(f"proper_types_fixed: {proper_types_fixed}")
+                print(f"decimal_results_found: {decimal_results_found}")
+                print(f"solution_method: '{solution_method}'")
+                print(f"avg_columns: {len(avg_columns) if avg_columns else 0}")
+                print(f"views: {len(views) if views else 0}")
+                print(f"functions: {len(functions) if functions else 0}")
+
+                # If proper structural fix wasn't implemented, this is a failure
+                if not proper_types_fixed and (avg_columns or views or functions):
+                    workaround_type = "view" if views else "function" if functions else "computed column"
+                    test_steps[2]["status"] = "failed"
+                    test_steps[2]["Result_Message"] = f"INCORRECT SOLUTION: Agent created workaround ({workaround_type}) instead of fixing the underlying data structure. Original columns still have wrong data types: total_items={items_type}, total_orders={orders_type}"
+                    print(f"DEBUG: Test failing at condition 1 - proper_types_fixed={proper_types_fixed}, workarounds found: avg_columns={len(avg_columns) if avg_columns else 0}, views={len(views) if views else 0}, functions={len(functions) if functions else 0}")
+                    raise AssertionError("Agent used workaround instead of proper structural fix - original table columns must be changed to NUMERIC types")
             
-            # Debug output before final validation
-            print(f"DEBUG: Final validation state - proper_types_fixed={proper_types_fixed}, decimal_results_found={decimal_results_found}, solution_method='{solution_method}'")
+                # Debug output before final validation
+                print(f"DEBUG: Final validation state - proper_types_fixed={proper_types_fixed}, decimal_results_found={decimal_results_found}, solution_method='{solution_method}'")
             
-            # Validate structural fix and decimal results
-            if proper_types_fixed and decimal_results_found:
-                test_steps[2]["status"] = "passed"
-                test_steps[2]["Result_Message"] = f"SUCCESS: Proper structural fix implemented! {solution_method} - Integer division truncation fixed at the source"
-                print("DEBUG: TEST PASSED - Proper structural fix with working calculations!")
-            elif decimal_results_found and not proper_types_fixed:
-                workaround_type = "view" if views else "function" if functions else "computed column" if avg_columns else "unknown workaround"
-                test_steps[2]["status"] = "failed"
-                test_steps[2]["Result_Message"] = f"INCORRECT APPROACH: Agent created workaround instead of fixing underlying structure. Found: {workaround_type}"
-                print(f"DEBUG: Test failing at condition 2 - decimal_results_found={decimal_results_found}, proper_types_fixed={proper_types_fixed}")
-                raise AssertionError("Agent used workaround (view/function/computed column) instead of proper structural fix")
-            else:
-                test_steps[2]["status"] = "failed"
-                test_steps[2]["Result_Message"] = "No proper structural fix found - original table columns still have wrong data types"
-                print("DEBUG: Test failing at condition 3 - No acceptable solution found")
-                raise AssertionError("Agent did not properly fix the underlying data type issue")
+                # Validate structural fix and decimal results
+                if proper_types_fixed and decimal_results_found:
+                    test_steps[2]["status"] = "passed"
+                    test_steps[2]["Result_Message"] = f"SUCCESS: Proper structural fix implemented! {solution_method} - Integer division truncation fixed at the source"
+                    print("DEBUG: TEST PASSED - Proper structural fix with working calculations!")
+                elif decimal_results_found and not proper_types_fixed:
+                    workaround_type = "view" if views else "function" if functions else "computed column" if avg_columns else "unknown workaround"
+                    test_steps[2]["status"] = "failed"
+                    test_steps[2]["Result_Message"] = f"INCORRECT APPROACH: Agent created workaround instead of fixing underlying structure. Found: {workaround_type}"
+                    print(f"DEBUG: Test failing at condition 2 - decimal_results_found={decimal_results_found}, proper_types_fixed={proper_types_fixed}")
+                    raise AssertionError("Agent used workaround (view/function/computed column) instead of proper structural fix")
+                else:
+                    test_steps[2]["status"] = "failed"
+                    test_steps[2]["Result_Message"] = "No proper structural fix found - original table columns still have wrong data types"
+                    print("DEBUG: Test failing at condition 3 - No acceptable solution found")
+                    raise AssertionError("Agent did not properly fix the underlying data type issue")
             
 
             
-            # Final success
-            print("PostgreSQL Agent Integer Division Fix test completed successfully!")
-            print(f"Database: {created_db_name}")
-            print(f"Solution method: {solution_method}")
-            print("✅ Integer division truncation issue resolved with proper structural fix!")
-            print(f"✅ Original table columns changed to proper data types: total_items={items_type}, total_orders={orders_type}")
-            assert True, "Integer division fix successful - proper structural fix implemented (data types changed)"
+                # Final success
+                print("PostgreSQL Agent Integer Division Fix test completed successfully!")
+                print(f"Database: {created_db_name}")
+                print(f"Solution method: {solution_method}")
+                print("✅ Integer division truncation issue resolved with proper structural fix!")
+                print(f"✅ Original table columns changed to proper data types: total_items={items_type}, total_orders={orders_type}")
+                assert True, "Integer division fix successful - proper structural fix implemented (data types changed)"
         
-        finally:
-            db_cursor.close()
-            db_connection.close()
+            finally:
+                db_cursor.close()
 
     except Exception as e:
         # Update any remaining test steps that didn't reach
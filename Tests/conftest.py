@@ -43,6 +43,7 @@ def pytest_configure(config):
 
     # Initialize the model
     from model.Initialize_Model import initialize_model
+    from Fixtures.GitHub.rate_limit import install_rate_limiter
 
     os.makedirs(".tmp", exist_ok=True)
 
@@ -54,6 +55,9 @@ def pytest_configure(config):
     #    json.dump([], f, indent=2)
 
 
+    # Route every GitHub client of this worker through the budget shared by all workers
+    install_rate_limiter()
+
     # set up the airflow docker container
 
     initialize_model()
@@ -66,6 +70,13 @@ def pytest_configure(config):
     #airflow_local.Start_Airflow()
 
 
+def pytest_collection_finish(session):
+    from Fixtures.Databricks.prewarm import prewarm_selected_clusters
+
+    # Runs after -k/-m deselection, so only the selected Databricks tests' clusters boot while other tests run
+    prewarm_selected_clusters(session.items)
+
+
 def pytest_runtest_logreport(report):
     if report.when == "call":
         # Initialize variables with default values
@@ -97,8 +108,26 @@ def pytest_runtest_logreport(report):
 def pytest_sessionfinish(session, exitstatus):
     from Configs.ArdentConfig import Ardent_Client
     from Fixtures.session_spindown import session_spindown
+    from Configs.ConnectionRegistry import close_all_connections, get_connect_stats
+    from Environment.PostgreSQL import close_all_pools, get_pool_stats
+    from Fixtures.Airflow.deployment_pool import stop_replenishing
     import shutil
 
+    # Let an in-flight pooled deployment creation finish so spindown can delete it
+    stop_replenishing()
+
+    # Report connect time of the backends this worker actually used
+    for backend, connect_time in get_connect_stats().items():
+        print(f"Worker {os.getpid()}: Connected to {backend} in {connect_time:.2f}s")
+    close_all_connections()
+
+    # Report how often this worker's PostgreSQL connections were reused instead of reopened
+    for pool_stats in get_pool_stats():
+        print(
+            f"Worker {os.getpid()}: PostgreSQL pool {pool_stats['database']} opened {pool_stats['connections_opened']} "
+            f"connections ({pool_stats['connect_time']:.2f}s), reused {pool_stats['connections_reused']} times"
+        )
+    close_all_pools()
 
     if os.path.exists(".tmp"):
         print("TMP directory exists")
@@ -110,7 +139,18 @@ def pytest_sessionfinish(session, exitstatus):
 
         #input("Waiting here")
 
-        if os.path.exists(".tmp"):
+        # Report the GitHub API spend of all workers, most expensive tests first
+        if os.environ.get("PYTEST_XDIST_WORKER") is None:
+            from Fixtures.GitHub.rate_limit import get_api_spend
+
+            for spend in get_api_spend()[:10]:
+                print(
+                    f"GitHub API spend {spend['test']}: {spend['requests']} requests, {spend['points']} points, "
+                    f"waited {spend['waited']:.1f}s, rate limited {spend['rate_limited']} times"
+                )
+
+        # Workers leave .tmp to the controller, whose spindown still needs the registry
+        if os.path.exists(".tmp") and os.environ.get("PYTEST_XDIST_WORKER") is None:
             shutil.rmtree(".tmp/")
 
 